@@ -0,0 +1,247 @@
+"""Command-line maintenance tasks for the hospital database.
+
+Usage:
+    python hospital_admin.py [--db hospital.db] rebuild-counters [--verify]
+    python hospital_admin.py [--db hospital.db] verify-stock
+    python hospital_admin.py [--db hospital.db] backup DEST [--compress] [--no-verify]
+    python hospital_admin.py [--db hospital.db] import-patients FILE [--batch-size N] [--rejects PATH]
+    python hospital_admin.py [--db hospital.db] export TABLE DEST [--from DATE] [--to DATE] [--status S]
+    python hospital_admin.py [--db hospital.db] seed [--scale 10k|1m|10m | --patients N] [--seed N]
+    python hospital_admin.py [--db hospital.db] benchmark [--repeat N] [--only NAME ...] [--output FILE]
+                                                          [--sql-profile FILE]
+    python hospital_admin.py [--db hospital.db] serve [--host HOST] [--port N] [--readers N]
+    python hospital_admin.py [--db hospital.db] add-user USERNAME --role ROLE --full-name NAME
+    python hospital_admin.py [--db hospital.db] change-password USERNAME
+"""
+import argparse
+import getpass
+import json
+import sqlite3
+import sys
+
+from hospital_service import HospitalService, DB_PATH, EXPORT_TABLES
+from hospital_backup import backup_database
+from hospital_import import import_patients, BATCH_SIZE
+from hospital_export import export_table
+from hospital_seed import seed_database, SCALES
+from hospital_benchmark import run_benchmarks, BENCHMARKS, REPEAT
+from hospital_profiler import profiler
+from hospital_server import serve_database, HOST, PORT, READERS
+
+
+def rebuild_counters(db, args):
+    """Recompute stats_counters and report counters that had drifted"""
+    drift = db.rebuild_counters(verify_only=args.verify)
+    for name, (stored, live) in sorted(drift.items()):
+        print(f"{name}: stored {stored}, live {live}")
+    if args.verify:
+        print("Counters match live aggregates" if not drift
+              else f"{len(drift)} counter(s) out of date")
+        return 1 if drift else 0
+    print(f"Counters rebuilt ({len(drift)} corrected)")
+    return 0
+
+
+def verify_stock(db, args):
+    """Check every item's quantity against its stock movement ledger"""
+    drift = db.verify_stock()
+    for item_id, (quantity, ledger) in sorted(drift.items()):
+        print(f"{item_id}: quantity {quantity}, ledger {ledger}")
+    print("Stock matches the ledger" if not drift
+          else f"{len(drift)} item(s) disagree with the ledger")
+    return 1 if drift else 0
+
+
+def backup(db, args):
+    """Take an online backup of the database"""
+    def progress(fraction):
+        print(f"\r{fraction:.0%}", end='', flush=True)
+    
+    backup_database(db.conn, args.dest, compress=args.compress,
+                    verify=not args.no_verify, progress=progress)
+    print(f"\rBackup written to {args.dest}")
+    return 0
+
+
+def import_patients_file(db, args):
+    """Bulk import patients from a CSV export or a JSON Lines file"""
+    def progress(fraction):
+        print(f"\r{fraction:.0%}", end='', flush=True)
+    
+    summary = import_patients(db, args.file, batch_size=args.batch_size,
+                              rejects_path=args.rejects, progress=progress)
+    print(f"\rImported {summary['imported']} of {summary['read']} rows in "
+          f"{summary['seconds']:.1f}s ({summary['rows_per_second']:,.0f} rows/s)")
+    if summary['rejected']:
+        print(f"{summary['rejected']} rejected rows written to {summary['rejects_path']}")
+    return 0
+
+
+def export(db, args):
+    """Stream a table to CSV or JSON Lines (gzipped if DEST ends in .gz)"""
+    def progress(fraction):
+        print(f"\r{fraction:.0%}", end='', flush=True)
+    
+    count = export_table(db, args.table, args.dest, args.date_from, args.date_to,
+                         args.status, progress=progress)
+    print(f"\r{count} rows written to {args.dest}")
+    return 0
+
+
+def seed(db, args):
+    """Fill an empty database with seeded synthetic data"""
+    def progress(table, done, total):
+        print(f"\r{table}: {done:,}/{total:,}".ljust(40), end='', flush=True)
+    
+    patients = args.patients or SCALES[args.scale]
+    summary = seed_database(db, patients, seed=args.seed, progress=progress)
+    seconds = summary.pop('seconds')
+    print(f"\rSeeded in {seconds:.1f}s".ljust(40))
+    for table, rows in summary.items():
+        print(f"  {table}: {rows:,}")
+    return 0
+
+
+def benchmark(db, args):
+    """Time the hot code paths and write the results as JSON"""
+    def progress(name, summary):
+        print(f"{name}: median {summary['median_ms']:.2f} ms, "
+              f"p95 {summary['p95_ms']:.2f} ms", file=sys.stderr)
+    
+    profiler.configure(enabled=bool(args.sql_profile))
+    result = run_benchmarks(db, args.only, repeat=args.repeat, progress=progress)
+    if args.sql_profile:
+        profiler.dump(args.sql_profile)
+        print(f"SQL profile written to {args.sql_profile}", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+def serve(db, args):
+    """Share the database with Tk clients as a JSON API server"""
+    def ready(host, port):
+        print(f"Serving {args.db} on http://{host}:{port} (Ctrl+C to stop)", flush=True)
+    
+    try:
+        serve_database(args.db, args.host, args.port, args.readers, ready=ready)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def add_user(db, args):
+    """Add a user, prompting for the password"""
+    password = getpass.getpass("Password: ")
+    if not password or password != getpass.getpass("Confirm password: "):
+        raise ValueError("Passwords are empty or do not match")
+    try:
+        db.add_user(args.username, password, args.role, args.full_name)
+    except sqlite3.IntegrityError:
+        raise ValueError(f"User {args.username} already exists")
+    print(f"User {args.username} added")
+    return 0
+
+
+def change_password(db, args):
+    """Change a user's password, prompting for the current and new one"""
+    current = getpass.getpass("Current password: ")
+    new = getpass.getpass("New password: ")
+    if not new or new != getpass.getpass("Confirm new password: "):
+        raise ValueError("New passwords are empty or do not match")
+    if not db.change_password(args.username, current, new):
+        raise ValueError("Unknown user or wrong current password")
+    print(f"Password of {args.username} changed")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hospital database maintenance")
+    parser.add_argument('--db', default=DB_PATH, help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = commands.add_parser('rebuild-counters', help=rebuild_counters.__doc__)
+    rebuild.add_argument('--verify', action='store_true',
+                         help="only compare against live aggregates; exit 1 on drift")
+    rebuild.set_defaults(func=rebuild_counters)
+    
+    stock = commands.add_parser('verify-stock', help=verify_stock.__doc__)
+    stock.set_defaults(func=verify_stock)
+    
+    dump = commands.add_parser('backup', help=backup.__doc__)
+    dump.add_argument('dest', help="backup file to write")
+    dump.add_argument('--compress', action='store_true', help="gzip the backup")
+    dump.add_argument('--no-verify', action='store_true', help="skip the integrity check")
+    dump.set_defaults(func=backup)
+    
+    load = commands.add_parser('import-patients', help=import_patients_file.__doc__)
+    load.add_argument('file', help=".csv (export layout) or .jsonl file")
+    load.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                      help="rows per transaction (default: %(default)s)")
+    load.add_argument('--rejects', help="where to write rejected rows "
+                                        "(default: FILE.rejected next to the input)")
+    load.set_defaults(func=import_patients_file)
+    
+    out = commands.add_parser('export', help=export.__doc__)
+    out.add_argument('table', choices=sorted(EXPORT_TABLES))
+    out.add_argument('dest', help=".csv or .jsonl file, optionally ending in .gz")
+    out.add_argument('--from', dest='date_from', help="earliest date (YYYY-MM-DD)")
+    out.add_argument('--to', dest='date_to', help="latest date (YYYY-MM-DD)")
+    out.add_argument('--status', help="only rows with this status")
+    out.set_defaults(func=export)
+    
+    fill = commands.add_parser('seed', help=seed.__doc__)
+    size = fill.add_mutually_exclusive_group()
+    size.add_argument('--scale', choices=list(SCALES), default='10k',
+                      help="number of patients (default: %(default)s)")
+    size.add_argument('--patients', type=int, help="exact number of patients")
+    fill.add_argument('--seed', type=int, default=0,
+                      help="random seed; the same seed gives the same data (default: %(default)s)")
+    fill.set_defaults(func=seed)
+    
+    bench = commands.add_parser('benchmark', help=benchmark.__doc__)
+    bench.add_argument('--repeat', type=int, default=REPEAT,
+                       help="timed runs per benchmark (default: %(default)s)")
+    bench.add_argument('--only', nargs='+', choices=list(BENCHMARKS), metavar='NAME',
+                       help="benchmarks to run: " + ", ".join(BENCHMARKS))
+    bench.add_argument('--output', help="JSON file to write (default: standard output)")
+    bench.add_argument('--sql-profile', metavar='FILE',
+                       help="also profile every SQL statement and write the profile to FILE")
+    bench.set_defaults(func=benchmark)
+    
+    api = commands.add_parser('serve', help=serve.__doc__)
+    api.add_argument('--host', default=HOST,
+                     help="address to listen on; only use a trusted network (default: %(default)s)")
+    api.add_argument('--port', type=int, default=PORT, help="port (default: %(default)s)")
+    api.add_argument('--readers', type=int, default=READERS,
+                     help="read connections (default: %(default)s)")
+    api.set_defaults(func=serve)
+    
+    user = commands.add_parser('add-user', help=add_user.__doc__)
+    user.add_argument('username')
+    user.add_argument('--role', required=True, choices=["admin", "doctor", "staff", "receptionist"])
+    user.add_argument('--full-name', required=True)
+    user.set_defaults(func=add_user)
+    
+    password = commands.add_parser('change-password', help=change_password.__doc__)
+    password.add_argument('username')
+    password.set_defaults(func=change_password)
+
+    args = parser.parse_args(argv)
+    db = HospitalService(args.db)
+    try:
+        return args.func(db, args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
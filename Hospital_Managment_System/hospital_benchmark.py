@@ -0,0 +1,188 @@
+"""Repeatable timings of the application's hot paths.
+
+Each benchmark calls the same service and module functions the Tk
+screens use (the screens only add widget updates on top), repeat times
+against the given database, and reports its latencies in milliseconds.
+run_benchmarks returns a JSON-serializable dict that also records the
+SQLite, Python and schema versions and the table sizes, so results from
+different versions of the application can be compared side by side.
+
+save_bill, concurrent_saves and record_movements write real bills,
+patients and stock movements into the database, so point them at a
+copy or a seeded database rather than production data.
+"""
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from hospital_backup import backup_database
+from hospital_export import export_table
+from hospital_schema import SCHEMA_VERSION
+from hospital_service import Bill, BillItem, Patient, StockMovement, EXPORT_TABLES
+from hospital_writer import GroupCommitWriter
+
+REPEAT = 5
+
+# Front-desk clients saving patients at the same time in concurrent_saves
+SAVE_CLIENTS = 8
+
+SAVES_PER_CLIENT = 25
+
+# Terms searched by search_patients: a name prefix, a full name word,
+# an ID prefix and a phone prefix
+SEARCH_TERMS = ["jo", "Smith", "PAT00001", "555-12"]
+
+# Stock movements recorded by record_movements, each committed alone
+MOVEMENTS = 20
+
+
+def _dashboard(db, scratch, rng):
+    db._stats_cache = None
+    db.dashboard_stats()
+
+
+def _search_patients(db, scratch, rng):
+    for term in SEARCH_TERMS:
+        db.search_patients(term)
+
+
+def _refresh_patients(db, scratch, rng):
+    # First two pages, as the patient list loads them while scrolling
+    page = db.patients_page()
+    if page:
+        db.patients_page(after=page[-1][0])
+
+
+def _patient_report(db, scratch, rng):
+    db.patient_statistics()
+    db.recent_patients(10)
+
+
+def _export_patients(db, scratch, rng):
+    export_table(db, 'patients', os.path.join(scratch, 'patients.csv'))
+
+
+def _save_bill(db, scratch, rng):
+    row = db.conn.execute(
+        "SELECT patient_id, name FROM patients WHERE id >= ? ORDER BY id LIMIT 1",
+        (rng.randrange(1, db.counter('patients') + 1),)).fetchone()
+    patient_id, name = row if row else ('PAT0000000', 'Benchmark Patient')
+    db.add_bill(Bill(db.next_id('bill'), patient_id, name,
+                     [BillItem("Consultation", qty=1, unit_price=50.0),
+                      BillItem("Blood Test", qty=2, unit_price=40.0)],
+                     total_amount=130.0, paid_amount=130.0, payment_method="Cash"))
+
+
+def _concurrent_saves(db, scratch, rng):
+    # Every client waits for its save to commit before the next, as
+    # save_patient does, through one group-commit writer
+    writer = GroupCommitWriter(db.db_path, profile=db.profile)
+    patient_ids = db.ids.take('patient', SAVE_CLIENTS * SAVES_PER_CLIENT)
+    
+    def client(ids):
+        for patient_id in ids:
+            patient = Patient(patient_id, "Benchmark Patient", 40, phone="555-0100")
+            writer.call(lambda db: db.add_patient(patient))
+    
+    clients = [threading.Thread(target=client, args=(patient_ids[i::SAVE_CLIENTS],))
+               for i in range(SAVE_CLIENTS)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    writer.close()
+
+
+def _inventory_alerts(db, scratch, rng):
+    # First page of each list the inventory screen opens with
+    db.reorder_alerts()
+    db.expiring_items()
+
+
+def _record_movements(db, scratch, rng):
+    # Receive and issue the same amount so stock levels stay put
+    last = db._scalar("SELECT IFNULL(MAX(id), 0) FROM inventory")
+    for _ in range(MOVEMENTS // 2):
+        row = db.conn.execute("SELECT item_id FROM inventory WHERE id >= ? ORDER BY id LIMIT 1",
+                              (rng.randrange(1, last + 1),)).fetchone()
+        if row is None:
+            return
+        db.record_movement(StockMovement(row[0], 1, 'Received', 'benchmark'))
+        db.record_movement(StockMovement(row[0], -1, 'Issued', 'benchmark'))
+
+
+def _backup(db, scratch, rng):
+    backup_database(db.conn, os.path.join(scratch, 'backup.db'))
+
+
+# name -> fn(db, scratch_dir, rng); names follow the screens' methods
+BENCHMARKS = {
+    'dashboard_counts': _dashboard,
+    'search_patients': _search_patients,
+    'refresh_patients': _refresh_patients,
+    'generate_patient_report': _patient_report,
+    'export_patients_csv': _export_patients,
+    'save_bill': _save_bill,
+    'concurrent_saves': _concurrent_saves,
+    'inventory_alerts': _inventory_alerts,
+    'record_movements': _record_movements,
+    'backup': _backup,
+}
+
+
+def summarize(samples):
+    """min/median/mean/p95/max of samples in seconds, as milliseconds"""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        'runs': len(ordered),
+        'min_ms': ordered[0] * 1000,
+        'median_ms': statistics.median(ordered) * 1000,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p95_ms': p95 * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def run_benchmarks(db, names=None, repeat=REPEAT, seed=0, progress=None):
+    """Time the named benchmarks (all of BENCHMARKS by default)
+
+    Every benchmark runs once untimed to warm the page cache, then repeat
+    timed times. progress(name, summary) is called as each one finishes.
+    """
+    names = list(BENCHMARKS) if names is None else names
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(unknown)}")
+    rng = random.Random(seed)
+    result = {
+        'started': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'database': os.path.abspath(db.db_path),
+        'schema_version': SCHEMA_VERSION,
+        'sqlite_version': sqlite3.sqlite_version,
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'pragmas': db.pragma_settings(),
+        'rows': {table: db.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                 for table in sorted(EXPORT_TABLES)},
+        'repeat': repeat,
+        'benchmarks': {},
+    }
+    with tempfile.TemporaryDirectory() as scratch:
+        for name in names:
+            fn = BENCHMARKS[name]
+            fn(db, scratch, rng)
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                fn(db, scratch, rng)
+                samples.append(time.perf_counter() - started)
+            result['benchmarks'][name] = summarize(samples)
+            if progress:
+                progress(name, result['benchmarks'][name])
+    return result
@@ -0,0 +1,70 @@
+"""Small in-process caches shared by the service layer and the widgets"""
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe mapping that keeps the maxsize most recently used keys
+
+    hits and misses count get() calls. A value read from elsewhere while
+    another thread changes it is put with the version() taken before the
+    read; the put is skipped if the key was discarded in between, so a
+    stale read cannot outlive the discard that follows a write.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        # key -> clock at its last discard, for the maxsize latest ones;
+        # older discards are only known to be at or before _floor
+        self._discarded = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def version(self, key):
+        """Token for put() of a value of key about to be read"""
+        with self._lock:
+            return self._clock
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            if version is not None and self._discarded.get(key, self._floor) > version:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._clock += 1
+            self._discarded[key] = self._clock
+            self._discarded.move_to_end(key)
+            if len(self._discarded) > self.maxsize:
+                _, self._floor = self._discarded.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._discarded.clear()
+            self._clock += 1
+            self._floor = self._clock
@@ -0,0 +1,142 @@
+"""HospitalService operations over a hospital_server.
+
+RemoteService has a method for every entry of hospital_server.ENDPOINTS,
+taking the same arguments and returning the same values as the
+HospitalService method of that name, so the Tk screens and their
+background jobs run unchanged against a server. JSON arrays nested in a
+result come back as tuples, so rows in a list and page keys behave as
+they do from sqlite3; a result that is itself one row is a list.
+export_cursor pages through the export_page endpoint, so exports stream
+as they do locally. Operations that need the database file itself, such
+as backups and restores, and user management, which the server does not
+expose, raise NotImplementedError; run those on the server machine with
+hospital_admin.
+
+Like a sqlite3 connection, a RemoteService keeps one HTTP connection
+and belongs to one thread at a time.
+"""
+import http.client
+import inspect
+import json
+import urllib.parse
+
+from hospital_service import HospitalService
+from hospital_server import ENDPOINTS, ERRORS, ServerError, encode, tuples
+
+# Seconds to wait for the server
+TIMEOUT = 60
+
+# Rows fetched per export_page request
+EXPORT_PAGE = 5000
+
+# HospitalService instance attributes that only exist next to the file
+LOCAL_ATTRIBUTES = ('conn', 'ids', 'has_patient_fts')
+
+
+class RemoteService:
+    """Client for a hospital_server with HospitalService's interface"""
+
+    def __init__(self, url, timeout=TIMEOUT):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise ValueError(f"Not an http:// server URL: {url!r}")
+        self.url = url
+        self.db_path = url
+        self._http = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        # The server does the database upkeep itself
+        self.profile = dict(self._call('profile'), maintenance_interval=0)
+
+    def close(self):
+        self._http.close()
+
+    def interrupt(self):
+        """Nothing to abort locally; the server finishes the request"""
+
+    def rollback(self):
+        """Every request is its own transaction on the server"""
+
+    def export_cursor(self, table, date_from=None, date_to=None, status=None):
+        return _ExportCursor(self, table, (date_from, date_to, status))
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not (hasattr(HospitalService, name)
+                                        or name in LOCAL_ATTRIBUTES):
+            raise AttributeError(name)
+        raise NotImplementedError(f"{name} is not available through the server; "
+                                  f"run it on the server machine")
+
+    def _call(self, name, *args, **kwargs):
+        method, path, _ = ENDPOINTS[name]
+        arguments = {}
+        if callable(getattr(HospitalService, name, None)):
+            bound = inspect.signature(getattr(HospitalService, name)).bind(self, *args, **kwargs)
+            arguments = {key: value for key, value in bound.arguments.items() if key != 'self'}
+
+        headers = {}
+        if method == 'GET':
+            query = urllib.parse.urlencode(
+                {key: json.dumps(value, default=encode) for key, value in arguments.items()})
+            target, body = f"{path}?{query}" if query else path, None
+        else:
+            target, body = path, json.dumps(arguments, default=encode).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        # A kept-alive connection the server has since closed fails on
+        # first use; only a read is safe to send again
+        for attempt in range(2 if method == 'GET' else 1):
+            try:
+                self._http.request(method, target, body, headers)
+                response = self._http.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self._http.close()
+                if attempt or method != 'GET':
+                    raise
+
+        if response.status != 200:
+            error = ERRORS.get(payload.get('type'), ServerError)
+            raise error(payload.get('error', f"HTTP {response.status}"))
+        return tuples(payload['result'])
+
+
+class _ExportCursor:
+    """The part of a sqlite3 cursor export_table reads, over export_page"""
+
+    def __init__(self, service, table, filters):
+        self._service = service
+        self._table = table
+        self._filters = filters
+        self._rows = []
+        self._after = 0
+        columns, page = service.export_page(table, *filters, limit=EXPORT_PAGE)
+        self.description = [(column,) + (None,) * 6 for column in columns]
+        self._id = columns.index('id')
+        self._add(page)
+
+    def _add(self, page):
+        self._rows.extend(page)
+        self._more = len(page) == EXPORT_PAGE
+        if page:
+            self._after = page[-1][self._id]
+
+    def fetchmany(self, size):
+        while len(self._rows) < size and self._more:
+            _, page = self._service.export_page(self._table, *self._filters,
+                                                after=self._after, limit=EXPORT_PAGE)
+            self._add(page)
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+
+def _remote(name):
+    def call(self, *args, **kwargs):
+        return self._call(name, *args, **kwargs)
+    call.__name__ = name
+    call.__doc__ = getattr(getattr(HospitalService, name, None), '__doc__', None)
+    return call
+
+
+for _name in ENDPOINTS:
+    if _name != 'profile':
+        setattr(RemoteService, _name, _remote(_name))
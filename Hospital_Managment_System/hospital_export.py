@@ -0,0 +1,62 @@
+"""Streaming exports of any table to CSV or JSON Lines.
+
+Rows are read with fetchmany in chunks of EXPORT_CHUNK and written as
+they arrive, so memory use stays flat however large the table is. The
+format follows the file name: .jsonl for JSON Lines, anything else for
+CSV, and a trailing .gz compresses the output with gzip.
+"""
+import csv
+import gzip
+import io
+import json
+
+EXPORT_CHUNK = 5000
+
+
+def column_label(column):
+    """CSV header label for a column, e.g. patient_id -> "Patient ID"
+
+    hospital_import.column_name maps the label back to the column.
+    """
+    return " ".join('ID' if word == 'id' else word.capitalize()
+                    for word in column.split('_'))
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'wb', compresslevel=6),
+                                encoding='utf-8', newline='')
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def export_table(db, table, path, date_from=None, date_to=None, status=None,
+                 chunk_size=EXPORT_CHUNK, progress=None):
+    """Write the rows of table matching the filters to path
+
+    date_from and date_to bound the table's date column (inclusive) and
+    status matches its status column, as listed in EXPORT_TABLES.
+    progress(fraction) is called after every chunk. Returns the number
+    of rows written.
+    """
+    total = db.export_count(table, date_from, date_to, status) if progress else 0
+    cursor = db.export_cursor(table, date_from, date_to, status)
+    columns = [d[0] for d in cursor.description]
+    name = path[:-3] if path.endswith('.gz') else path
+    jsonl = name.endswith('.jsonl')
+    written = 0
+    with _open(path) as f:
+        if not jsonl:
+            writer = csv.writer(f)
+            writer.writerow([column_label(c) for c in columns])
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if jsonl:
+                f.write("".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows))
+            else:
+                writer.writerows(rows)
+            written += len(rows)
+            if progress:
+                progress(min(written / total, 1.0) if total else 1.0)
+    return written
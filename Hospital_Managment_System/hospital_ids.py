@@ -0,0 +1,130 @@
+"""Sequence-backed generation of entity IDs such as PAT0000042.
+
+Each kind of ID has a counter in the id_sequences table. A process takes
+a block of block_size numbers with one short write transaction and then
+hands IDs out of that block from memory, so concurrent clients never
+produce the same ID and most IDs cost no database round trip. Numbers
+left in a block when the process exits are simply never used.
+"""
+import threading
+
+# kind -> (table, column) holding IDs of that kind
+ID_COLUMNS = {
+    'patient': ('patients', 'patient_id'),
+    'doctor': ('doctors', 'doctor_id'),
+    'appointment': ('appointments', 'appointment_id'),
+    'bill': ('billing', 'bill_id'),
+    'staff': ('staff', 'staff_id'),
+    'item': ('inventory', 'item_id'),
+    'prescription': ('prescriptions', 'prescription_id'),
+    'admission': ('admissions', 'admission_id'),
+    'lab_test': ('lab_tests', 'test_id'),
+    'operation': ('operations', 'operation_id'),
+}
+
+# kind -> [prefix, zero-padded width]; override per kind with the
+# id_formats entry of the performance profile
+ID_FORMATS = {
+    'patient': ['PAT', 7],
+    'doctor': ['DOC', 6],
+    'appointment': ['APT', 8],
+    'bill': ['BILL', 8],
+    'staff': ['STF', 6],
+    'item': ['ITM', 6],
+    'prescription': ['RX', 8],
+    'admission': ['ADM', 7],
+    'lab_test': ['LAB', 8],
+    'operation': ['OPR', 7],
+}
+
+ID_BLOCK_SIZE = 100
+
+
+class IdAllocator:
+    """Hands out IDs from per-process blocks of a database sequence
+
+    connect() must return a connection in autocommit mode to the same
+    database; the allocator keeps it for its own block transactions so
+    that a block is committed even if the caller's transaction rolls
+    back. For an in-memory database, which no other connection can
+    reach, pass the one connection as conn instead. Safe to share
+    between threads.
+    """
+
+    def __init__(self, connect=None, block_size=ID_BLOCK_SIZE, formats=None, conn=None):
+        self._connect = connect
+        self.block_size = block_size
+        self.formats = {**ID_FORMATS, **(formats or {})}
+        self._conn = conn
+        self._owns_conn = conn is None
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            if self._owns_conn and self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def reset(self):
+        """Forget the reserved blocks, e.g. after the database was restored"""
+        with self._lock:
+            self._blocks.clear()
+
+    def format(self, kind, number):
+        prefix, width = self.formats[kind]
+        return f"{prefix}{number:0{width}d}"
+
+    def next(self, kind):
+        """The next unused ID of kind, e.g. next('patient')"""
+        return self.take(kind, 1)[0]
+
+    def take(self, kind, count):
+        """count unused IDs of kind"""
+        if kind not in ID_COLUMNS:
+            raise ValueError(f"Unknown ID kind {kind!r}")
+        numbers = []
+        with self._lock:
+            while len(numbers) < count:
+                start, end = self._blocks.get(kind, (0, 0))
+                if start >= end:
+                    start, end = self._reserve(kind, max(self.block_size, count - len(numbers)))
+                used = min(end - start, count - len(numbers))
+                numbers.extend(range(start, start + used))
+                self._blocks[kind] = (start + used, end)
+        return [self.format(kind, n) for n in numbers]
+
+    def _reserve(self, kind, size):
+        if self._conn is None:
+            self._conn = self._connect()
+        conn = self._conn
+        # A borrowed in-memory connection may already be in a transaction
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not conn.execute("SELECT 1 FROM id_sequences WHERE name = ?", (kind,)).fetchone():
+                conn.execute("INSERT INTO id_sequences (name, next_value) VALUES (?, ?)",
+                             (kind, self._first_free(conn, kind)))
+            start = conn.execute("""
+                UPDATE id_sequences SET next_value = next_value + ? WHERE name = ?
+                RETURNING next_value - ?
+            """, (size, kind, size)).fetchall()[0][0]
+        except BaseException:
+            if own_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        if own_transaction:
+            conn.execute("COMMIT")
+        return start, start + size
+
+    def _first_free(self, conn, kind):
+        """1 + the highest number already used in kind's format, so a new
+        sequence starts clear of IDs written before it existed"""
+        table, column = ID_COLUMNS[kind]
+        prefix, width = self.formats[kind]
+        row = conn.execute(f"""
+            SELECT {column} FROM {table} WHERE {column} GLOB ?
+            ORDER BY {column} DESC LIMIT 1
+        """, (prefix + '[0-9]' * width,)).fetchone()
+        return int(row[0][len(prefix):]) + 1 if row else 1
@@ -0,0 +1,169 @@
+"""Streaming bulk import of patients from CSV or JSON Lines files.
+
+CSV files use the column layout written by Export to CSV (the header
+row's labels, e.g. "Patient ID"); JSON Lines records may use either those
+labels or the column names ("patient_id"). The ID column is ignored and
+an empty Patient ID is generated. The file is read as a stream and
+inserted in batches of BATCH_SIZE rows, one transaction per batch, so
+memory use does not grow with the file. Rows that fail validation or
+duplicate an existing Patient ID are written to a rejects file next to
+the input together with the reason.
+"""
+import csv
+import json
+import os
+import time
+from dataclasses import fields, MISSING
+
+from hospital_service import Patient
+
+BATCH_SIZE = 5000
+
+PATIENT_FIELDS = [f.name for f in fields(Patient)]
+
+AGE = PATIENT_FIELDS.index('age')
+
+# Fields whose blank value is replaced by the Patient default
+DEFAULTS = [(i, f) for i, f in enumerate(fields(Patient))
+            if f.default_factory is not MISSING or f.default not in (MISSING, None, '')]
+
+
+def column_name(label):
+    """Map an export header label such as "Blood Group" to its column"""
+    return label.strip().lower().replace(' ', '_')
+
+
+def _read_csv(f, rejects):
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    rejects.header = header
+    names = [column_name(label) for label in header]
+    positions = [names.index(name) if name in names else None for name in PATIENT_FIELDS]
+    width = len(header)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row += [''] * (width - len(row))
+        yield reader.line_num, [row[i] if i is not None else '' for i in positions], row
+
+
+def _read_jsonl(f, rejects):
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, dict):
+            record = {column_name(k): v for k, v in record.items()}
+            values = ['' if record.get(name) is None else str(record[name])
+                      for name in PATIENT_FIELDS]
+        else:
+            values = None
+        yield line_no, values, line.rstrip('\r\n')
+
+
+def parse_patient(values):
+    """Build a Patient from field values in PATIENT_FIELDS order
+
+    Blank values take the Patient default. Raises ValueError if the row
+    is invalid.
+    """
+    if values is None:
+        raise ValueError("Not a valid JSON object")
+    age = values[AGE]
+    if age:
+        try:
+            age = values[AGE] = int(float(age))
+        except ValueError:
+            raise ValueError(f"Invalid age {age!r}")
+        if not 0 <= age <= 150:
+            raise ValueError(f"Age out of range: {age}")
+    for i, f in DEFAULTS:
+        if not values[i]:
+            values[i] = f.default if f.default_factory is MISSING else f.default_factory()
+    return Patient(*values)
+
+
+class _Rejects:
+    """Rejects file opened on the first rejected row"""
+
+    def __init__(self, path, jsonl):
+        self.path = path
+        self.jsonl = jsonl
+        self.header = []
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def add(self, line_no, reason, raw):
+        if self._file is None:
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            if not self.jsonl:
+                self._writer = csv.writer(self._file)
+                self._writer.writerow(['Line', 'Error'] + self.header)
+        if self.jsonl:
+            self._file.write(json.dumps({'line': line_no, 'error': reason, 'record': raw}) + '\n')
+        else:
+            self._writer.writerow([line_no, reason] + raw)
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def import_patients(db, path, batch_size=BATCH_SIZE, rejects_path=None, progress=None):
+    """Stream patients from a .csv or .jsonl file into the database
+
+    progress(fraction) is called after every batch. Returns a summary
+    dict with the rows read, imported and rejected, the rejects file (or
+    None if every row was accepted), elapsed seconds and rows per second.
+    """
+    jsonl = os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson', '.json')
+    if rejects_path is None:
+        base, ext = os.path.splitext(path)
+        rejects_path = f"{base}.rejected{ext}"
+    size = os.path.getsize(path) or 1
+    started = time.perf_counter()
+    read = imported = 0
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rejects = _Rejects(rejects_path, jsonl)
+        records = (_read_jsonl if jsonl else _read_csv)(f, rejects)
+        try:
+            while True:
+                batch = []
+                for line_no, record, raw in records:
+                    read += 1
+                    try:
+                        batch.append((line_no, raw, parse_patient(record)))
+                    except ValueError as e:
+                        rejects.add(line_no, str(e), raw)
+                    if len(batch) == batch_size:
+                        break
+                if not batch:
+                    break
+                skipped = db.add_patients([patient for _, _, patient in batch])
+                for i in skipped:
+                    line_no, raw, patient = batch[i]
+                    rejects.add(line_no, f"Duplicate patient ID {patient.patient_id}", raw)
+                imported += len(batch) - len(skipped)
+                if progress:
+                    progress(min(f.buffer.tell() / size, 1.0))
+        finally:
+            rejects.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        'read': read,
+        'imported': imported,
+        'rejected': rejects.count,
+        'rejects_path': rejects_path if rejects.count else None,
+        'seconds': seconds,
+        'rows_per_second': read / seconds if seconds else 0.0,
+    }
@@ -1,20 +1,59 @@
+import time
+# Start of the startup profile; everything below is counted as imports
+STARTED = time.perf_counter()
+import argparse
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import sqlite3
 import datetime
-import random
-import hashlib
-from tkcalendar import DateEntry
-import re
-import json
 import os
-from datetime import datetime as dt
-from tkinter import filedialog
-import csv
+from hospital_service import (HospitalService, DB_PATH, PROFILE_PATH, EXPORT_TABLES, Patient, Doctor, Appointment, Bill,
+                              InventoryItem, StockMovement, MOVEMENT_REASONS, EXPIRY_WINDOW_DAYS,
+                              load_profile, service_method)
+from hospital_widgets import PagedTreeview, TypeaheadPicker
+from hospital_worker import BackgroundExecutor
+from hospital_writer import GroupCommitWriter
+from hospital_profiler import profiler
+from collections import OrderedDict
+# tkcalendar, tkinter.filedialog, csv and the backup, import and export
+# modules are imported where first used to keep them off the startup path
+
+# Module screens kept alive after navigating away from them
+SCREEN_CACHE_SIZE = 6
+
+class StartupProfile:
+    """Wall-clock phases of application start, printed by --profile-startup"""
+    
+    def __init__(self, started=None):
+        self.started = self.last = started if started is not None else time.perf_counter()
+        self.phases = []
+        self.background = []
+    
+    def mark(self, phase):
+        """End the current phase on the Tk thread and name it phase"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+    
+    def add_background(self, phase, seconds):
+        """Record a phase that ran on another thread, overlapping the others"""
+        self.background.append((phase, seconds))
+    
+    def report(self):
+        lines = ["Startup profile (ms)"]
+        for phase, seconds in self.phases:
+            lines.append(f"  {phase:<32}{seconds * 1000:9.1f}")
+        for phase, seconds in self.background:
+            lines.append(f"  {phase + ' (background)':<32}{seconds * 1000:9.1f}")
+        lines.append(f"  {'total':<32}{(self.last - self.started) * 1000:9.1f}")
+        return "\n".join(lines)
 
 class HospitalManagementSystem:
-    def __init__(self, root):
+    def __init__(self, root, startup=None, server=None):
         self.root = root
+        self.server = server
+        self.startup = startup if startup is not None else StartupProfile()
         self.root.title("Advanced Hospital Management System")
         self.root.geometry("1400x800")
         
@@ -26,196 +65,99 @@ class HospitalManagementSystem:
         self.warning_color = "#f39c12"
         self.light_color = "#ecf0f1"
         self.dark_color = "#34495e"
+        self.status_text = "Ready"
+        self.form_ids = {}
+        self.screens = OrderedDict()
+        self.current_screen = None
+        self.stamp = None
+        self.stamp_job = None
         
-        # Initialize database
-        self.init_database()
+        # Open the database while the login screen is being built
+        opener = self.open_database()
         
         # Create main container
         self.create_main_container()
+        self.startup.mark("main window")
         
         # Create login screen
         self.show_login_screen()
-    
-    def init_database(self):
-        """Initialize SQLite database and create tables"""
-        self.conn = sqlite3.connect('hospital.db', check_same_thread=False)
-        self.cursor = self.conn.cursor()
-        
-        # Create tables if they don't exist
-        tables = [
-            """CREATE TABLE IF NOT EXISTS patients (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                patient_id TEXT UNIQUE,
-                name TEXT,
-                age INTEGER,
-                gender TEXT,
-                address TEXT,
-                phone TEXT,
-                email TEXT,
-                blood_group TEXT,
-                emergency_contact TEXT,
-                registration_date TEXT,
-                last_visit TEXT,
-                medical_history TEXT,
-                allergies TEXT,
-                insurance_info TEXT,
-                status TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS doctors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                doctor_id TEXT UNIQUE,
-                name TEXT,
-                specialization TEXT,
-                qualification TEXT,
-                experience INTEGER,
-                phone TEXT,
-                email TEXT,
-                schedule TEXT,
-                department TEXT,
-                consultation_fee REAL,
-                availability TEXT,
-                rating REAL
-            )""",
-            """CREATE TABLE IF NOT EXISTS appointments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                appointment_id TEXT UNIQUE,
-                patient_id TEXT,
-                doctor_id TEXT,
-                appointment_date TEXT,
-                appointment_time TEXT,
-                reason TEXT,
-                status TEXT,
-                notes TEXT,
-                created_date TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS staff (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                staff_id TEXT UNIQUE,
-                name TEXT,
-                role TEXT,
-                department TEXT,
-                phone TEXT,
-                email TEXT,
-                salary REAL,
-                hire_date TEXT,
-                shift TEXT,
-                status TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS inventory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_id TEXT UNIQUE,
-                name TEXT,
-                category TEXT,
-                quantity INTEGER,
-                unit TEXT,
-                price REAL,
-                supplier TEXT,
-                expiry_date TEXT,
-                reorder_level INTEGER,
-                location TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS billing (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bill_id TEXT UNIQUE,
-                patient_id TEXT,
-                patient_name TEXT,
-                bill_date TEXT,
-                bill_time TEXT,
-                items TEXT,
-                total_amount REAL,
-                paid_amount REAL,
-                due_amount REAL,
-                payment_method TEXT,
-                insurance_covered REAL,
-                status TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS prescriptions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                prescription_id TEXT UNIQUE,
-                patient_id TEXT,
-                doctor_id TEXT,
-                prescription_date TEXT,
-                diagnosis TEXT,
-                medicines TEXT,
-                dosage TEXT,
-                duration TEXT,
-                notes TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS rooms (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id TEXT UNIQUE,
-                room_type TEXT,
-                floor INTEGER,
-                bed_count INTEGER,
-                available_beds INTEGER,
-                price_per_day REAL,
-                facilities TEXT,
-                status TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS admissions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                admission_id TEXT UNIQUE,
-                patient_id TEXT,
-                room_id TEXT,
-                admission_date TEXT,
-                discharge_date TEXT,
-                reason TEXT,
-                attending_doctor TEXT,
-                status TEXT,
-                estimated_cost REAL,
-                paid_amount REAL
-            )""",
-            """CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE,
-                password TEXT,
-                role TEXT,
-                full_name TEXT,
-                last_login TEXT,
-                status TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS lab_tests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                test_id TEXT UNIQUE,
-                patient_id TEXT,
-                doctor_id TEXT,
-                test_name TEXT,
-                test_date TEXT,
-                test_time TEXT,
-                sample_type TEXT,
-                results TEXT,
-                status TEXT,
-                technician TEXT,
-                report_path TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS operations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                operation_id TEXT UNIQUE,
-                patient_id TEXT,
-                doctor_id TEXT,
-                operation_name TEXT,
-                operation_date TEXT,
-                operation_time TEXT,
-                theater TEXT,
-                duration TEXT,
-                anesthesiologist TEXT,
-                status TEXT,
-                notes TEXT
-            )"""
-        ]
+        self.startup.mark("login screen")
         
-        for table in tables:
-            self.cursor.execute(table)
+        opener.join()
+        self.startup.mark("wait for database")
+        if opener.error is not None:
+            raise opener.error
+        self.attach_database(opener.db)
+        self.startup.mark("worker pool")
         
-        # Create default admin user if not exists
-        self.cursor.execute("SELECT * FROM users WHERE username='admin'")
-        if not self.cursor.fetchone():
-            hashed_password = hashlib.sha256("admin123".encode()).hexdigest()
-            self.cursor.execute(
-                "INSERT INTO users (username, password, role, full_name, status) VALUES (?, ?, ?, ?, ?)",
-                ('admin', hashed_password, 'admin', 'Administrator', 'active')
-            )
-            self.conn.commit()
+        # Periodic WAL checkpoint and planner upkeep
+        self.schedule_maintenance()
+    
+    def open_database(self):
+        """Start opening the database on a thread; returns the thread
+        
+        After join() its db is the opened service. Opening a local file
+        runs the schema check, which is a single PRAGMA user_version read
+        when the schema is current, and ensures the admin user exists.
+        """
+        def run():
+            started = time.perf_counter()
+            try:
+                opener.db = self.connect_service()
+            except Exception as e:
+                opener.error = e
+            self.startup.add_background("database open", time.perf_counter() - started)
+        
+        opener = threading.Thread(target=run, daemon=True, name="db-open")
+        opener.db = opener.error = None
+        opener.start()
+        return opener
+    
+    def connect_service(self, worker=False):
+        """HospitalService on DB_PATH, or a RemoteService when running
+        against a hospital_server"""
+        if self.server:
+            from hospital_client import RemoteService
+            return RemoteService(self.server)
+        return HospitalService(DB_PATH, initialize=not worker)
+    
+    def init_database(self):
+        """Open the database through the service layer"""
+        self.attach_database(self.connect_service())
+    
+    def attach_database(self, db):
+        """Use db on the Tk thread and start the worker pool and the
+        writer on its file"""
+        self.db = db
+        profiler.configure(self.db.profile['sql_profiler'], self.db.profile['slow_query_ms'])
+        self.executor = BackgroundExecutor(self.root, DB_PATH, on_busy=self.show_busy,
+                                           connect=lambda: self.connect_service(worker=True))
+        # A server group-commits the writes of all its clients itself
+        self.writer = None if self.server else GroupCommitWriter(DB_PATH, profile=db.profile)
+        if self.server:
+            self.data_stamp()
+    
+    def write(self, name, *args, on_done=None, on_error=None, label="Saving"):
+        """Call the service method name through the group-commit writer
+        without waiting on the Tk thread; on_done(result) runs once it has
+        committed and on_error(exception) if it failed"""
+        call = lambda db: getattr(db, name)(*args)
+        if self.writer is None:
+            # A server client's request blocks too, so send it from a worker
+            return self.executor.submit(call, on_done=on_done, on_error=on_error, label=label)
+        return self.executor.watch(self.writer.submit(call), on_done=on_done,
+                                   on_error=on_error, label=label)
+    
+    def schedule_maintenance(self):
+        """Run database upkeep every maintenance_interval seconds"""
+        interval = int(self.db.profile['maintenance_interval'])
+        if interval > 0:
+            self.root.after(interval * 1000, self.run_maintenance)
+    
+    def run_maintenance(self):
+        """Checkpoint the WAL and refresh statistics in the background"""
+        self.executor.submit(lambda db: db.maintain(), label="Database upkeep")
+        self.schedule_maintenance()
     
     def create_main_container(self):
         """Create the main container frame"""
@@ -280,28 +222,16 @@ class HospitalManagementSystem:
     def login(self):
         """Handle user login"""
         username = self.username_entry.get()
-        password = hashlib.sha256(self.password_entry.get().encode()).hexdigest()
-        
-        self.cursor.execute(
-            "SELECT * FROM users WHERE username=? AND password=? AND status='active'",
-            (username, password)
-        )
-        user = self.cursor.fetchone()
-        
+        password = self.password_entry.get()
+        self.executor.submit(lambda db: db.authenticate(username, password),
+                             on_done=self.finish_login, label="Signing in")
+    
+    def finish_login(self, user):
+        """Open the dashboard once credentials are checked"""
         if user:
-            self.current_user = {
-                'username': user[1],
-                'role': user[3],
-                'full_name': user[4]
-            }
-            
-            # Update last login
-            self.cursor.execute(
-                "UPDATE users SET last_login=? WHERE username=?",
-                (datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), username)
-            )
-            self.conn.commit()
+            self.current_user = user
             
+            self.clear_content()
             self.show_dashboard()
             self.create_navigation()
             self.update_status(f"Welcome {self.current_user['full_name']} ({self.current_user['role']})")
@@ -363,11 +293,11 @@ class HospitalManagementSystem:
     
     def show_dashboard(self):
         """Display dashboard with statistics"""
-        self.clear_content()
-        self.update_title("Dashboard")
-        
+        self.show_screen('dashboard', "Dashboard", self.build_dashboard)
+    
+    def build_dashboard(self, parent):
         # Create dashboard frame
-        dashboard_frame = tk.Frame(self.content_frame, bg=self.light_color)
+        dashboard_frame = tk.Frame(parent, bg=self.light_color)
         dashboard_frame.pack(fill='both', expand=True, padx=20, pady=20)
         
         # Statistics cards
@@ -375,16 +305,17 @@ class HospitalManagementSystem:
         stats_frame.pack(fill='x', pady=(0, 20))
         
         stats_data = [
-            ("Total Patients", self.count_patients(), "#3498db", "patients"),
-            ("Active Doctors", self.count_doctors(), "#2ecc71", "doctors"),
-            ("Today's Appointments", self.count_today_appointments(), "#e74c3c", "appointments"),
-            ("Pending Bills", self.count_pending_bills(), "#f39c12", "bills"),
-            ("Available Rooms", self.count_available_rooms(), "#9b59b6", "rooms"),
-            ("Staff Members", self.count_staff(), "#1abc9c", "staff")
+            ("Total Patients", 'patients', "#3498db", "patients"),
+            ("Active Doctors", 'doctors', "#2ecc71", "doctors"),
+            ("Today's Appointments", 'today_appointments', "#e74c3c", "appointments"),
+            ("Pending Bills", 'pending_bills', "#f39c12", "bills"),
+            ("Available Rooms", 'available_rooms', "#9b59b6", "rooms"),
+            ("Staff Members", 'staff', "#1abc9c", "staff")
         ]
         
-        for i, (title, value, color, icon) in enumerate(stats_data):
-            card = self.create_stat_card(stats_frame, title, value, color, icon)
+        cards = {}
+        for i, (title, key, color, icon) in enumerate(stats_data):
+            card = cards[key] = self.create_stat_card(stats_frame, title, "...", color, icon)
             card.grid(row=0, column=i, padx=10, sticky='nsew')
             stats_frame.columnconfigure(i, weight=1)
         
@@ -436,6 +367,20 @@ class HospitalManagementSystem:
                            bg=self.secondary_color, fg='white', font=("Arial", 11),
                            padx=20, pady=10, width=20)
             btn.pack(pady=5)
+        
+        def show(stats):
+            for key, card in cards.items():
+                card.value_label.config(text=str(stats[key]))
+        
+        def refresh():
+            self.executor.submit(
+                lambda db: db.dashboard_stats(),
+                on_done=show,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to load dashboard: {str(e)}"),
+                label="Loading dashboard")
+        
+        refresh()
+        return refresh
     
     def create_stat_card(self, parent, title, value, color, icon):
         """Create a statistics card"""
@@ -453,8 +398,9 @@ class HospitalManagementSystem:
         text_frame = tk.Frame(card, bg='white')
         text_frame.pack(side='left', padx=10, pady=10)
         
-        tk.Label(text_frame, text=str(value), font=("Arial", 24, "bold"),
-                bg='white').pack(anchor='w')
+        card.value_label = tk.Label(text_frame, text=str(value), font=("Arial", 24, "bold"),
+                                   bg='white')
+        card.value_label.pack(anchor='w')
         tk.Label(text_frame, text=title, font=("Arial", 10),
                 bg='white', fg='gray').pack(anchor='w')
         
@@ -462,11 +408,11 @@ class HospitalManagementSystem:
     
     def show_patient_management(self):
         """Display patient management interface"""
-        self.clear_content()
-        self.update_title("Patient Management")
-        
+        self.show_screen('patient_management', "Patient Management", self.build_patient_management)
+    
+    def build_patient_management(self, parent):
         # Create notebook for tabs
-        notebook = ttk.Notebook(self.content_frame)
+        notebook = ttk.Notebook(parent)
         notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Tabs
@@ -477,10 +423,7 @@ class HospitalManagementSystem:
             ("Patient History", self.create_patient_history_tab)
         ]
         
-        for tab_name, tab_function in tabs:
-            frame = tk.Frame(notebook, bg=self.light_color)
-            notebook.add(frame, text=tab_name)
-            tab_function(frame)
+        self.add_lazy_tabs(notebook, tabs)
     
     def create_add_patient_tab(self, parent):
         """Create tab for adding new patients"""
@@ -488,11 +431,9 @@ class HospitalManagementSystem:
         form_frame.pack(fill='both', expand=True)
         
         # Generate patient ID
-        patient_id = f"PAT{random.randint(10000, 99999)}"
-        
-        tk.Label(form_frame, text=f"Patient ID: {patient_id}", 
-                font=("Arial", 12, "bold"), bg='white').grid(row=0, column=0, 
-                columnspan=2, pady=10, sticky='w')
+        id_label = tk.Label(form_frame, font=("Arial", 12, "bold"), bg='white')
+        id_label.grid(row=0, column=0, columnspan=2, pady=10, sticky='w')
+        self.new_form_id('patient', id_label, "Patient ID")
         
         # Form fields
         fields = [
@@ -536,7 +477,7 @@ class HospitalManagementSystem:
         button_frame = tk.Frame(form_frame, bg='white')
         button_frame.grid(row=len(fields)+1, column=0, columnspan=2, pady=20)
         
-        tk.Button(button_frame, text="Save Patient", command=lambda: self.save_patient(patient_id),
+        tk.Button(button_frame, text="Save Patient", command=lambda: self.save_form('patient', self.save_patient),
                  bg=self.success_color, fg='white', font=("Arial", 11),
                  padx=20, pady=5).pack(side='left', padx=10)
         
@@ -572,24 +513,23 @@ class HospitalManagementSystem:
                 return
             
             # Save to database
-            self.cursor.execute("""
-                INSERT INTO patients (patient_id, name, age, gender, address, phone, email, 
-                blood_group, emergency_contact, registration_date, last_visit, 
-                medical_history, allergies, insurance_info, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, tuple(data.values()))
-            
-            self.conn.commit()
-            
-            messagebox.showinfo("Success", f"Patient {data['name']} added successfully!")
-            self.clear_patient_form()
-            
-            # Generate new patient ID
-            new_id = f"PAT{random.randint(10000, 99999)}"
-            self.update_status(f"Patient saved with ID: {patient_id}")
+            self.write('add_patient', Patient(**data),
+                       on_done=lambda _: self.finish_save_patient(data),
+                       on_error=self.save_patient_failed, label="Saving patient")
             
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save patient: {str(e)}")
+            self.save_patient_failed(e)
+    
+    def finish_save_patient(self, data):
+        messagebox.showinfo("Success", f"Patient {data['name']} added successfully!")
+        self.clear_patient_form()
+        
+        # Generate new patient ID
+        self.renew_form_id('patient')
+        self.update_status(f"Patient saved with ID: {data['patient_id']}")
+    
+    def save_patient_failed(self, e):
+        messagebox.showerror("Error", f"Failed to save patient: {str(e)}")
     
     def clear_patient_form(self):
         """Clear patient form fields"""
@@ -623,25 +563,12 @@ class HospitalManagementSystem:
                  bg=self.success_color, fg='white', font=("Arial", 11),
                  padx=15).pack(side='left', padx=5)
         
-        # Patients table
-        table_frame = tk.Frame(parent, bg='white')
-        table_frame.pack(fill='both', expand=True, padx=10, pady=10)
-        
-        # Create treeview
+        # Patients table, loaded a page at a time as it scrolls
         columns = ("ID", "Name", "Age", "Gender", "Phone", "Blood Group", "Status", "Last Visit")
-        self.patients_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=20)
-        
-        # Define headings
-        for col in columns:
-            self.patients_tree.heading(col, text=col)
-            self.patients_tree.column(col, width=100)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", 
-                                 command=self.patients_tree.yview)
-        self.patients_tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side='right', fill='y')
-        self.patients_tree.pack(fill='both', expand=True)
+        self.patients_view = PagedTreeview(parent, columns, service_method('patients_page'),
+                                           self.executor)
+        self.patients_view.pack(fill='both', expand=True, padx=10, pady=10)
+        self.patients_tree = self.patients_view.tree
         
         # Load patients
         self.refresh_patients()
@@ -665,38 +592,21 @@ class HospitalManagementSystem:
         tk.Button(action_frame, text="Export to CSV", command=self.export_patients_csv,
                  bg=self.success_color, fg='white', font=("Arial", 11),
                  padx=15).pack(side='left', padx=5)
+        
+        tk.Button(action_frame, text="Import Patients", command=self.import_patients_file,
+                 bg=self.primary_color, fg='white', font=("Arial", 11),
+                 padx=15).pack(side='left', padx=5)
     
     def search_patients(self):
         """Search patients in database"""
         search_term = self.patient_search_var.get()
         
-        self.patients_tree.delete(*self.patients_tree.get_children())
-        
-        query = """
-            SELECT patient_id, name, age, gender, phone, blood_group, status, last_visit 
-            FROM patients 
-            WHERE name LIKE ? OR patient_id LIKE ? OR phone LIKE ? OR email LIKE ?
-        """
-        params = (f"%{search_term}%", f"%{search_term}%", f"%{search_term}%", f"%{search_term}%")
-        
-        self.cursor.execute(query, params)
-        patients = self.cursor.fetchall()
-        
-        for patient in patients:
-            self.patients_tree.insert("", tk.END, values=patient)
+        self.patients_view.show_query(lambda db: db.search_patients(search_term),
+                                      label="Searching patients")
     
     def refresh_patients(self):
         """Refresh patients list"""
-        self.patients_tree.delete(*self.patients_tree.get_children())
-        
-        self.cursor.execute("""
-            SELECT patient_id, name, age, gender, phone, blood_group, status, last_visit 
-            FROM patients ORDER BY registration_date DESC
-        """)
-        patients = self.cursor.fetchall()
-        
-        for patient in patients:
-            self.patients_tree.insert("", tk.END, values=patient)
+        self.patients_view.reset()
     
     def view_patient_details(self):
         """View selected patient details"""
@@ -707,15 +617,19 @@ class HospitalManagementSystem:
         
         patient_id = self.patients_tree.item(selected[0])['values'][0]
         
-        # Show patient details in a new window
+        # Fetch patient details
+        self.executor.submit(
+            lambda db: db.get_patient(patient_id),
+            on_done=lambda patient: self.show_patient_details(patient_id, patient),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load patient: {str(e)}"),
+            label="Loading patient")
+    
+    def show_patient_details(self, patient_id, patient):
+        """Show the patient fetched in the background in a new window"""
         details_window = tk.Toplevel(self.root)
         details_window.title(f"Patient Details - {patient_id}")
         details_window.geometry("600x500")
         
-        # Fetch patient details
-        self.cursor.execute("SELECT * FROM patients WHERE patient_id=?", (patient_id,))
-        patient = self.cursor.fetchone()
-        
         if patient:
             details_frame = tk.Frame(details_window, padx=20, pady=20)
             details_frame.pack(fill='both', expand=True)
@@ -748,10 +662,10 @@ class HospitalManagementSystem:
     
     def show_doctor_management(self):
         """Display doctor management interface"""
-        self.clear_content()
-        self.update_title("Doctor Management")
-        
-        notebook = ttk.Notebook(self.content_frame)
+        self.show_screen('doctor_management', "Doctor Management", self.build_doctor_management)
+    
+    def build_doctor_management(self, parent):
+        notebook = ttk.Notebook(parent)
         notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Doctor management tabs
@@ -761,21 +675,16 @@ class HospitalManagementSystem:
             ("Doctor Schedule", self.create_doctor_schedule_tab)
         ]
         
-        for tab_name, tab_function in tabs:
-            frame = tk.Frame(notebook, bg=self.light_color)
-            notebook.add(frame, text=tab_name)
-            tab_function(frame)
+        self.add_lazy_tabs(notebook, tabs)
     
     def create_add_doctor_tab(self, parent):
         """Create tab for adding doctors"""
         form_frame = tk.Frame(parent, bg='white', padx=20, pady=20)
         form_frame.pack(fill='both', expand=True)
         
-        doctor_id = f"DOC{random.randint(10000, 99999)}"
-        
-        tk.Label(form_frame, text=f"Doctor ID: {doctor_id}", 
-                font=("Arial", 12, "bold"), bg='white').grid(row=0, column=0, 
-                columnspan=2, pady=10, sticky='w')
+        id_label = tk.Label(form_frame, font=("Arial", 12, "bold"), bg='white')
+        id_label.grid(row=0, column=0, columnspan=2, pady=10, sticky='w')
+        self.new_form_id('doctor', id_label, "Doctor ID")
         
         fields = [
             ("Name", "entry"),
@@ -820,7 +729,7 @@ class HospitalManagementSystem:
         button_frame.grid(row=len(fields)+2, column=0, columnspan=2, pady=20)
         
         tk.Button(button_frame, text="Save Doctor", 
-                 command=lambda: self.save_doctor(doctor_id),
+                 command=lambda: self.save_form('doctor', self.save_doctor),
                  bg=self.success_color, fg='white', font=("Arial", 11),
                  padx=20, pady=5).pack(side='left', padx=10)
         
@@ -850,20 +759,21 @@ class HospitalManagementSystem:
                 messagebox.showerror("Error", "Name and Specialization are required")
                 return
             
-            self.cursor.execute("""
-                INSERT INTO doctors (doctor_id, name, specialization, qualification, 
-                experience, phone, email, department, consultation_fee, availability, 
-                schedule, rating)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, tuple(data.values()))
-            
-            self.conn.commit()
-            messagebox.showinfo("Success", f"Doctor {data['name']} added successfully!")
-            self.clear_doctor_form()
-            self.update_status(f"Doctor saved with ID: {doctor_id}")
+            self.write('add_doctor', Doctor(**data),
+                       on_done=lambda _: self.finish_save_doctor(data),
+                       on_error=self.save_doctor_failed, label="Saving doctor")
             
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save doctor: {str(e)}")
+            self.save_doctor_failed(e)
+    
+    def finish_save_doctor(self, data):
+        messagebox.showinfo("Success", f"Doctor {data['name']} added successfully!")
+        self.clear_doctor_form()
+        self.renew_form_id('doctor')
+        self.update_status(f"Doctor saved with ID: {data['doctor_id']}")
+    
+    def save_doctor_failed(self, e):
+        messagebox.showerror("Error", f"Failed to save doctor: {str(e)}")
     
     def clear_doctor_form(self):
         """Clear doctor form fields"""
@@ -879,10 +789,10 @@ class HospitalManagementSystem:
     
     def show_appointment_management(self):
         """Display appointment management"""
-        self.clear_content()
-        self.update_title("Appointment Management")
-        
-        notebook = ttk.Notebook(self.content_frame)
+        self.show_screen('appointment_management', "Appointment Management", self.build_appointment_management)
+    
+    def build_appointment_management(self, parent):
+        notebook = ttk.Notebook(parent)
         notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
         tabs = [
@@ -891,48 +801,37 @@ class HospitalManagementSystem:
             ("Today's Appointments", self.create_today_appointments_tab)
         ]
         
-        for tab_name, tab_function in tabs:
-            frame = tk.Frame(notebook, bg=self.light_color)
-            notebook.add(frame, text=tab_name)
-            tab_function(frame)
+        self.add_lazy_tabs(notebook, tabs)
     
     def create_schedule_appointment_tab(self, parent):
         """Create tab for scheduling appointments"""
+        from tkcalendar import DateEntry
         form_frame = tk.Frame(parent, bg='white', padx=20, pady=20)
         form_frame.pack(fill='both', expand=True)
         
-        appointment_id = f"APT{random.randint(10000, 99999)}"
-        
-        tk.Label(form_frame, text=f"Appointment ID: {appointment_id}", 
-                font=("Arial", 12, "bold"), bg='white').grid(row=0, column=0, 
-                columnspan=2, pady=10, sticky='w')
+        id_label = tk.Label(form_frame, font=("Arial", 12, "bold"), bg='white')
+        id_label.grid(row=0, column=0, columnspan=2, pady=10, sticky='w')
+        self.new_form_id('appointment', id_label, "Appointment ID")
         
         # Patient selection
         tk.Label(form_frame, text="Select Patient", font=("Arial", 11), 
                 bg='white').grid(row=1, column=0, sticky='w', pady=5)
         
+        # Matches are looked up as the user types instead of loading every patient
         self.patient_var = tk.StringVar()
-        patient_combo = ttk.Combobox(form_frame, textvariable=self.patient_var,
-                                    font=("Arial", 11), width=38)
-        patient_combo.grid(row=1, column=1, pady=5, padx=10)
-        
-        # Load patients
-        self.cursor.execute("SELECT patient_id, name FROM patients")
-        patients = self.cursor.fetchall()
-        patient_combo['values'] = [f"{pid} - {name}" for pid, name in patients]
+        self.patient_picker(form_frame, self.patient_var).grid(
+            row=1, column=1, pady=5, padx=10, sticky='w')
         
         # Doctor selection
         tk.Label(form_frame, text="Select Doctor", font=("Arial", 11), 
                 bg='white').grid(row=2, column=0, sticky='w', pady=5)
         
         self.doctor_var = tk.StringVar()
-        doctor_combo = ttk.Combobox(form_frame, textvariable=self.doctor_var,
-                                   font=("Arial", 11), width=38)
-        doctor_combo.grid(row=2, column=1, pady=5, padx=10)
-        
-        self.cursor.execute("SELECT doctor_id, name, specialization FROM doctors WHERE availability='Available'")
-        doctors = self.cursor.fetchall()
-        doctor_combo['values'] = [f"{did} - {name} ({spec})" for did, name, spec in doctors]
+        self.doctor_specializations = {}
+        TypeaheadPicker(form_frame, service_method('doctor_suggestions'), self.executor,
+                        label=lambda row: f"{row[0]} - {row[1]} ({row[2]})",
+                        textvariable=self.doctor_var, on_select=self.select_doctor,
+                        stamp=self.data_stamp).grid(row=2, column=1, pady=5, padx=10, sticky='w')
         
         # Date and time
         tk.Label(form_frame, text="Date", font=("Arial", 11), 
@@ -944,14 +843,16 @@ class HospitalManagementSystem:
                                          borderwidth=2,
                                          date_pattern='yyyy-mm-dd')
         self.appointment_date.grid(row=3, column=1, pady=5, padx=10)
+        self.appointment_date.bind("<<DateEntrySelected>>", lambda e: self.refresh_time_slots())
         
         tk.Label(form_frame, text="Time", font=("Arial", 11), 
                 bg='white').grid(row=4, column=0, sticky='w', pady=5)
         
-        times = [f"{h:02d}:{m:02d}" for h in range(9, 18) for m in [0, 30]]
-        self.appointment_time = ttk.Combobox(form_frame, values=times,
+        # Only the selected doctor's open slots are offered
+        self.appointment_time = ttk.Combobox(form_frame, values=[], state='readonly',
                                             font=("Arial", 11), width=38)
         self.appointment_time.grid(row=4, column=1, pady=5, padx=10)
+        self.slots_job = None
         
         # Reason
         tk.Label(form_frame, text="Reason", font=("Arial", 11), 
@@ -973,9 +874,69 @@ class HospitalManagementSystem:
         button_frame.grid(row=7, column=0, columnspan=2, pady=20)
         
         tk.Button(button_frame, text="Schedule Appointment", 
-                 command=lambda: self.save_appointment(appointment_id),
+                 command=lambda: self.save_form('appointment', self.save_appointment),
                  bg=self.success_color, fg='white', font=("Arial", 11),
                  padx=20, pady=5).pack(side='left', padx=10)
+        
+        tk.Button(button_frame, text="Next Available Slot", 
+                 command=self.find_next_free_slot,
+                 bg=self.secondary_color, fg='white', font=("Arial", 11),
+                 padx=20, pady=5).pack(side='left', padx=10)
+    
+    def patient_picker(self, parent, textvariable):
+        return TypeaheadPicker(parent, service_method('patient_suggestions'), self.executor,
+                               label=lambda row: f"{row[0]} - {row[1]}",
+                               textvariable=textvariable, stamp=self.data_stamp)
+    
+    def select_doctor(self, row):
+        doctor_id, name, specialization = row
+        self.doctor_specializations[doctor_id] = specialization
+        self.refresh_time_slots()
+    
+    def refresh_time_slots(self):
+        """Load the selected doctor's open slots on the selected date"""
+        if self.slots_job is not None:
+            self.slots_job.cancel()
+        doctor_id = self.doctor_var.get().split(" - ")[0]
+        if not doctor_id:
+            self.show_time_slots([])
+            return
+        day = self.appointment_date.get_date().isoformat()
+        self.slots_job = self.executor.submit(
+            lambda db: db.free_slots(doctor_id, day),
+            on_done=self.show_time_slots,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load time slots: {str(e)}"),
+            label="Loading time slots")
+    
+    def show_time_slots(self, slots):
+        self.slots_job = None
+        self.appointment_time['values'] = slots
+        if self.appointment_time.get() not in slots:
+            self.appointment_time.set(slots[0] if slots else '')
+    
+    def find_next_free_slot(self):
+        """Select the earliest open slot with any doctor of the selected
+        doctor's specialization"""
+        specialization = self.doctor_specializations.get(self.doctor_var.get().split(" - ")[0])
+        if not specialization:
+            messagebox.showwarning("Warning", "Please select a doctor")
+            return
+        self.executor.submit(
+            lambda db: db.next_free_slot(specialization),
+            on_done=lambda slot: self.show_next_free_slot(slot, specialization),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to find a free slot: {str(e)}"),
+            label="Finding next free slot")
+    
+    def show_next_free_slot(self, slot, specialization):
+        if slot is None:
+            messagebox.showinfo("Info", f"No open slots for {specialization}")
+            return
+        day, time, doctor_id, name = slot
+        self.doctor_specializations[doctor_id] = specialization
+        self.doctor_var.set(f"{doctor_id} - {name} ({specialization})")
+        self.appointment_date.set_date(datetime.date.fromisoformat(day))
+        self.appointment_time.set(time)
+        self.refresh_time_slots()
     
     def save_appointment(self, appointment_id):
         """Save appointment to database"""
@@ -999,25 +960,29 @@ class HospitalManagementSystem:
                 'created_date': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
             
-            self.cursor.execute("""
-                INSERT INTO appointments (appointment_id, patient_id, doctor_id, 
-                appointment_date, appointment_time, reason, status, notes, created_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, tuple(data.values()))
-            
-            self.conn.commit()
-            messagebox.showinfo("Success", "Appointment scheduled successfully!")
-            self.update_status(f"Appointment scheduled with ID: {appointment_id}")
+            self.write('add_appointment', Appointment(**data),
+                       on_done=lambda _: self.finish_save_appointment(appointment_id),
+                       on_error=self.save_appointment_failed, label="Scheduling appointment")
             
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to schedule appointment: {str(e)}")
+            self.save_appointment_failed(e)
+    
+    def finish_save_appointment(self, appointment_id):
+        messagebox.showinfo("Success", "Appointment scheduled successfully!")
+        self.renew_form_id('appointment')
+        self.update_status(f"Appointment scheduled with ID: {appointment_id}")
+        self.refresh_time_slots()
+    
+    def save_appointment_failed(self, e):
+        messagebox.showerror("Error", f"Failed to schedule appointment: {str(e)}")
+        self.refresh_time_slots()
     
     def show_billing_management(self):
         """Display billing management"""
-        self.clear_content()
-        self.update_title("Billing & Payments")
-        
-        notebook = ttk.Notebook(self.content_frame)
+        self.show_screen('billing_management', "Billing & Payments", self.build_billing_management)
+    
+    def build_billing_management(self, parent):
+        notebook = ttk.Notebook(parent)
         notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
         tabs = [
@@ -1026,20 +991,16 @@ class HospitalManagementSystem:
             ("Payment History", self.create_payment_history_tab)
         ]
         
-        for tab_name, tab_function in tabs:
-            frame = tk.Frame(notebook, bg=self.light_color)
-            notebook.add(frame, text=tab_name)
-            tab_function(frame)
+        self.add_lazy_tabs(notebook, tabs)
     
     def create_generate_bill_tab(self, parent):
         """Create tab for generating bills"""
         form_frame = tk.Frame(parent, bg='white', padx=20, pady=20)
         form_frame.pack(fill='both', expand=True)
         
-        bill_id = f"BILL{random.randint(10000, 99999)}"
-        
-        tk.Label(form_frame, text=f"Bill ID: {bill_id}", 
-                font=("Arial", 14, "bold"), bg='white', fg=self.primary_color).pack(pady=10)
+        id_label = tk.Label(form_frame, font=("Arial", 14, "bold"), bg='white', fg=self.primary_color)
+        id_label.pack(pady=10)
+        self.new_form_id('bill', id_label, "Bill ID")
         
         # Bill details frame
         details_frame = tk.LabelFrame(form_frame, text="Bill Details", 
@@ -1051,13 +1012,8 @@ class HospitalManagementSystem:
                 bg='white').grid(row=0, column=0, sticky='w', pady=5)
         
         self.bill_patient_var = tk.StringVar()
-        patient_combo = ttk.Combobox(details_frame, textvariable=self.bill_patient_var,
-                                    font=("Arial", 11), width=40)
-        patient_combo.grid(row=0, column=1, pady=5, padx=10)
-        
-        self.cursor.execute("SELECT patient_id, name FROM patients")
-        patients = self.cursor.fetchall()
-        patient_combo['values'] = [f"{pid} - {name}" for pid, name in patients]
+        self.patient_picker(details_frame, self.bill_patient_var).grid(
+            row=0, column=1, pady=5, padx=10, sticky='w')
         
         # Bill items
         items_frame = tk.LabelFrame(form_frame, text="Bill Items", 
@@ -1129,7 +1085,7 @@ class HospitalManagementSystem:
         button_frame.pack(pady=20)
         
         tk.Button(button_frame, text="Generate Bill", 
-                 command=lambda: self.save_bill(bill_id),
+                 command=lambda: self.save_form('bill', self.save_bill),
                  bg=self.success_color, fg='white', font=("Arial", 11),
                  padx=20, pady=5).pack(side='left', padx=10)
         
@@ -1183,39 +1139,31 @@ class HospitalManagementSystem:
                 messagebox.showerror("Error", "Please add at least one item to the bill")
                 return
             
-            total_amount = float(self.total_amount_label.cget("text"))
-            paid_amount = float(self.amount_paid.get() or 0)
-            due_amount = total_amount - paid_amount
-            
-            data = {
-                'bill_id': bill_id,
-                'patient_id': patient_id,
-                'patient_name': patient_name,
-                'bill_date': datetime.datetime.now().strftime("%Y-%m-%d"),
-                'bill_time': datetime.datetime.now().strftime("%H:%M:%S"),
-                'items': json.dumps(items),
-                'total_amount': total_amount,
-                'paid_amount': paid_amount,
-                'due_amount': due_amount,
-                'payment_method': self.payment_method.get(),
-                'insurance_covered': 0.0,
-                'status': 'Paid' if due_amount == 0 else 'Partial' if paid_amount > 0 else 'Pending'
-            }
-            
-            self.cursor.execute("""
-                INSERT INTO billing (bill_id, patient_id, patient_name, bill_date, 
-                bill_time, items, total_amount, paid_amount, due_amount, 
-                payment_method, insurance_covered, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, tuple(data.values()))
+            bill = Bill(
+                bill_id=bill_id,
+                patient_id=patient_id,
+                patient_name=patient_name,
+                items=items,
+                total_amount=float(self.total_amount_label.cget("text")),
+                paid_amount=float(self.amount_paid.get() or 0),
+                payment_method=self.payment_method.get()
+            )
             
-            self.conn.commit()
-            messagebox.showinfo("Success", f"Bill {bill_id} generated successfully!")
-            self.clear_bill_form()
-            self.update_status(f"Bill generated: {bill_id}")
+            self.write('add_bill', bill,
+                       on_done=lambda _: self.finish_save_bill(bill_id),
+                       on_error=self.save_bill_failed, label="Generating bill")
             
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate bill: {str(e)}")
+            self.save_bill_failed(e)
+    
+    def finish_save_bill(self, bill_id):
+        messagebox.showinfo("Success", f"Bill {bill_id} generated successfully!")
+        self.clear_bill_form()
+        self.renew_form_id('bill')
+        self.update_status(f"Bill generated: {bill_id}")
+    
+    def save_bill_failed(self, e):
+        messagebox.showerror("Error", f"Failed to generate bill: {str(e)}")
     
     def clear_bill_form(self):
         """Clear bill form"""
@@ -1230,59 +1178,341 @@ class HospitalManagementSystem:
     
     def show_staff_management(self):
         """Display staff management"""
-        self.clear_content()
-        self.update_title("Staff Management")
-        tk.Label(self.content_frame, text="Staff Management Module", 
+        self.show_screen('staff_management', "Staff Management", self.build_staff_management)
+    
+    def build_staff_management(self, parent):
+        tk.Label(parent, text="Staff Management Module", 
                 font=("Arial", 16), bg='white').pack(pady=50)
     
     def show_inventory_management(self):
         """Display inventory management"""
-        self.clear_content()
-        self.update_title("Inventory Management")
-        tk.Label(self.content_frame, text="Inventory Management Module", 
-                font=("Arial", 16), bg='white').pack(pady=50)
+        self.show_screen('inventory_management', "Inventory Management", self.build_inventory_management)
+    
+    def build_inventory_management(self, parent):
+        notebook = ttk.Notebook(parent)
+        notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        tabs = [
+            ("Stock", self.create_stock_tab),
+            ("Add Item", self.create_add_item_tab),
+            ("Stock Movement", self.create_stock_movement_tab),
+            ("Reorder Alerts", self.create_reorder_alerts_tab),
+            ("Expiring Items", self.create_expiring_items_tab)
+        ]
+        
+        self.add_lazy_tabs(notebook, tabs)
+    
+    def create_stock_tab(self, parent):
+        """Create tab listing every item with its current stock"""
+        frame = tk.Frame(parent, bg='white', padx=20, pady=20)
+        frame.pack(fill='both', expand=True)
+        
+        tk.Label(frame, text="Inventory", font=("Arial", 16, "bold"),
+                bg='white').pack(pady=10)
+        
+        columns = ("Item ID", "Name", "Category", "In Stock", "Unit", "Reorder Level",
+                   "Expiry Date", "Location")
+        view = PagedTreeview(frame, columns, service_method('inventory_page'), self.executor)
+        view.pack(fill='both', expand=True)
+        view.reset()
+    
+    def create_add_item_tab(self, parent):
+        """Create tab for adding inventory items"""
+        form_frame = tk.Frame(parent, bg='white', padx=20, pady=20)
+        form_frame.pack(fill='both', expand=True)
+        
+        id_label = tk.Label(form_frame, font=("Arial", 12, "bold"), bg='white')
+        id_label.grid(row=0, column=0, columnspan=2, pady=10, sticky='w')
+        self.new_form_id('item', id_label, "Item ID")
+        
+        fields = [
+            ("Name", "entry"),
+            ("Category", "combobox", ["Medicine", "Surgical", "Consumable", "Equipment",
+                                      "Laboratory"]),
+            ("Opening Stock", "entry"),
+            ("Unit", "entry"),
+            ("Price", "entry"),
+            ("Supplier", "entry"),
+            ("Expiry Date", "entry"),
+            ("Reorder Level", "entry"),
+            ("Location", "entry")
+        ]
+        
+        self.item_entries = {}
+        
+        for i, (label, field_type, *options) in enumerate(fields, start=1):
+            tk.Label(form_frame, text=label, font=("Arial", 11), 
+                    bg='white').grid(row=i, column=0, sticky='w', pady=5)
+            
+            if field_type == "entry":
+                entry = tk.Entry(form_frame, font=("Arial", 11), width=40)
+            else:
+                entry = ttk.Combobox(form_frame, values=options[0], 
+                                    font=("Arial", 11), width=38)
+            entry.grid(row=i, column=1, pady=5, padx=10)
+            self.item_entries[label.lower().replace(" ", "_")] = entry
+        
+        tk.Label(form_frame, text="Expiry date as YYYY-MM-DD; leave blank if the item does not expire",
+                font=("Arial", 9), bg='white', fg='gray').grid(row=len(fields)+1, column=1, sticky='w')
+        
+        # Buttons
+        button_frame = tk.Frame(form_frame, bg='white')
+        button_frame.grid(row=len(fields)+2, column=0, columnspan=2, pady=20)
+        
+        tk.Button(button_frame, text="Save Item", 
+                 command=lambda: self.save_form('item', self.save_item),
+                 bg=self.success_color, fg='white', font=("Arial", 11),
+                 padx=20, pady=5).pack(side='left', padx=10)
+        
+        tk.Button(button_frame, text="Clear Form", command=self.clear_item_form,
+                 bg=self.warning_color, fg='white', font=("Arial", 11),
+                 padx=20, pady=5).pack(side='left', padx=10)
+    
+    def save_item(self, item_id):
+        """Save inventory item to database"""
+        try:
+            data = {
+                'item_id': item_id,
+                'name': self.item_entries['name'].get(),
+                'category': self.item_entries['category'].get(),
+                'quantity': self.item_entries['opening_stock'].get(),
+                'unit': self.item_entries['unit'].get(),
+                'price': self.item_entries['price'].get(),
+                'supplier': self.item_entries['supplier'].get(),
+                'expiry_date': self.item_entries['expiry_date'].get().strip(),
+                'reorder_level': self.item_entries['reorder_level'].get(),
+                'location': self.item_entries['location'].get()
+            }
+            
+            if not data['name']:
+                messagebox.showerror("Error", "Item name is required")
+                return
+            if data['expiry_date']:
+                try:
+                    datetime.date.fromisoformat(data['expiry_date'])
+                except ValueError:
+                    messagebox.showerror("Error", "Expiry Date must be YYYY-MM-DD")
+                    return
+            
+            self.write('add_item', InventoryItem(**data),
+                       on_done=lambda _: self.finish_save_item(data),
+                       on_error=self.save_item_failed, label="Saving item")
+            
+        except Exception as e:
+            self.save_item_failed(e)
+    
+    def finish_save_item(self, data):
+        messagebox.showinfo("Success", f"Item {data['name']} added successfully!")
+        self.clear_item_form()
+        self.renew_form_id('item')
+        self.update_status(f"Item saved with ID: {data['item_id']}")
+    
+    def save_item_failed(self, e):
+        messagebox.showerror("Error", f"Failed to save item: {str(e)}")
+    
+    def clear_item_form(self):
+        """Clear inventory item form fields"""
+        for entry in self.item_entries.values():
+            if isinstance(entry, ttk.Combobox):
+                entry.set('')
+            else:
+                entry.delete(0, tk.END)
+    
+    def create_stock_movement_tab(self, parent):
+        """Create tab for recording stock received, issued or adjusted"""
+        form_frame = tk.Frame(parent, bg='white', padx=20, pady=20)
+        form_frame.pack(fill='both', expand=True)
+        
+        # Items are looked up as the user types instead of loading every item
+        tk.Label(form_frame, text="Item", font=("Arial", 11), 
+                bg='white').grid(row=0, column=0, sticky='w', pady=5)
+        
+        self.movement_item_var = tk.StringVar()
+        TypeaheadPicker(form_frame, service_method('item_suggestions'), self.executor,
+                        label=lambda row: f"{row[0]} - {row[1]}",
+                        textvariable=self.movement_item_var, on_select=self.select_movement_item,
+                        stamp=self.data_stamp).grid(row=0, column=1, pady=5, padx=10, sticky='w')
+        
+        self.movement_stock = tk.Label(form_frame, font=("Arial", 11, "bold"), bg='white')
+        self.movement_stock.grid(row=1, column=1, sticky='w', padx=10)
+        
+        tk.Label(form_frame, text="Movement", font=("Arial", 11), 
+                bg='white').grid(row=2, column=0, sticky='w', pady=5)
+        
+        self.movement_reason = ttk.Combobox(form_frame, values=list(MOVEMENT_REASONS),
+                                           state='readonly', font=("Arial", 11), width=38)
+        self.movement_reason.set('Issued')
+        self.movement_reason.grid(row=2, column=1, pady=5, padx=10, sticky='w')
+        
+        tk.Label(form_frame, text="Quantity", font=("Arial", 11), 
+                bg='white').grid(row=3, column=0, sticky='w', pady=5)
+        
+        # Entered as a positive number except for adjustments
+        self.movement_quantity = tk.Entry(form_frame, font=("Arial", 11), width=40)
+        self.movement_quantity.grid(row=3, column=1, pady=5, padx=10, sticky='w')
+        
+        tk.Label(form_frame, text="Reference", font=("Arial", 11), 
+                bg='white').grid(row=4, column=0, sticky='w', pady=5)
+        
+        self.movement_reference = tk.Entry(form_frame, font=("Arial", 11), width=40)
+        self.movement_reference.grid(row=4, column=1, pady=5, padx=10, sticky='w')
+        
+        tk.Button(form_frame, text="Record Movement", command=self.save_movement,
+                 bg=self.success_color, fg='white', font=("Arial", 11),
+                 padx=20, pady=5).grid(row=5, column=0, columnspan=2, pady=15)
+        
+        tk.Label(form_frame, text="Movement History", font=("Arial", 12, "bold"),
+                bg='white').grid(row=6, column=0, columnspan=2, sticky='w')
+        
+        columns = ("Date", "Quantity", "Movement", "Reference", "Recorded By")
+        self.movement_history = PagedTreeview(form_frame, columns, lambda db, after, limit: [],
+                                              self.executor, height=10)
+        self.movement_history.grid(row=7, column=0, columnspan=2, sticky='nsew')
+        form_frame.grid_rowconfigure(7, weight=1)
+        form_frame.grid_columnconfigure(1, weight=1)
+    
+    def select_movement_item(self, row):
+        item_id, name, quantity, unit = row
+        self.movement_stock.config(text=f"In stock: {quantity} {unit or ''}")
+        self.show_item_movements(item_id)
+    
+    def show_item_movements(self, item_id):
+        """List the item's stock movements, newest first"""
+        self.movement_history.reset(
+            lambda db, after, limit: db.item_movements(item_id, after, limit))
+    
+    def save_movement(self):
+        """Record a stock movement for the selected item"""
+        try:
+            item_id = self.movement_item_var.get().split(" - ")[0].strip()
+            if not item_id:
+                messagebox.showerror("Error", "Please select an item")
+                return
+            
+            reason = self.movement_reason.get()
+            quantity = int(self.movement_quantity.get())
+            if MOVEMENT_REASONS[reason]:
+                quantity = MOVEMENT_REASONS[reason] * abs(quantity)
+            
+            movement = StockMovement(item_id, quantity, reason, self.movement_reference.get(),
+                                     recorded_by=self.current_user['username'])
+            self.write('record_movement', movement,
+                       on_done=lambda stock: self.finish_save_movement(movement, stock),
+                       on_error=self.save_movement_failed, label="Recording movement")
+            
+        except Exception as e:
+            self.save_movement_failed(e)
+    
+    def finish_save_movement(self, movement, stock):
+        self.movement_stock.config(text=f"In stock: {stock}")
+        self.movement_quantity.delete(0, tk.END)
+        self.movement_reference.delete(0, tk.END)
+        self.show_item_movements(movement.item_id)
+        self.update_status(f"Recorded {movement.quantity:+d} for {movement.item_id}; "
+                           f"{stock} in stock")
+    
+    def save_movement_failed(self, e):
+        messagebox.showerror("Error", f"Failed to record movement: {str(e)}")
+    
+    def create_reorder_alerts_tab(self, parent):
+        """Create tab listing items at or below their reorder level"""
+        frame = tk.Frame(parent, bg='white', padx=20, pady=20)
+        frame.pack(fill='both', expand=True)
+        
+        tk.Label(frame, text="Items to Reorder", font=("Arial", 16, "bold"),
+                bg='white').pack(pady=10)
+        
+        columns = ("Item ID", "Name", "In Stock", "Reorder Level", "Unit", "Supplier")
+        view = PagedTreeview(frame, columns, service_method('reorder_alerts'), self.executor)
+        view.pack(fill='both', expand=True)
+        view.reset()
+    
+    def create_expiring_items_tab(self, parent):
+        """Create tab listing items in stock that expire soon"""
+        frame = tk.Frame(parent, bg='white', padx=20, pady=20)
+        frame.pack(fill='both', expand=True)
+        
+        tk.Label(frame, text="Expiring Items", font=("Arial", 16, "bold"),
+                bg='white').pack(pady=10)
+        
+        controls = tk.Frame(frame, bg='white')
+        controls.pack(fill='x', pady=5)
+        
+        tk.Label(controls, text="Expiring within (days)", font=("Arial", 11),
+                bg='white').pack(side='left')
+        days = tk.Spinbox(controls, from_=1, to=3650, width=6, font=("Arial", 11))
+        days.delete(0, tk.END)
+        days.insert(0, EXPIRY_WINDOW_DAYS)
+        days.pack(side='left', padx=5)
+        
+        include_expired = tk.BooleanVar()
+        tk.Checkbutton(controls, text="Include expired", variable=include_expired,
+                      font=("Arial", 11), bg='white').pack(side='left', padx=10)
+        
+        columns = ("Item ID", "Name", "In Stock", "Unit", "Expiry Date", "Location")
+        view = PagedTreeview(frame, columns, lambda db, after, limit: [], self.executor)
+        
+        def show():
+            try:
+                window = int(days.get())
+            except ValueError:
+                messagebox.showerror("Error", "Days must be a whole number")
+                return
+            expired = include_expired.get()
+            view.reset(lambda db, after, limit: db.expiring_items(window, after, limit, expired))
+        
+        tk.Button(controls, text="Show", command=show, bg=self.secondary_color, fg='white',
+                 font=("Arial", 11), padx=15).pack(side='left', padx=10)
+        
+        view.pack(fill='both', expand=True)
+        show()
     
     def show_prescription_management(self):
         """Display prescription management"""
-        self.clear_content()
-        self.update_title("Prescription Management")
-        tk.Label(self.content_frame, text="Prescription Management Module", 
+        self.show_screen('prescription_management', "Prescription Management", self.build_prescription_management)
+    
+    def build_prescription_management(self, parent):
+        tk.Label(parent, text="Prescription Management Module", 
                 font=("Arial", 16), bg='white').pack(pady=50)
     
     def show_room_management(self):
         """Display room management"""
-        self.clear_content()
-        self.update_title("Room Management")
-        tk.Label(self.content_frame, text="Room Management Module", 
+        self.show_screen('room_management', "Room Management", self.build_room_management)
+    
+    def build_room_management(self, parent):
+        tk.Label(parent, text="Room Management Module", 
                 font=("Arial", 16), bg='white').pack(pady=50)
     
     def show_admission_management(self):
         """Display admission management"""
-        self.clear_content()
-        self.update_title("Admission Management")
-        tk.Label(self.content_frame, text="Admission Management Module", 
+        self.show_screen('admission_management', "Admission Management", self.build_admission_management)
+    
+    def build_admission_management(self, parent):
+        tk.Label(parent, text="Admission Management Module", 
                 font=("Arial", 16), bg='white').pack(pady=50)
     
     def show_labtest_management(self):
         """Display lab test management"""
-        self.clear_content()
-        self.update_title("Lab Test Management")
-        tk.Label(self.content_frame, text="Lab Test Management Module", 
+        self.show_screen('labtest_management', "Lab Test Management", self.build_labtest_management)
+    
+    def build_labtest_management(self, parent):
+        tk.Label(parent, text="Lab Test Management Module", 
                 font=("Arial", 16), bg='white').pack(pady=50)
     
     def show_operation_management(self):
         """Display operation management"""
-        self.clear_content()
-        self.update_title("Operation Management")
-        tk.Label(self.content_frame, text="Operation Management Module", 
+        self.show_screen('operation_management', "Operation Management", self.build_operation_management)
+    
+    def build_operation_management(self, parent):
+        tk.Label(parent, text="Operation Management Module", 
                 font=("Arial", 16), bg='white').pack(pady=50)
     
     def show_reports(self):
         """Display reports module"""
-        self.clear_content()
-        self.update_title("Reports")
-        
-        reports_frame = tk.Frame(self.content_frame, bg=self.light_color, padx=20, pady=20)
+        self.show_screen('reports', "Reports", self.build_reports)
+    
+    def build_reports(self, parent):
+        reports_frame = tk.Frame(parent, bg=self.light_color, padx=20, pady=20)
         reports_frame.pack(fill='both', expand=True)
         
         tk.Label(reports_frame, text="Generate Reports", font=("Arial", 16, "bold"),
@@ -1304,17 +1534,16 @@ class HospitalManagementSystem:
     
     def generate_patient_report(self):
         """Generate patient report"""
+        self.executor.submit(
+            lambda db: (db.patient_statistics(), db.recent_patients(10)),
+            on_done=self.show_patient_report,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to generate report: {str(e)}"),
+            label="Building patient report")
+    
+    def show_patient_report(self, result):
+        """Display the patient report computed in the background"""
+        stats, recent = result
         try:
-            self.cursor.execute("""
-                SELECT COUNT(*) as total_patients,
-                       AVG(age) as avg_age,
-                       SUM(CASE WHEN gender='Male' THEN 1 ELSE 0 END) as male_count,
-                       SUM(CASE WHEN gender='Female' THEN 1 ELSE 0 END) as female_count,
-                       SUM(CASE WHEN status='Active' THEN 1 ELSE 0 END) as active_count
-                FROM patients
-            """)
-            stats = self.cursor.fetchone()
-            
             report_window = tk.Toplevel(self.root)
             report_window.title("Patient Report")
             report_window.geometry("600x400")
@@ -1328,22 +1557,14 @@ class HospitalManagementSystem:
             Generated on: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
             
             Total Patients: {stats[0]}
-            Average Age: {stats[1]:.1f}
+            Average Age: {stats[1] or 0:.1f}
             Male Patients: {stats[2]}
             Female Patients: {stats[3]}
             Active Patients: {stats[4]}
             
             Recent Registrations:
             """
-            
-            self.cursor.execute("""
-                SELECT patient_id, name, age, gender, registration_date 
-                FROM patients 
-                ORDER BY registration_date DESC 
-                LIMIT 10
-            """)
-            recent = self.cursor.fetchall()
-            
+
             for patient in recent:
                 report_text += f"\n{patient[0]} - {patient[1]} ({patient[2]} years, {patient[3]}) - Registered: {patient[4]}"
             
@@ -1359,25 +1580,38 @@ class HospitalManagementSystem:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
     
-    def save_report(self, report_text, filename):
-        """Save report to file"""
+    def save_report(self, report_text, filename, rows=None):
+        """Save report to file
+        
+        When the report has tabular rows (header first) it can also be
+        saved as CSV by choosing a .csv file name.
+        """
+        import csv
+        from tkinter import filedialog
+        filetypes = [("Text files", "*.txt"), ("All files", "*.*")]
+        if rows is not None:
+            filetypes.insert(1, ("CSV files", "*.csv"))
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+            filetypes=filetypes,
             initialfile=f"{filename}_{datetime.datetime.now().strftime('%Y%m%d')}"
         )
         
         if file_path:
-            with open(file_path, 'w') as f:
-                f.write(report_text)
+            if rows is not None and file_path.lower().endswith('.csv'):
+                with open(file_path, 'w', newline='') as f:
+                    csv.writer(f).writerows(rows)
+            else:
+                with open(file_path, 'w') as f:
+                    f.write(report_text)
             messagebox.showinfo("Success", f"Report saved to {file_path}")
     
     def show_settings(self):
         """Display settings"""
-        self.clear_content()
-        self.update_title("Settings")
-        
-        settings_frame = tk.Frame(self.content_frame, bg=self.light_color, padx=20, pady=20)
+        self.show_screen('settings', "Settings", self.build_settings)
+    
+    def build_settings(self, parent):
+        settings_frame = tk.Frame(parent, bg=self.light_color, padx=20, pady=20)
         settings_frame.pack(fill='both', expand=True)
         
         # User management
@@ -1402,6 +1636,12 @@ class HospitalManagementSystem:
         tk.Button(db_frame, text="Restore Database", command=self.restore_database,
                  bg=self.accent_color, fg='white').pack(pady=5)
         
+        tk.Button(db_frame, text="Rebuild Statistics", command=self.rebuild_statistics,
+                 bg=self.secondary_color, fg='white').pack(pady=5)
+        
+        tk.Button(db_frame, text="Export Data", command=self.export_data,
+                 bg=self.primary_color, fg='white').pack(pady=5)
+        
         # System information
         info_frame = tk.LabelFrame(settings_frame, text="System Information", 
                                   font=("Arial", 12, "bold"), bg='white', padx=10, pady=10)
@@ -1411,11 +1651,154 @@ class HospitalManagementSystem:
                 bg='white').pack(anchor='w')
         tk.Label(info_frame, text=f"Role: {self.current_user['role']}", 
                 bg='white').pack(anchor='w')
-        tk.Label(info_frame, text=f"Database: hospital.db", 
+        tk.Label(info_frame, text=f"Database: {self.db.db_path}", 
                 bg='white').pack(anchor='w')
+        
+        # Active performance profile
+        profile_frame = tk.LabelFrame(settings_frame, text=f"Performance Profile ({PROFILE_PATH})", 
+                                     font=("Arial", 12, "bold"), bg='white', padx=10, pady=10)
+        profile_frame.pack(fill='x', pady=10)
+        
+        pragma_frame = tk.Frame(profile_frame, bg='white')
+        pragma_frame.pack(anchor='w', fill='x')
+        self.executor.submit(
+            lambda db: db.pragma_settings(),
+            on_done=lambda settings: self.show_pragma_settings(pragma_frame, settings),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to read settings: {str(e)}"),
+            label="Reading settings")
+        tk.Label(profile_frame, text=f"maintenance_interval: {self.db.profile['maintenance_interval']}s", 
+                bg='white').pack(anchor='w')
+        cache_label = tk.Label(profile_frame, bg='white')
+        cache_label.pack(anchor='w')
+        tk.Button(profile_frame, text="Refresh", command=lambda: self.show_cache_stats(cache_label),
+                 bg=self.secondary_color, fg='white').pack(anchor='w', pady=5)
+        self.show_cache_stats(cache_label)
+        
+        # SQL statement profiler
+        sql_frame = tk.LabelFrame(settings_frame, text="SQL Profiler", 
+                                 font=("Arial", 12, "bold"), bg='white', padx=10, pady=10)
+        sql_frame.pack(fill='x', pady=10)
+        
+        enabled = tk.BooleanVar(value=profiler.enabled)
+        tk.Checkbutton(sql_frame, text="Record SQL statements", variable=enabled, bg='white',
+                      command=lambda: profiler.configure(enabled=enabled.get())).pack(anchor='w')
+        
+        threshold_frame = tk.Frame(sql_frame, bg='white')
+        threshold_frame.pack(anchor='w', pady=5)
+        tk.Label(threshold_frame, text="Slow query threshold (ms)", bg='white').pack(side='left')
+        threshold = tk.Entry(threshold_frame, width=8)
+        threshold.insert(0, f"{profiler.slow_ms:g}")
+        threshold.pack(side='left', padx=10)
+        threshold.bind("<Return>", lambda e: self.set_slow_query_threshold(threshold))
+        threshold.bind("<FocusOut>", lambda e: self.set_slow_query_threshold(threshold))
+        
+        tk.Button(sql_frame, text="View SQL Profile", command=self.show_sql_profile,
+                 bg=self.secondary_color, fg='white').pack(side='left', padx=5, pady=5)
+        tk.Button(sql_frame, text="Save SQL Profile", command=self.save_sql_profile,
+                 bg=self.success_color, fg='white').pack(side='left', padx=5, pady=5)
+        tk.Button(sql_frame, text="Reset", command=profiler.reset,
+                 bg=self.accent_color, fg='white').pack(side='left', padx=5, pady=5)
+    
+    def show_pragma_settings(self, frame, settings):
+        for name, value in settings.items():
+            tk.Label(frame, text=f"{name}: {value}", 
+                    bg='white').pack(anchor='w')
+    
+    def show_cache_stats(self, label):
+        """Entity cache occupancy and hit rate, for sizing entity_cache_size"""
+        self.executor.submit(
+            lambda db: db.cache_stats(),
+            on_done=lambda stats: self.show_cache_stats_result(label, stats),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to read cache statistics: {str(e)}"),
+            label="Reading cache statistics")
+    
+    def show_cache_stats_result(self, label, stats):
+        lookups = stats['hits'] + stats['misses']
+        rate = f"{stats['hits'] / lookups:.0%}" if lookups else "n/a"
+        label.config(text=f"entity_cache_size: {stats['entries']}/{stats['maxsize']} records, "
+                          f"{stats['hits']} hits, {stats['misses']} misses ({rate} hit rate)")
+    
+    def set_slow_query_threshold(self, entry):
+        try:
+            slow_ms = float(entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter the threshold in milliseconds")
+            return
+        profiler.configure(slow_ms=slow_ms)
+    
+    def show_sql_profile(self):
+        """Per-statement statistics and the slow-query log with query plans"""
+        window = tk.Toplevel(self.root)
+        window.title("SQL Profile")
+        window.geometry("1100x600")
+        
+        notebook = ttk.Notebook(window)
+        notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        columns = ('Statement', 'Calls', 'Rows', 'Total ms', 'Mean ms', 'p50 ms', 'p95 ms', 'p99 ms', 'Max ms')
+        stats_frame = tk.Frame(notebook)
+        notebook.add(stats_frame, text="Statements")
+        tree = ttk.Treeview(stats_frame, columns=columns, show='headings')
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=480 if col == 'Statement' else 70,
+                        anchor='w' if col == 'Statement' else 'e')
+        scrollbar = ttk.Scrollbar(stats_frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        
+        slow_frame = tk.Frame(notebook)
+        notebook.add(slow_frame, text="Slow Queries")
+        slow_text = scrolledtext.ScrolledText(slow_frame, font=("Courier", 10))
+        slow_text.pack(fill='both', expand=True)
+        
+        def refresh():
+            tree.delete(*tree.get_children())
+            for s in profiler.statements():
+                tree.insert('', 'end', values=(
+                    s['sql'], s['calls'], s['rows'], f"{s['total_ms']:.1f}", f"{s['mean_ms']:.3f}",
+                    f"{s['p50_ms']:.3f}", f"{s['p95_ms']:.3f}", f"{s['p99_ms']:.3f}", f"{s['max_ms']:.3f}"))
+            
+            lines = []
+            for q in profiler.slow_queries():
+                lines.append(f"{q['at']}  {q['ms']:.1f} ms  {q['rows']} rows")
+                lines.append(q['sql'])
+                lines.append(f"Parameters: {q['parameters']}")
+                lines.extend("    " + step for step in q['plan'])
+                lines.append("")
+            slow_text.config(state='normal')
+            slow_text.delete("1.0", tk.END)
+            slow_text.insert("1.0", "\n".join(lines) or f"No statements slower than {profiler.slow_ms:g} ms")
+            slow_text.config(state='disabled')
+        
+        refresh()
+        tk.Button(window, text="Refresh", command=refresh,
+                 bg=self.secondary_color, fg='white').pack(side='left', padx=10, pady=10)
+        tk.Button(window, text="Save SQL Profile", command=self.save_sql_profile,
+                 bg=self.success_color, fg='white').pack(side='left', padx=10, pady=10)
+    
+    def save_sql_profile(self):
+        """Dump the SQL profile and slow-query log to a JSON file"""
+        from tkinter import filedialog
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            initialfile=f"sql_profile_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        if file_path:
+            try:
+                profiler.dump(file_path)
+                messagebox.showinfo("Success", f"SQL profile saved to {file_path}")
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save SQL profile: {str(e)}")
     
     def add_new_user(self):
         """Add new user dialog"""
+        if self.server:
+            messagebox.showerror("Error", "Users are added on the server machine; "
+                                          "run hospital_admin.py add-user there")
+            return
         dialog = tk.Toplevel(self.root)
         dialog.title("Add New User")
         dialog.geometry("400x300")
@@ -1452,7 +1835,7 @@ class HospitalManagementSystem:
         """Save new user to database"""
         try:
             username = entries['username'].get()
-            password = hashlib.sha256(entries['password'].get().encode()).hexdigest()
+            password = entries['password'].get()
             full_name = entries['full_name'].get()
             role = entries['role'].get()
             
@@ -1460,49 +1843,144 @@ class HospitalManagementSystem:
                 messagebox.showerror("Error", "All fields are required")
                 return
             
-            self.cursor.execute(
-                "INSERT INTO users (username, password, role, full_name, status) VALUES (?, ?, ?, ?, ?)",
-                (username, password, role, full_name, 'active')
-            )
-            self.conn.commit()
+            self.write('add_user', username, password, role, full_name,
+                       on_done=lambda _: self.finish_save_user(username, dialog),
+                       on_error=self.save_user_failed, label="Adding user")
             
-            messagebox.showinfo("Success", f"User {username} added successfully!")
-            dialog.destroy()
-            
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Error", "Username already exists")
-    
-    # Helper methods for statistics
-    def count_patients(self):
-        self.cursor.execute("SELECT COUNT(*) FROM patients")
-        return self.cursor.fetchone()[0]
-    
-    def count_doctors(self):
-        self.cursor.execute("SELECT COUNT(*) FROM doctors WHERE availability='Available'")
-        return self.cursor.fetchone()[0]
+        except Exception as e:
+            self.save_user_failed(e)
     
-    def count_today_appointments(self):
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        self.cursor.execute("SELECT COUNT(*) FROM appointments WHERE appointment_date=?", (today,))
-        return self.cursor.fetchone()[0]
+    def finish_save_user(self, username, dialog):
+        messagebox.showinfo("Success", f"User {username} added successfully!")
+        dialog.destroy()
     
-    def count_pending_bills(self):
-        self.cursor.execute("SELECT COUNT(*) FROM billing WHERE status='Pending'")
-        return self.cursor.fetchone()[0]
+    def save_user_failed(self, e):
+        if isinstance(e, sqlite3.IntegrityError):
+            messagebox.showerror("Error", "Username already exists")
+        else:
+            messagebox.showerror("Error", f"Failed to add user: {str(e)}")
+    
+    def new_form_id(self, kind, label, caption):
+        """Allocate an ID for a new record form in the background and
+        show it on label once it arrives"""
+        self.form_ids[kind] = (None, label, caption)
+        label.config(text=f"{caption}: ...")
+        self.executor.submit(
+            lambda db: db.next_id(kind),
+            on_done=lambda new_id: self.show_form_id(kind, label, caption, new_id),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to allocate a {caption}: {str(e)}"),
+            label=f"Allocating {caption}")
+    
+    def show_form_id(self, kind, label, caption, new_id):
+        if self.form_ids.get(kind, (None, None))[1] is not label:
+            # The form was rebuilt meanwhile and asked for an ID of its own
+            return
+        self.form_ids[kind] = (new_id, label, caption)
+        label.config(text=f"{caption}: {new_id}")
+    
+    def save_form(self, kind, save):
+        """Call save(record_id) with the form's ID once it has arrived"""
+        record_id, _, caption = self.form_ids[kind]
+        if record_id is None:
+            messagebox.showwarning("Warning", f"The {caption} is still being allocated; try again")
+            return
+        save(record_id)
     
-    def count_available_rooms(self):
-        self.cursor.execute("SELECT SUM(available_beds) FROM rooms WHERE status='Available'")
-        result = self.cursor.fetchone()[0]
-        return result if result else 0
+    def renew_form_id(self, kind):
+        """Give a form the next ID once its record has been saved"""
+        _, label, caption = self.form_ids[kind]
+        self.new_form_id(kind, label, caption)
     
-    def count_staff(self):
-        self.cursor.execute("SELECT COUNT(*) FROM staff WHERE status='Active'")
-        return self.cursor.fetchone()[0]
+    def add_lazy_tabs(self, notebook, tabs):
+        """Add (name, build) tabs whose contents, and therefore their
+        queries, are built the first time each tab is selected"""
+        pending = {}
+        for tab_name, tab_function in tabs:
+            frame = tk.Frame(notebook, bg=self.light_color)
+            notebook.add(frame, text=tab_name)
+            pending[str(frame)] = (frame, tab_function)
+        
+        def build(event=None):
+            frame, tab_function = pending.pop(notebook.select(), (None, None))
+            if tab_function:
+                tab_function(frame)
+        
+        notebook.bind("<<NotebookTabChanged>>", build)
+        build()
     
     def clear_content(self):
-        """Clear content frame"""
+        """Clear content frame, including every cached screen"""
         for widget in self.content_frame.winfo_children():
             widget.destroy()
+        self.screens.clear()
+        self.current_screen = None
+    
+    def show_screen(self, name, title, build):
+        """Show a module screen, building it with build(frame) only on first use
+        
+        Screens stay alive, with their scroll positions and form contents,
+        for the last SCREEN_CACHE_SIZE modules visited and are only hidden
+        when another one is shown. If any table changed since a cached
+        screen was last shown, its data is reloaded: build may return a
+        refresh function for that, otherwise its lists are reloaded.
+        """
+        self.update_title(title)
+        if self.current_screen is not None:
+            self.current_screen.pack_forget()
+        
+        entry = self.screens.pop(name, None)
+        if entry is None:
+            frame = tk.Frame(self.content_frame, bg='white')
+            frame.pack(fill='both', expand=True)
+            refresh = build(frame) or (lambda: self.refresh_lists(frame))
+            entry = [frame, refresh, self.data_stamp()]
+        else:
+            frame, refresh, shown = entry
+            frame.pack(fill='both', expand=True)
+            stamp = self.data_stamp()
+            if shown != stamp:
+                refresh()
+                entry[2] = stamp
+        self.screens[name] = entry
+        self.current_screen = frame
+        
+        while len(self.screens) > SCREEN_CACHE_SIZE:
+            _, (old, _, _) = self.screens.popitem(last=False)
+            old.destroy()
+    
+    def data_stamp(self):
+        """Value that changes with the data, for the screen and lookup caches
+        
+        A local database's comes from the Tk thread's own connection, as
+        stamps of different connections are not comparable. A server's is
+        the one last seen while a background job fetches the current one,
+        so this never waits on the network; if it has moved on since the
+        visible screen was last loaded, that screen is refreshed.
+        """
+        if not self.server:
+            return self.db.data_stamp()
+        if self.stamp_job is None:
+            self.stamp_job = self.executor.submit(
+                lambda db: db.data_stamp(), on_done=self.update_stamp,
+                on_error=lambda e: self.update_stamp(self.stamp),
+                label="Checking for changes")
+        return self.stamp
+    
+    def update_stamp(self, stamp):
+        self.stamp_job = None
+        self.stamp = stamp
+        entry = self.screens.get(next(reversed(self.screens), None))
+        if entry is not None and entry[0] is self.current_screen and entry[2] != stamp:
+            entry[2] = stamp
+            entry[1]()
+    
+    def refresh_lists(self, widget):
+        """Reload every paged list inside widget"""
+        for child in widget.winfo_children():
+            if isinstance(child, PagedTreeview):
+                child.refresh()
+            else:
+                self.refresh_lists(child)
     
     def update_title(self, title):
         """Update window title"""
@@ -1511,7 +1989,20 @@ class HospitalManagementSystem:
     def update_status(self, message):
         """Update status bar"""
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        self.status_bar.config(text=f"{message} | {timestamp}")
+        self.status_text = f"{message} | {timestamp}"
+        self.status_bar.config(text=self.status_text)
+    
+    def show_progress(self, label, fraction):
+        """Show the progress of a long background job in the status bar"""
+        self.status_bar.config(text=f"Working: {label}... {fraction:.0%}")
+    
+    def show_busy(self, labels):
+        """Show outstanding background jobs in the status bar"""
+        if labels:
+            more = f" (+{len(labels) - 1} more)" if len(labels) > 1 else ""
+            self.status_bar.config(text=f"Working: {labels[0]}...{more}")
+        else:
+            self.status_bar.config(text=self.status_text)
     
     # Additional helper methods would be implemented for other features
     def edit_patient(self):
@@ -1532,13 +2023,20 @@ class HospitalManagementSystem:
         
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this patient?"):
             patient_id = self.patients_tree.item(selected[0])['values'][0]
-            self.cursor.execute("DELETE FROM patients WHERE patient_id=?", (patient_id,))
-            self.conn.commit()
-            self.refresh_patients()
-            self.update_status(f"Patient {patient_id} deleted")
+            self.write('delete_patient', patient_id,
+                       on_done=lambda _: self.finish_delete_patient(patient_id),
+                       on_error=lambda e: messagebox.showerror(
+                           "Error", f"Failed to delete patient: {str(e)}"),
+                       label="Deleting patient")
+    
+    def finish_delete_patient(self, patient_id):
+        self.refresh_patients()
+        self.update_status(f"Patient {patient_id} deleted")
     
     def export_patients_csv(self):
         """Export patients to CSV"""
+        from tkinter import filedialog
+        from hospital_export import export_table
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
@@ -1546,21 +2044,40 @@ class HospitalManagementSystem:
         )
         
         if file_path:
-            self.cursor.execute("SELECT * FROM patients")
-            patients = self.cursor.fetchall()
-            
-            with open(file_path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                # Write headers
-                writer.writerow(['ID', 'Patient ID', 'Name', 'Age', 'Gender', 'Address', 
-                                'Phone', 'Email', 'Blood Group', 'Emergency Contact',
-                                'Registration Date', 'Last Visit', 'Medical History',
-                                'Allergies', 'Insurance Info', 'Status'])
-                # Write data
-                writer.writerows(patients)
-            
-            messagebox.showinfo("Success", f"Patients exported to {file_path}")
-            self.update_status(f"Patients exported to CSV")
+            self.executor.submit(
+                lambda db, report: export_table(db, 'patients', file_path, progress=report),
+                on_done=lambda _: (messagebox.showinfo("Success", f"Patients exported to {file_path}"),
+                                   self.update_status(f"Patients exported to CSV")),
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to export patients: {str(e)}"),
+                on_progress=lambda fraction: self.show_progress("Exporting patients", fraction),
+                label="Exporting patients")
+    
+    def import_patients_file(self):
+        """Bulk import patients from a CSV export or a JSON Lines file"""
+        from tkinter import filedialog
+        from hospital_import import import_patients
+        file_path = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"),
+                       ("All files", "*.*")]
+        )
+        
+        if file_path:
+            self.executor.submit(
+                lambda db, report: import_patients(db, file_path, progress=report),
+                on_done=self.finish_import,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to import patients: {str(e)}"),
+                on_progress=lambda fraction: self.show_progress("Importing patients", fraction),
+                label="Importing patients")
+    
+    def finish_import(self, summary):
+        """Report the outcome of a patient import"""
+        message = (f"Imported {summary['imported']} of {summary['read']} rows "
+                   f"in {summary['seconds']:.1f}s ({summary['rows_per_second']:,.0f} rows/s)")
+        if summary['rejected']:
+            message += f"\n{summary['rejected']} rejected rows written to {summary['rejects_path']}"
+        messagebox.showinfo("Import Complete", message)
+        self.update_status(f"Imported {summary['imported']} patients")
+        self.refresh_patients()
     
     def create_search_patient_tab(self, parent):
         """Create search patient tab"""
@@ -1616,7 +2133,10 @@ class HospitalManagementSystem:
         tk.Label(frame, text="Doctors List", font=("Arial", 16, "bold"),
                 bg='white').pack(pady=10)
         
-        # Implementation would show doctors in a treeview
+        columns = ("ID", "Name", "Specialization", "Department", "Phone", "Fee", "Availability")
+        view = PagedTreeview(frame, columns, service_method('doctors_page'), self.executor)
+        view.pack(fill='both', expand=True)
+        view.reset()
     
     def create_doctor_schedule_tab(self, parent):
         """Create doctor schedule tab"""
@@ -1636,7 +2156,10 @@ class HospitalManagementSystem:
         tk.Label(frame, text="All Appointments", font=("Arial", 16, "bold"),
                 bg='white').pack(pady=10)
         
-        # Implementation would show appointments
+        columns = ("ID", "Patient", "Doctor", "Date", "Time", "Reason", "Status")
+        view = PagedTreeview(frame, columns, service_method('appointments_page'), self.executor)
+        view.pack(fill='both', expand=True)
+        view.reset()
     
     def create_today_appointments_tab(self, parent):
         """Create today's appointments tab"""
@@ -1656,7 +2179,10 @@ class HospitalManagementSystem:
         tk.Label(frame, text="Bills List", font=("Arial", 16, "bold"),
                 bg='white').pack(pady=10)
         
-        # Implementation would show bills
+        columns = ("Bill ID", "Patient", "Date", "Total", "Paid", "Due", "Method", "Status")
+        view = PagedTreeview(frame, columns, service_method('bills_page'), self.executor)
+        view.pack(fill='both', expand=True)
+        view.reset()
     
     def create_payment_history_tab(self, parent):
         """Create payment history tab"""
@@ -1670,6 +2196,10 @@ class HospitalManagementSystem:
     
     def change_password(self):
         """Change password dialog"""
+        if self.server:
+            messagebox.showerror("Error", "Passwords are changed on the server machine; "
+                                          "run hospital_admin.py change-password there")
+            return
         dialog = tk.Toplevel(self.root)
         dialog.title("Change Password")
         dialog.geometry("400x250")
@@ -1697,83 +2227,278 @@ class HospitalManagementSystem:
     
     def update_password(self, current_pass, new_pass, confirm_pass, dialog):
         """Update password in database"""
-        current = hashlib.sha256(current_pass.get().encode()).hexdigest()
-        new = hashlib.sha256(new_pass.get().encode()).hexdigest()
-        confirm = hashlib.sha256(confirm_pass.get().encode()).hexdigest()
+        current = current_pass.get()
+        new = new_pass.get()
+        confirm = confirm_pass.get()
         
         if new != confirm:
             messagebox.showerror("Error", "New passwords do not match")
             return
         
-        # Verify current password
-        self.cursor.execute("SELECT password FROM users WHERE username=?", (self.current_user['username'],))
-        db_password = self.cursor.fetchone()[0]
-        
-        if current != db_password:
+        # Verify current password and update
+        self.write('change_password', self.current_user['username'], current, new,
+                   on_done=lambda changed: self.finish_update_password(changed, dialog),
+                   on_error=lambda e: messagebox.showerror(
+                       "Error", f"Failed to change password: {str(e)}"),
+                   label="Changing password")
+    
+    def finish_update_password(self, changed, dialog):
+        if not changed:
             messagebox.showerror("Error", "Current password is incorrect")
             return
         
-        # Update password
-        self.cursor.execute("UPDATE users SET password=? WHERE username=?", 
-                          (new, self.current_user['username']))
-        self.conn.commit()
-        
         messagebox.showinfo("Success", "Password changed successfully!")
         dialog.destroy()
     
     def backup_database(self):
         """Backup database"""
+        from tkinter import filedialog
+        from hospital_backup import backup_database
+        if self.server:
+            messagebox.showerror("Error", "A backup copies the database file itself; "
+                                          "run hospital_admin.py backup on the server machine")
+            return
         try:
             backup_path = filedialog.asksaveasfilename(
                 defaultextension=".db",
-                filetypes=[("Database files", "*.db"), ("All files", "*.*")],
+                filetypes=[("Database files", "*.db"), ("Compressed backups", "*.db.gz"),
+                           ("All files", "*.*")],
                 initialfile=f"hospital_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
             )
             
             if backup_path:
-                # Create a backup by copying the database file
-                import shutil
-                shutil.copy2('hospital.db', backup_path)
-                
-                messagebox.showinfo("Success", f"Database backed up to {backup_path}")
-                self.update_status("Database backup completed")
+                # Online copy through the SQLite backup API, checked afterwards
+                self.executor.submit(
+                    lambda db, report: backup_database(db.conn, backup_path,
+                                                       compress=backup_path.endswith('.gz'),
+                                                       progress=report),
+                    on_done=lambda _: (messagebox.showinfo("Success", f"Database backed up to {backup_path}"),
+                                       self.update_status("Database backup completed")),
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to backup database: {str(e)}"),
+                    on_progress=lambda fraction: self.show_progress("Backing up database", fraction),
+                    label="Backing up database")
         
         except Exception as e:
             messagebox.showerror("Error", f"Failed to backup database: {str(e)}")
     
+    def export_data(self):
+        """Export any table, optionally filtered, to CSV or JSON Lines"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Export Data")
+        dialog.geometry("400x300")
+        
+        tk.Label(dialog, text="Export Data", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        form_frame = tk.Frame(dialog, padx=20, pady=10)
+        form_frame.pack()
+        
+        fields = [("Table", "combobox"), ("From Date (YYYY-MM-DD)", "entry"),
+                 ("To Date (YYYY-MM-DD)", "entry"), ("Status", "entry")]
+        
+        entries = {}
+        for i, (label, field_type) in enumerate(fields):
+            tk.Label(form_frame, text=label).grid(row=i, column=0, sticky='w', pady=5)
+            
+            if field_type == "entry":
+                entry = tk.Entry(form_frame, width=20)
+            else:
+                entry = ttk.Combobox(form_frame, values=list(EXPORT_TABLES), width=18, state='readonly')
+                entry.set('patients')
+            entry.grid(row=i, column=1, pady=5, padx=10)
+            entries[label.split(" (")[0].lower().replace(" ", "_")] = entry
+        
+        tk.Button(dialog, text="Export", 
+                 command=lambda: self.run_export(entries, dialog),
+                 bg=self.success_color, fg='white', padx=20).pack(pady=20)
+    
+    def run_export(self, entries, dialog):
+        """Ask for the output file and stream the export in the background"""
+        from tkinter import filedialog
+        from hospital_export import export_table
+        table = entries['table'].get()
+        date_from = entries['from_date'].get().strip() or None
+        date_to = entries['to_date'].get().strip() or None
+        status = entries['status'].get().strip() or None
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"),
+                       ("Compressed CSV", "*.csv.gz"), ("Compressed JSON Lines", "*.jsonl.gz"),
+                       ("All files", "*.*")],
+            initialfile=f"{table}_{datetime.datetime.now().strftime('%Y%m%d')}"
+        )
+        if not file_path:
+            return
+        dialog.destroy()
+        
+        self.executor.submit(
+            lambda db, report: export_table(db, table, file_path, date_from, date_to, status,
+                                            progress=report),
+            on_done=lambda count: (messagebox.showinfo("Success", f"{count} rows exported to {file_path}"),
+                                   self.update_status(f"Exported {table}")),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export {table}: {str(e)}"),
+            on_progress=lambda fraction: self.show_progress(f"Exporting {table}", fraction),
+            label=f"Exporting {table}")
+    
+    def rebuild_statistics(self):
+        """Recompute the dashboard counters from the base tables"""
+        def done(drift):
+            messagebox.showinfo("Success", f"Statistics rebuilt ({len(drift)} counters corrected)")
+            self.update_status("Statistics rebuilt")
+        
+        self.executor.submit(
+            lambda db: db.rebuild_counters(),
+            on_done=done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to rebuild statistics: {str(e)}"),
+            label="Rebuilding statistics")
+    
     def restore_database(self):
         """Restore database from backup"""
+        from tkinter import filedialog
+        from hospital_backup import restore_database
+        if self.server:
+            messagebox.showerror("Error", "A restore replaces the database file itself; "
+                                          "run it on the server machine")
+            return
         if messagebox.askyesno("Confirm", "This will replace the current database. Continue?"):
             backup_path = filedialog.askopenfilename(
-                filetypes=[("Database files", "*.db"), ("All files", "*.*")]
+                filetypes=[("Database files", "*.db"), ("Compressed backups", "*.db.gz"),
+                           ("All files", "*.*")]
             )
             
             if backup_path:
-                try:
-                    import shutil
-                    shutil.copy2(backup_path, 'hospital.db')
-                    
-                    # Reinitialize database connection
-                    self.conn.close()
-                    self.init_database()
-                    
-                    messagebox.showinfo("Success", "Database restored successfully!")
-                    self.update_status("Database restored from backup")
-                    
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to restore database: {str(e)}")
+                self.executor.submit(
+                    lambda db, report: restore_database(db.conn, backup_path, progress=report),
+                    on_done=self.finish_restore,
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to restore database: {str(e)}"),
+                    on_progress=lambda fraction: self.show_progress("Restoring database", fraction),
+                    label="Restoring database")
+    
+    def finish_restore(self, _):
+        """Reopen connections so the restored schema is migrated if needed"""
+        if not self.server:
+            # Blocks reserved before the restore are not in the restored sequences
+            self.db.ids.reset()
+            self.db.entities.clear()
+        self.executor.shutdown()
+        if self.writer is not None:
+            self.writer.close()
+        self.db.close()
+        self.init_database()
+        # Cached screens still hold the old executor
+        self.clear_content()
+        self.show_settings()
+        
+        messagebox.showinfo("Success", "Database restored successfully!")
+        self.update_status("Database restored from backup")
     
     def generate_financial_report(self):
-        """Generate financial report"""
-        messagebox.showinfo("Info", "Financial report generation to be implemented")
+        """Generate financial report for the last 30 days"""
+        date_to = datetime.date.today()
+        date_from = date_to - datetime.timedelta(days=29)
+        self.executor.submit(
+            lambda db: db.financial_report(date_from.isoformat(), date_to.isoformat()),
+            on_done=self.show_financial_report,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to generate report: {str(e)}"),
+            label="Building financial report")
+    
+    def show_financial_report(self, report):
+        """Display the financial report computed in the background"""
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Financial Report")
+        report_window.geometry("700x500")
+        
+        text_widget = scrolledtext.ScrolledText(report_window, font=("Courier", 10))
+        text_widget.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        def table(title, figures):
+            lines = [f"\n{title}", f"{'':<16}{'Bills':>8}{'Billed':>14}{'Collected':>14}{'Outstanding':>14}"]
+            for key, (bills, billed, collected, outstanding) in figures:
+                lines.append(f"{key:<16}{bills:>8}{billed:>14,.2f}{collected:>14,.2f}{outstanding:>14,.2f}")
+            return "\n".join(lines)
+        
+        bills, billed, collected, outstanding = report['totals']
+        report_text = f"""FINANCIAL REPORT
+================
+Generated on: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Period: {report['date_from']} to {report['date_to']}
+
+Bills: {bills}
+Revenue Billed: ${billed:,.2f}
+Collected: ${collected:,.2f}
+Outstanding Dues: ${outstanding:,.2f}
+"""
+        report_text += table("By Payment Method", sorted(report['by_payment_method'].items()))
+        report_text += "\n" + table("By Status", sorted(report['by_status'].items()))
+        report_text += "\n" + table("Daily", sorted(report['daily'].items()))
+        
+        text_widget.insert("1.0", report_text)
+        text_widget.config(state='disabled')
+        
+        header = ['Date', 'Payment Method', 'Status', 'Bills', 'Billed', 'Collected', 'Outstanding']
+        save_btn = tk.Button(report_window, text="Save Report", 
+                           command=lambda: self.save_report(report_text, "financial_report",
+                                                            [header] + report['rows']),
+                           bg=self.success_color, fg='white')
+        save_btn.pack(pady=10)
     
     def generate_doctor_report(self):
         """Generate doctor performance report"""
         messagebox.showinfo("Info", "Doctor report generation to be implemented")
     
     def generate_inventory_report(self):
-        """Generate inventory report"""
-        messagebox.showinfo("Info", "Inventory report generation to be implemented")
+        """Generate inventory report: stock totals, every item to reorder
+        and items expiring within EXPIRY_WINDOW_DAYS"""
+        self.executor.submit(
+            lambda db: (db.inventory_summary(), db.reorder_alerts(limit=-1),
+                        db.expiring_items(limit=-1, include_expired=True)),
+            on_done=self.show_inventory_report,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to generate report: {str(e)}"),
+            label="Building inventory report")
+    
+    def show_inventory_report(self, result):
+        """Display the inventory report computed in the background"""
+        summary, reorder, expiring = result
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Inventory Report")
+        report_window.geometry("700x500")
+        
+        text_widget = scrolledtext.ScrolledText(report_window, font=("Courier", 10))
+        text_widget.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        report_text = f"""INVENTORY REPORT
+================
+Generated on: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+
+Items: {summary['items']}
+Units in Stock: {summary['units']:,}
+Stock Value: ${summary['stock_value']:,.2f}
+At or Below Reorder Level: {summary['reorder']}
+Expiring within {summary['days']} days: {summary['expiring']}
+Expired, Still in Stock: {summary['expired']}
+
+Items to Reorder
+{'Item ID':<12}{'Name':<32}{'In Stock':>10}{'Reorder':>10}  Supplier
+"""
+        for _, (item_id, name, quantity, reorder_level, unit, supplier) in reorder:
+            report_text += f"{item_id:<12}{(name or '')[:31]:<32}{quantity:>10}{reorder_level:>10}  {supplier}\n"
+        
+        report_text += f"""
+Expired or Expiring within {summary['days']} days
+{'Item ID':<12}{'Name':<32}{'In Stock':>10}  {'Expiry':<12}Location
+"""
+        for _, (item_id, name, quantity, unit, expiry_date, location) in expiring:
+            report_text += f"{item_id:<12}{(name or '')[:31]:<32}{quantity:>10}  {expiry_date:<12}{location}\n"
+        
+        text_widget.insert("1.0", report_text)
+        text_widget.config(state='disabled')
+        
+        header = ['Item ID', 'Name', 'In Stock', 'Reorder Level', 'Unit', 'Supplier']
+        save_btn = tk.Button(report_window, text="Save Report", 
+                           command=lambda: self.save_report(report_text, "inventory_report",
+                                                            [header] + [row for _, row in reorder]),
+                           bg=self.success_color, fg='white')
+        save_btn.pack(pady=10)
     
     def generate_appointment_report(self):
         """Generate appointment report"""
@@ -1781,6 +2506,24 @@ class HospitalManagementSystem:
 
 # Main application entry point
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Advanced Hospital Management System")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print how long each phase of startup took")
+    parser.add_argument('--server', metavar='URL',
+                        help="work through a hospital_server, e.g. http://frontdesk:8765, "
+                             "instead of the local database file (default: server_url "
+                             "of the profile)")
+    args = parser.parse_args()
+    
+    startup = StartupProfile(STARTED)
+    startup.mark("imports")
     root = tk.Tk()
-    app = HospitalManagementSystem(root)
+    startup.mark("Tk root")
+    app = HospitalManagementSystem(root, startup, args.server or load_profile()['server_url'])
+    if args.profile_startup:
+        def report_startup():
+            startup.mark("first idle")
+            print(startup.report())
+        # After the first pass of the event loop has mapped and drawn the window
+        root.after(0, root.after_idle, report_startup)
     root.mainloop()
\ No newline at end of file
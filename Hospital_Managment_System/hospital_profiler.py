@@ -0,0 +1,273 @@
+"""SQL statement profiler and slow-query log.
+
+Every connection opened by hospital_service.connect is a
+ProfiledConnection. While the process-wide profiler is disabled its
+execute and executemany hand straight over to sqlite3, so the only cost
+is one Python call per statement. Once enabled, statements run on a
+ProfiledCursor that times execute and every fetch, and the profiler
+keeps per-statement counts, total and percentile latencies and rows.
+A statement whose latency crosses slow_ms is added to the slow-query
+log together with its EXPLAIN QUERY PLAN, captured on the same
+connection with the same parameters.
+"""
+import collections
+import datetime
+import json
+import sqlite3
+import threading
+import time
+
+SLOW_QUERY_MS = 100
+
+# Latest calls kept per statement for the percentiles
+SAMPLES_PER_STATEMENT = 1000
+
+SLOW_LOG_SIZE = 200
+
+# Raw statement texts whose normalized key is remembered
+KEY_CACHE_SIZE = 1024
+
+
+def normalize(sql):
+    """Statement text with whitespace collapsed, used as its key"""
+    return " ".join(sql.split())
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+class _Statement:
+    __slots__ = ('sql', 'calls', 'total', 'rows', 'max', 'samples')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total = 0.0
+        self.rows = 0
+        self.max = 0.0
+        self.samples = collections.deque(maxlen=SAMPLES_PER_STATEMENT)
+
+
+class _Call:
+    """One execution: its statement, latency and rows so far"""
+    __slots__ = ('statement', 'seconds', 'rows', 'slow')
+
+    def __init__(self, statement, seconds, rows):
+        self.statement = statement
+        self.seconds = seconds
+        self.rows = rows
+        self.slow = None
+
+
+class SQLProfiler:
+    """Thread-safe statistics of the statements run on profiled connections"""
+
+    def __init__(self, enabled=False, slow_ms=SLOW_QUERY_MS):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        # Raw SQL -> normalize(sql), most recently used last
+        self._keys = collections.OrderedDict()
+        self.reset()
+
+    def configure(self, enabled=None, slow_ms=None):
+        if slow_ms is not None:
+            self.slow_ms = float(slow_ms)
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}
+            self._slow = collections.deque(maxlen=SLOW_LOG_SIZE)
+            self.since = time.time()
+
+    def start(self, conn, sql, parameters, seconds, rows):
+        """Record an execute; returns the call that later fetches extend"""
+        with self._lock:
+            key = self._key(sql)
+            statement = self._statements.get(key)
+            if statement is None:
+                statement = self._statements[key] = _Statement(key)
+            call = _Call(statement, seconds, rows)
+            statement.calls += 1
+            statement.samples.append(call)
+            self._add(call, seconds, rows)
+        self._check(call, conn, sql, parameters)
+        return call
+
+    def _key(self, sql):
+        """normalize(sql), cached for the KEY_CACHE_SIZE latest texts;
+        call with the lock held"""
+        key = self._keys.get(sql)
+        if key is None:
+            key = self._keys[sql] = normalize(sql)
+            if len(self._keys) > KEY_CACHE_SIZE:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(sql)
+        return key
+
+    def extend(self, call, conn, sql, parameters, seconds, rows):
+        """Add fetch time and fetched rows to a call"""
+        with self._lock:
+            call.seconds += seconds
+            call.rows += rows
+            self._add(call, seconds, rows)
+        self._check(call, conn, sql, parameters)
+
+    def _add(self, call, seconds, rows):
+        statement = call.statement
+        statement.total += seconds
+        statement.rows += rows
+        if call.seconds > statement.max:
+            statement.max = call.seconds
+
+    def _check(self, call, conn, sql, parameters):
+        if call.slow is None and call.seconds * 1000 >= self.slow_ms:
+            call.slow = {
+                'at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'sql': call.statement.sql,
+                'parameters': repr(parameters)[:200],
+                'call': call,
+                'plan': explain(conn, sql, parameters),
+            }
+            with self._lock:
+                self._slow.append(call.slow)
+
+    def statements(self):
+        """Per-statement statistics, highest total time first"""
+        with self._lock:
+            statements = list(self._statements.values())
+            samples = [sorted(call.seconds for call in s.samples) for s in statements]
+        report = []
+        for s, ordered in zip(statements, samples):
+            report.append({
+                'sql': s.sql,
+                'calls': s.calls,
+                'rows': s.rows,
+                'total_ms': s.total * 1000,
+                'mean_ms': s.total * 1000 / s.calls,
+                'p50_ms': percentile(ordered, 0.50) * 1000,
+                'p95_ms': percentile(ordered, 0.95) * 1000,
+                'p99_ms': percentile(ordered, 0.99) * 1000,
+                'max_ms': s.max * 1000,
+            })
+        report.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return report
+
+    def slow_queries(self):
+        """Slow-query log, newest first"""
+        with self._lock:
+            entries = list(self._slow)
+        return [{'at': e['at'], 'sql': e['sql'], 'parameters': e['parameters'],
+                 'ms': e['call'].seconds * 1000, 'rows': e['call'].rows, 'plan': e['plan']}
+                for e in reversed(entries)]
+
+    def report(self):
+        return {
+            'since': datetime.datetime.fromtimestamp(self.since).isoformat(timespec='seconds'),
+            'enabled': self.enabled,
+            'slow_ms': self.slow_ms,
+            'statements': self.statements(),
+            'slow_queries': self.slow_queries(),
+        }
+
+    def dump(self, path):
+        """Write report() to path as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+
+profiler = SQLProfiler()
+
+
+def explain(conn, sql, parameters):
+    """EXPLAIN QUERY PLAN of sql as indented lines; [] for statements
+    without a plan, such as BEGIN or PRAGMA"""
+    if parameters is None:
+        return ["(not captured for executemany)"]
+    try:
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except sqlite3.Error as e:
+        return [f"(unavailable: {e})"]
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return lines
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that reports its execute and fetch times to the profiler"""
+
+    _call = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._sql, self._parameters = sql, parameters
+            rows = max(self.rowcount, 0)
+            self._call = profiler.start(self.connection, sql, parameters,
+                                        time.perf_counter() - started, rows)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._sql, self._parameters = sql, None
+            self._call = profiler.start(self.connection, sql, None,
+                                        time.perf_counter() - started, max(self.rowcount, 0))
+
+    def _fetched(self, started, rows):
+        if self._call is not None:
+            profiler.extend(self._call, self.connection, self._sql, self._parameters,
+                            time.perf_counter() - started, rows)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0)
+            raise
+        self._fetched(started, 1)
+        return row
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose statements are profiled while the profiler is enabled"""
+
+    def execute(self, sql, parameters=()):
+        if not profiler.enabled:
+            return super().execute(sql, parameters)
+        return self.cursor(ProfiledCursor).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not profiler.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor(ProfiledCursor).executemany(sql, seq_of_parameters)
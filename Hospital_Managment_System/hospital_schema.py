@@ -0,0 +1,660 @@
+"""Versioned schema migrations for the hospital database.
+
+The schema version is stored in ``PRAGMA user_version``. Each migration
+runs in its own transaction and bumps the version, so existing
+hospital.db files are upgraded in place and a current database skips all
+DDL at startup.
+"""
+
+import json
+import sqlite3
+
+TABLES = [
+    """CREATE TABLE IF NOT EXISTS patients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        patient_id TEXT UNIQUE,
+        name TEXT,
+        age INTEGER,
+        gender TEXT,
+        address TEXT,
+        phone TEXT,
+        email TEXT,
+        blood_group TEXT,
+        emergency_contact TEXT,
+        registration_date TEXT,
+        last_visit TEXT,
+        medical_history TEXT,
+        allergies TEXT,
+        insurance_info TEXT,
+        status TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS doctors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        doctor_id TEXT UNIQUE,
+        name TEXT,
+        specialization TEXT,
+        qualification TEXT,
+        experience INTEGER,
+        phone TEXT,
+        email TEXT,
+        schedule TEXT,
+        department TEXT,
+        consultation_fee REAL,
+        availability TEXT,
+        rating REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS appointments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        appointment_id TEXT UNIQUE,
+        patient_id TEXT,
+        doctor_id TEXT,
+        appointment_date TEXT,
+        appointment_time TEXT,
+        reason TEXT,
+        status TEXT,
+        notes TEXT,
+        created_date TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS staff (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        staff_id TEXT UNIQUE,
+        name TEXT,
+        role TEXT,
+        department TEXT,
+        phone TEXT,
+        email TEXT,
+        salary REAL,
+        hire_date TEXT,
+        shift TEXT,
+        status TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS inventory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id TEXT UNIQUE,
+        name TEXT,
+        category TEXT,
+        quantity INTEGER,
+        unit TEXT,
+        price REAL,
+        supplier TEXT,
+        expiry_date TEXT,
+        reorder_level INTEGER,
+        location TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS billing (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bill_id TEXT UNIQUE,
+        patient_id TEXT,
+        patient_name TEXT,
+        bill_date TEXT,
+        bill_time TEXT,
+        items TEXT,
+        total_amount REAL,
+        paid_amount REAL,
+        due_amount REAL,
+        payment_method TEXT,
+        insurance_covered REAL,
+        status TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS prescriptions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        prescription_id TEXT UNIQUE,
+        patient_id TEXT,
+        doctor_id TEXT,
+        prescription_date TEXT,
+        diagnosis TEXT,
+        medicines TEXT,
+        dosage TEXT,
+        duration TEXT,
+        notes TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS rooms (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_id TEXT UNIQUE,
+        room_type TEXT,
+        floor INTEGER,
+        bed_count INTEGER,
+        available_beds INTEGER,
+        price_per_day REAL,
+        facilities TEXT,
+        status TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS admissions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        admission_id TEXT UNIQUE,
+        patient_id TEXT,
+        room_id TEXT,
+        admission_date TEXT,
+        discharge_date TEXT,
+        reason TEXT,
+        attending_doctor TEXT,
+        status TEXT,
+        estimated_cost REAL,
+        paid_amount REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        password TEXT,
+        role TEXT,
+        full_name TEXT,
+        last_login TEXT,
+        status TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS lab_tests (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        test_id TEXT UNIQUE,
+        patient_id TEXT,
+        doctor_id TEXT,
+        test_name TEXT,
+        test_date TEXT,
+        test_time TEXT,
+        sample_type TEXT,
+        results TEXT,
+        status TEXT,
+        technician TEXT,
+        report_path TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS operations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        operation_id TEXT UNIQUE,
+        patient_id TEXT,
+        doctor_id TEXT,
+        operation_name TEXT,
+        operation_date TEXT,
+        operation_time TEXT,
+        theater TEXT,
+        duration TEXT,
+        anesthesiologist TEXT,
+        status TEXT,
+        notes TEXT
+    )"""
+]
+
+
+INDEXES = [
+    # Dashboard counts and patient list ordering
+    "CREATE INDEX IF NOT EXISTS idx_patients_registration ON patients (registration_date)",
+    "CREATE INDEX IF NOT EXISTS idx_doctors_availability ON doctors (availability, doctor_id, name, specialization)",
+    "CREATE INDEX IF NOT EXISTS idx_staff_status ON staff (status)",
+    "CREATE INDEX IF NOT EXISTS idx_rooms_status ON rooms (status, available_beds)",
+    # Appointments by day, by doctor slot and by patient
+    "CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments (appointment_date, status)",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_doctor ON appointments (doctor_id, appointment_date, appointment_time)",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments (patient_id, appointment_date)",
+    # Billing by status and by patient
+    "CREATE INDEX IF NOT EXISTS idx_billing_status ON billing (status, bill_date)",
+    "CREATE INDEX IF NOT EXISTS idx_billing_patient ON billing (patient_id, bill_date)",
+    # Clinical records by patient and by doctor
+    "CREATE INDEX IF NOT EXISTS idx_prescriptions_patient ON prescriptions (patient_id, prescription_date)",
+    "CREATE INDEX IF NOT EXISTS idx_prescriptions_doctor ON prescriptions (doctor_id, prescription_date)",
+    "CREATE INDEX IF NOT EXISTS idx_lab_tests_patient ON lab_tests (patient_id, test_date)",
+    "CREATE INDEX IF NOT EXISTS idx_lab_tests_doctor ON lab_tests (doctor_id, test_date)",
+    "CREATE INDEX IF NOT EXISTS idx_lab_tests_status ON lab_tests (status, test_date)",
+    "CREATE INDEX IF NOT EXISTS idx_admissions_patient ON admissions (patient_id, admission_date)",
+    "CREATE INDEX IF NOT EXISTS idx_admissions_room ON admissions (room_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_operations_patient ON operations (patient_id, operation_date)",
+    "CREATE INDEX IF NOT EXISTS idx_operations_doctor ON operations (doctor_id, operation_date, operation_time)",
+]
+
+def digits_sql(expr):
+    """SQL expression stripping common phone punctuation from expr"""
+    for ch in " -()+./":
+        expr = f"replace({expr}, '{ch}', '')"
+    return expr
+
+
+def create_patient_search_index(conn):
+    """Full-text index over patients kept in sync by triggers
+    
+    Skipped when this SQLite build has no FTS5; search then falls back
+    to LIKE scans.
+    """
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+                patient_id, name, email, phone,
+                tokenize='unicode61', prefix='1 2 3'
+            )""")
+    except sqlite3.OperationalError as e:
+        if 'fts5' not in str(e):
+            raise
+        return
+    conn.execute(f"""
+        INSERT INTO patients_fts (rowid, patient_id, name, email, phone)
+        SELECT id, patient_id, name, email, {digits_sql('phone')} FROM patients
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+            INSERT INTO patients_fts (rowid, patient_id, name, email, phone)
+            VALUES (new.id, new.patient_id, new.name, new.email, {digits_sql('new.phone')});
+        END""")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+            DELETE FROM patients_fts WHERE rowid = old.id;
+        END""")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS patients_fts_au
+        AFTER UPDATE OF patient_id, name, email, phone ON patients BEGIN
+            UPDATE patients_fts
+            SET patient_id = new.patient_id, name = new.name, email = new.email,
+                phone = {digits_sql('new.phone')}
+            WHERE rowid = old.id;
+        END""")
+
+
+# Precomputed counters: (table, counter name, contribution of one row,
+# columns whose update changes the row's contribution, aggregate that
+# recomputes (name, value) pairs from scratch). {row} is new or old.
+COUNTERS = [
+    ("patients", "'patients'", "1", None,
+     "SELECT 'patients', COUNT(*) FROM patients"),
+    ("doctors", "'doctors_available'", "{row}.availability = 'Available'", ("availability",),
+     "SELECT 'doctors_available', COUNT(*) FROM doctors WHERE availability = 'Available'"),
+    ("appointments", "'appointments:' || COALESCE({row}.appointment_date, '')", "1",
+     ("appointment_date",),
+     "SELECT 'appointments:' || COALESCE(appointment_date, ''), COUNT(*) FROM appointments GROUP BY 1"),
+    ("billing", "'bills:' || COALESCE({row}.status, '')", "1", ("status",),
+     "SELECT 'bills:' || COALESCE(status, ''), COUNT(*) FROM billing GROUP BY 1"),
+    ("rooms", "'available_beds'",
+     "CASE WHEN {row}.status = 'Available' THEN COALESCE({row}.available_beds, 0) ELSE 0 END",
+     ("status", "available_beds"),
+     "SELECT 'available_beds', COALESCE(SUM(available_beds), 0) FROM rooms WHERE status = 'Available'"),
+    ("staff", "'staff_active'", "{row}.status = 'Active'", ("status",),
+     "SELECT 'staff_active', COUNT(*) FROM staff WHERE status = 'Active'"),
+]
+
+
+def _counter_delta(name, contribution, row, sign):
+    name, contribution = name.format(row=row), contribution.format(row=row)
+    return f"""
+            INSERT INTO stats_counters (name, value)
+            SELECT {name}, {sign}({contribution}) WHERE ({contribution}) != 0
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;"""
+
+
+def create_counters(conn):
+    """Counters table kept current by triggers on the counted tables"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID""")
+    for table, name, contribution, columns, _ in COUNTERS:
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_counters_ai AFTER INSERT ON {table} BEGIN
+            {_counter_delta(name, contribution, 'new', '+')}
+            END""")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_counters_ad AFTER DELETE ON {table} BEGIN
+            {_counter_delta(name, contribution, 'old', '-')}
+            END""")
+        if columns:
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_counters_au
+                AFTER UPDATE OF {", ".join(columns)} ON {table} BEGIN
+                {_counter_delta(name, contribution, 'old', '-')}
+                {_counter_delta(name, contribution, 'new', '+')}
+                END""")
+    rebuild_counters(conn)
+
+
+def live_counters(conn):
+    """Counter values aggregated from the base tables, zeros omitted"""
+    sql = " UNION ALL ".join(aggregate for *_, aggregate in COUNTERS)
+    return {name: value for name, value in conn.execute(sql) if value}
+
+
+def stored_counters(conn):
+    return {name: value for name, value in conn.execute(
+        "SELECT name, value FROM stats_counters WHERE value != 0")}
+
+
+def rebuild_counters(conn, verify_only=False):
+    """Recompute every counter from the base tables
+    
+    Returns {name: (stored, live)} for each counter that had drifted.
+    With verify_only the stored counters are left untouched. Run inside
+    a transaction so no write lands between the two reads.
+    """
+    live = live_counters(conn)
+    stored = stored_counters(conn)
+    drift = {name: (stored.get(name, 0), live.get(name, 0))
+             for name in set(live) | set(stored)
+             if stored.get(name, 0) != live.get(name, 0)}
+    if not verify_only:
+        conn.execute("DELETE FROM stats_counters")
+        conn.executemany("INSERT INTO stats_counters (name, value) VALUES (?, ?)", live.items())
+    return drift
+
+
+# AFTER INSERT triggers on patients whose work index_new_patients does
+# set-wise for bulk imports
+PATIENT_INSERT_TRIGGERS = ('patients_fts_ai', 'patients_counters_ai')
+
+
+def suspend_triggers(conn, names):
+    """Drop the named triggers and return the SQL that recreates them
+    
+    Only call inside a transaction that also recreates them, so no other
+    connection ever sees the schema without the triggers.
+    """
+    saved = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+        f"AND name IN ({', '.join('?' * len(names))})", names).fetchall()
+    for name, _ in saved:
+        conn.execute(f"DROP TRIGGER {name}")
+    return [sql for _, sql in saved]
+
+
+def restore_triggers(conn, saved):
+    for sql in saved:
+        conn.execute(sql)
+
+
+def index_new_patients(conn, first_id, count):
+    """Update patients_fts and the patients counter for count new rows
+    with id >= first_id, as the suspended insert triggers would have"""
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'patients_fts'").fetchone()
+    if has_fts:
+        conn.execute(f"""
+            INSERT INTO patients_fts (rowid, patient_id, name, email, phone)
+            SELECT id, patient_id, name, email, {digits_sql('phone')}
+            FROM patients WHERE id >= ?
+        """, (first_id,))
+    conn.execute("""
+        INSERT INTO stats_counters (name, value) VALUES ('patients', ?)
+        ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+    """, (count,))
+
+
+BILL_ITEMS = [
+    """CREATE TABLE IF NOT EXISTS bill_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bill_id TEXT NOT NULL,
+        name TEXT,
+        description TEXT,
+        qty REAL,
+        unit_price REAL,
+        line_total REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_bill_items_bill ON bill_items (bill_id)",
+    # Covers per-item aggregates such as revenue by service
+    "CREATE INDEX IF NOT EXISTS idx_bill_items_name ON bill_items (name, qty, line_total)",
+]
+
+
+def parse_amount(value):
+    """Number from a display value such as "$1,200.00"; None if blank"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).replace('$', '').replace(',', '').strip())
+
+
+def bill_item_values(item):
+    """(name, description, qty, unit_price, line_total) from a display row
+    [name, description, qty, "$price", "$total"] as stored in billing.items"""
+    name, description, qty, unit_price = (list(item) + [None] * 4)[:4]
+    qty, unit_price = parse_amount(qty), parse_amount(unit_price)
+    line_total = parse_amount(item[4]) if len(item) > 4 else None
+    if line_total is None and qty is not None and unit_price is not None:
+        line_total = qty * unit_price
+    return (str(name or ''), str(description or ''), qty, unit_price, line_total)
+
+
+def backfill_bill_items(conn):
+    """Copy the line items of existing bills out of billing.items JSON
+    
+    Bills whose JSON cannot be parsed are skipped and keep their blob.
+    """
+    rows = []
+    for bill_id, items in conn.execute(
+            "SELECT bill_id, items FROM billing WHERE items IS NOT NULL AND items != ''"):
+        try:
+            rows.extend((bill_id, *bill_item_values(item)) for item in json.loads(items))
+        except (ValueError, TypeError):
+            continue
+        if len(rows) >= 10000:
+            _insert_bill_items(conn, rows)
+            rows = []
+    _insert_bill_items(conn, rows)
+
+
+def _insert_bill_items(conn, rows):
+    conn.executemany("""
+        INSERT INTO bill_items (bill_id, name, description, qty, unit_price, line_total)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+# Billing totals per day, payment method and status. Bills up to the
+# watermark id are folded in; later bills are the tail that reports add
+# live until roll_up_billing folds them. Triggers keep the rollup right
+# when an already folded bill changes or is deleted.
+ROLLUP_MEASURES = ("COUNT(*)", "SUM(total_amount)", "SUM(paid_amount)", "SUM(due_amount)")
+
+
+def _rollup_delta(row, sign):
+    return f"""
+            INSERT INTO billing_rollup (day, payment_method, status, bills, billed, collected, outstanding)
+            VALUES (COALESCE({row}.bill_date, ''), COALESCE({row}.payment_method, ''),
+                    COALESCE({row}.status, ''), {sign}1, {sign}COALESCE({row}.total_amount, 0),
+                    {sign}COALESCE({row}.paid_amount, 0), {sign}COALESCE({row}.due_amount, 0))
+            ON CONFLICT (day, payment_method, status) DO UPDATE SET
+                bills = bills + excluded.bills, billed = billed + excluded.billed,
+                collected = collected + excluded.collected,
+                outstanding = outstanding + excluded.outstanding;"""
+
+
+def create_billing_rollup(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS billing_rollup (
+            day TEXT NOT NULL,
+            payment_method TEXT NOT NULL,
+            status TEXT NOT NULL,
+            bills INTEGER NOT NULL DEFAULT 0,
+            billed REAL NOT NULL DEFAULT 0,
+            collected REAL NOT NULL DEFAULT 0,
+            outstanding REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, payment_method, status)
+        ) WITHOUT ROWID""")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        ) WITHOUT ROWID""")
+    conn.execute("INSERT OR IGNORE INTO rollup_watermarks (name, last_id) VALUES ('billing', 0)")
+    folded = "(SELECT last_id FROM rollup_watermarks WHERE name = 'billing')"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS billing_rollup_au
+        AFTER UPDATE OF bill_date, payment_method, status, total_amount, paid_amount, due_amount
+        ON billing WHEN old.id <= {folded} BEGIN
+        {_rollup_delta('old', '-')}
+        {_rollup_delta('new', '+')}
+        END""")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS billing_rollup_ad
+        AFTER DELETE ON billing WHEN old.id <= {folded} BEGIN
+        {_rollup_delta('old', '-')}
+        END""")
+    roll_up_billing(conn)
+
+
+def roll_up_billing(conn):
+    """Fold bills past the watermark into billing_rollup
+    
+    Run inside a transaction. Returns the number of bills folded.
+    """
+    last_id = conn.execute(
+        "SELECT last_id FROM rollup_watermarks WHERE name = 'billing'").fetchone()[0]
+    high = conn.execute("SELECT IFNULL(MAX(id), 0) FROM billing").fetchone()[0]
+    if high <= last_id:
+        return 0
+    conn.execute(f"""
+        INSERT INTO billing_rollup (day, payment_method, status, bills, billed, collected, outstanding)
+        SELECT COALESCE(bill_date, ''), COALESCE(payment_method, ''), COALESCE(status, ''),
+               {", ".join(f"IFNULL({m}, 0)" for m in ROLLUP_MEASURES)}
+        FROM billing WHERE id > ? AND id <= ?
+        GROUP BY 1, 2, 3
+        ON CONFLICT (day, payment_method, status) DO UPDATE SET
+            bills = bills + excluded.bills, billed = billed + excluded.billed,
+            collected = collected + excluded.collected,
+            outstanding = outstanding + excluded.outstanding
+    """, (last_id, high))
+    conn.execute("UPDATE rollup_watermarks SET last_id = ? WHERE name = 'billing'", (high,))
+    return conn.execute("SELECT COUNT(*) FROM billing WHERE id > ? AND id <= ?",
+                        (last_id, high)).fetchone()[0]
+
+
+# An appointment holds its doctor's slot unless it has one of these
+# statuses. Double bookings that existed before the unique slot index are
+# marked 'Conflict', keeping the earliest booking of each slot.
+BOOKED = "status NOT IN ('Cancelled', 'Conflict')"
+
+# Legacy rows may lack a doctor, date or time. The unique index treats
+# NULLs as distinct, so such rows never clash and are left alone.
+HAS_SLOT = ("doctor_id IS NOT NULL AND appointment_date IS NOT NULL "
+            "AND appointment_time IS NOT NULL")
+
+
+def create_slot_index(conn):
+    conn.execute(f"""
+        UPDATE appointments SET status = 'Conflict'
+        WHERE {BOOKED} AND {HAS_SLOT} AND id NOT IN (
+            SELECT MIN(id) FROM appointments WHERE {BOOKED} AND {HAS_SLOT}
+            GROUP BY doctor_id, appointment_date, appointment_time)""")
+    conn.execute(f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_slot
+        ON appointments (doctor_id, appointment_date, appointment_time) WHERE {BOOKED}""")
+
+
+# Stock ledger. Every change to an item's quantity is an appended
+# stock_movements row; triggers apply it to inventory.quantity, refuse a
+# movement that would take stock below zero and keep the ledger
+# append-only (a mistake is undone by a correcting movement). Partial
+# and expiry indexes make reorder alerts and expiry windows range reads.
+STOCK_LEDGER = [
+    """CREATE TABLE IF NOT EXISTS stock_movements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        reason TEXT,
+        reference TEXT,
+        moved_at TEXT,
+        recorded_by TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_stock_movements_item ON stock_movements (item_id, id)",
+    # Only items at or below their reorder level are in this index
+    """CREATE INDEX IF NOT EXISTS idx_inventory_reorder ON inventory (item_id)
+        WHERE quantity <= reorder_level""",
+    "CREATE INDEX IF NOT EXISTS idx_inventory_expiry ON inventory (expiry_date)",
+    "CREATE INDEX IF NOT EXISTS idx_inventory_name ON inventory (name COLLATE NOCASE)",
+]
+
+# Triggers that apply stock movements to inventory; the seeder suspends
+# them because it writes items with their final quantities
+STOCK_MOVEMENT_TRIGGERS = ('stock_movements_bi', 'stock_movements_ai')
+
+
+def create_stock_ledger(conn):
+    """Record the stock already held as opening movements, then have
+    triggers keep inventory.quantity in step with the ledger"""
+    conn.execute("""
+        INSERT INTO stock_movements (item_id, quantity, reason, reference, moved_at, recorded_by)
+        SELECT item_id, quantity, 'Opening balance', '', datetime('now', 'localtime'), ''
+        FROM inventory WHERE item_id IS NOT NULL AND IFNULL(quantity, 0) != 0
+        ORDER BY id""")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS stock_movements_bi BEFORE INSERT ON stock_movements BEGIN
+            SELECT RAISE(ABORT, 'stock movement for an unknown item or below zero stock')
+            WHERE NOT EXISTS (SELECT 1 FROM inventory WHERE item_id = new.item_id
+                              AND IFNULL(quantity, 0) + new.quantity >= 0);
+        END""")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS stock_movements_ai AFTER INSERT ON stock_movements BEGIN
+            UPDATE inventory SET quantity = IFNULL(quantity, 0) + new.quantity
+            WHERE item_id = new.item_id;
+        END""")
+    for event in ('UPDATE', 'DELETE'):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stock_movements_b{event[0].lower()}
+            BEFORE {event} ON stock_movements BEGIN
+                SELECT RAISE(ABORT, 'stock movements are append-only; record a correcting movement');
+            END""")
+
+
+def stock_drift(conn):
+    """{item_id: (quantity, ledger total)} for every item whose quantity
+    disagrees with the sum of its stock movements"""
+    return {item_id: (quantity, total) for item_id, quantity, total in conn.execute("""
+        SELECT i.item_id, IFNULL(i.quantity, 0), IFNULL(m.total, 0)
+        FROM inventory i
+        LEFT JOIN (SELECT item_id, SUM(quantity) AS total
+                   FROM stock_movements GROUP BY item_id) m ON m.item_id = i.item_id
+        WHERE IFNULL(i.quantity, 0) != IFNULL(m.total, 0)""")}
+
+
+# (version, description, steps). A step is an SQL string or a callable
+# taking the connection. Append new migrations; never edit applied ones.
+MIGRATIONS = [
+    (1, "base tables", TABLES),
+    (2, "secondary indexes for hot queries", INDEXES),
+    (3, "full-text patient search", [create_patient_search_index]),
+    (4, "keyset pagination for appointment and bill lists", [
+        "CREATE INDEX IF NOT EXISTS idx_appointments_day ON appointments (appointment_date)",
+        "CREATE INDEX IF NOT EXISTS idx_billing_date ON billing (bill_date)",
+    ]),
+    (5, "trigger-maintained dashboard counters", [create_counters]),
+    (6, "bill line items table", BILL_ITEMS + [backfill_bill_items]),
+    (7, "incremental billing rollups", [create_billing_rollup]),
+    (8, "one booking per doctor slot", [create_slot_index]),
+    (9, "sequences for block-allocated IDs", [
+        """CREATE TABLE IF NOT EXISTS id_sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        ) WITHOUT ROWID""",
+    ]),
+    (10, "inventory stock ledger", STOCK_LEDGER + [create_stock_ledger]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations and return the versions that were applied
+
+    The connection must be in autocommit mode (isolation_level=None).
+    """
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return []
+
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock in case another client migrated
+            if version <= schema_version(conn):
+                conn.execute("COMMIT")
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {version}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        applied.append(version)
+
+    if applied:
+        conn.execute("PRAGMA optimize")
+    return applied
@@ -0,0 +1,455 @@
+"""Seeded synthetic data for benchmarking and testing.
+
+seed_database fills every table of an empty database with realistic,
+referentially consistent records: appointments, bills, prescriptions,
+lab tests, admissions and operations only refer to patients, doctors
+and rooms that exist, appointments never double-book a doctor's slot,
+room bed counts agree with the open admissions and every item's
+quantity is the sum of its stock movements. The same seed and
+scale always produce the same data, dated relative to the day it runs.
+Row counts grow with the number of patients in the proportions of RATIOS.
+"""
+import datetime
+import random
+import time
+
+from hospital_schema import (COUNTERS, rebuild_counters, suspend_triggers, restore_triggers,
+                             STOCK_MOVEMENT_TRIGGERS)
+from hospital_service import Patient, bill_status, slot_times
+from hospital_ids import ID_COLUMNS
+
+# Named scales: number of patients
+SCALES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Rows per patient for the tables that grow with the patient count
+RATIOS = {
+    'appointments': 3.0,
+    'billing': 2.0,
+    'lab_tests': 1.5,
+    'prescriptions': 1.0,
+    'admissions': 0.1,
+    'operations': 0.02,
+    'stock_movements': 1.0,
+}
+
+BATCH_SIZE = 10_000
+
+# Days of history covered by registrations, bills and clinical records
+HISTORY_DAYS = 5 * 365
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda",
+    "David", "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+    "Thomas", "Sarah", "Charles", "Karen", "Christopher", "Lisa", "Daniel", "Nancy",
+    "Matthew", "Betty", "Anthony", "Margaret", "Mark", "Sandra", "Donald", "Ashley",
+    "Steven", "Kimberly", "Paul", "Emily", "Andrew", "Donna", "Joshua", "Michelle",
+    "Aarav", "Priya", "Rahul", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya",
+    "Mohammed", "Fatima", "Omar", "Aisha", "Wei", "Mei", "Hiroshi", "Yuki",
+    "Carlos", "Maria", "Luis", "Sofia", "Pierre", "Camille", "Hans", "Greta",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
+    "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker",
+    "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores",
+    "Sharma", "Patel", "Singh", "Kumar", "Gupta", "Khan", "Ali", "Chen", "Wang",
+    "Tanaka", "Sato", "Müller", "Schmidt", "Dubois", "Rossi", "Silva", "Kowalski",
+]
+STREETS = ["Main St", "Oak Ave", "Maple Rd", "Park Lane", "Cedar St", "Lake View",
+           "Hill Rd", "River St", "Station Rd", "Church St", "Elm St", "Green Ave"]
+CITIES = ["Springfield", "Riverside", "Fairview", "Madison", "Georgetown",
+          "Franklin", "Clinton", "Salem", "Greenville", "Bristol"]
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+CONDITIONS = ["", "", "", "Hypertension", "Type 2 diabetes", "Asthma", "Migraine",
+              "Hypothyroidism", "Arthritis", "High cholesterol", "Anemia"]
+ALLERGIES = ["", "", "", "", "Penicillin", "Peanuts", "Latex", "Pollen", "Sulfa drugs"]
+INSURERS = ["", "", "HealthFirst", "MediCare Plus", "United Health", "CarePoint", "LifeShield"]
+
+DEPARTMENTS = {
+    "Cardiology": ["Cardiologist", "Cardiac Surgeon"],
+    "Neurology": ["Neurologist", "Neurosurgeon"],
+    "Orthopedics": ["Orthopedic Surgeon", "Sports Medicine"],
+    "Pediatrics": ["Pediatrician", "Neonatologist"],
+    "Gynecology": ["Gynecologist", "Obstetrician"],
+    "Dermatology": ["Dermatologist"],
+    "Emergency": ["Emergency Physician", "Trauma Surgeon"],
+    "General": ["General Physician", "Internal Medicine"],
+}
+QUALIFICATIONS = ["MBBS", "MBBS, MD", "MBBS, MS", "MD, DM", "MBBS, DNB"]
+REASONS = ["Routine checkup", "Follow-up", "Fever", "Chest pain", "Back pain",
+           "Headache", "Skin rash", "Vaccination", "Consultation", "Joint pain"]
+PAYMENT_METHODS = ["Cash", "Credit Card", "Debit Card", "Insurance", "Online"]
+SERVICES = [
+    ("Consultation", 50.0), ("X-Ray", 120.0), ("Blood Test", 40.0), ("MRI Scan", 800.0),
+    ("CT Scan", 450.0), ("ECG", 60.0), ("Ultrasound", 150.0), ("Physiotherapy", 70.0),
+    ("Dressing", 25.0), ("Injection", 15.0), ("Room Charges", 200.0), ("Medicines", 35.0),
+]
+LAB_TESTS = [("Complete Blood Count", "Blood"), ("Lipid Profile", "Blood"),
+             ("Blood Glucose", "Blood"), ("Liver Function Test", "Blood"),
+             ("Urinalysis", "Urine"), ("Thyroid Panel", "Blood"),
+             ("Stool Culture", "Stool"), ("Throat Swab", "Swab")]
+MEDICINES = [("Paracetamol 500mg", "1 tablet thrice daily"), ("Amoxicillin 250mg", "1 capsule twice daily"),
+             ("Ibuprofen 400mg", "1 tablet when needed"), ("Metformin 500mg", "1 tablet twice daily"),
+             ("Amlodipine 5mg", "1 tablet daily"), ("Cetirizine 10mg", "1 tablet at night"),
+             ("Omeprazole 20mg", "1 capsule before breakfast")]
+DIAGNOSES = ["Viral fever", "Hypertension", "Type 2 diabetes", "Gastritis",
+             "Allergic rhinitis", "Upper respiratory infection", "Lower back strain"]
+OPERATIONS = ["Appendectomy", "Cholecystectomy", "Knee Arthroscopy", "Hernia Repair",
+              "Cataract Surgery", "Coronary Angioplasty", "Cesarean Section"]
+ROOM_TYPES = [("General Ward", 6, 50.0), ("Semi-Private", 2, 120.0),
+              ("Private", 1, 250.0), ("ICU", 1, 600.0)]
+STAFF_ROLES = ["Nurse", "Nurse", "Nurse", "Technician", "Receptionist", "Pharmacist",
+               "Ward Assistant", "Administrator"]
+SHIFTS = ["Morning", "Evening", "Night"]
+INVENTORY = [("Medicine", "box"), ("Surgical", "pack"), ("Consumable", "piece"),
+             ("Equipment", "unit"), ("Laboratory", "kit")]
+SUPPLIERS = ["MedSupply Co", "PharmaWorld", "CareLine Distributors", "HealthSource"]
+USER_ROLES = ["doctor", "staff", "receptionist"]
+
+
+def seed_counts(patients):
+    """Rows generated per table for the given number of patients"""
+    counts = {table: int(patients * ratio) for table, ratio in RATIOS.items()}
+    counts.update({
+        'patients': patients,
+        'doctors': max(20, patients // 500),
+        'staff': max(30, patients // 200),
+        'rooms': max(20, patients // 1000),
+        'inventory': max(100, min(100_000, patients // 100)),
+        'users': 10,
+    })
+    # At least every item's opening balance
+    counts['stock_movements'] = max(counts['stock_movements'], counts['inventory'])
+    return counts
+
+
+class _Seeder:
+    def __init__(self, db, patients, seed, batch_size, progress):
+        self.db = db
+        self.conn = db.conn
+        self.rng = random.Random(seed)
+        self.counts = seed_counts(patients)
+        self.batch_size = batch_size
+        self.progress = progress
+        self.today = datetime.date.today()
+        # days[n] is the date n days ago
+        self.days = [(self.today - datetime.timedelta(days=n)).isoformat()
+                     for n in range(HISTORY_DAYS + 1)]
+        self.format = db.ids.format
+
+    def id(self, kind, number):
+        return self.format(kind, number)
+
+    def name(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def phone(self):
+        return f"555-{self.rng.randrange(10_000_000):07d}"
+
+    def patient_id(self):
+        return self.id('patient', self.rng.randrange(self.counts['patients']) + 1)
+
+    def doctor_id(self):
+        return self.id('doctor', self.rng.randrange(self.counts['doctors']) + 1)
+
+    def past_day(self, within=HISTORY_DAYS):
+        return self.days[self.rng.randrange(within + 1)]
+
+    def time(self):
+        return f"{self.rng.randrange(8, 20):02d}:{self.rng.randrange(0, 60, 5):02d}"
+
+    def insert(self, table, columns, rows, also=None):
+        """Insert generated rows in batches with the table's counter and
+        stock ledger triggers suspended; counters are rebuilt and item
+        quantities set once at the end. also(conn)
+        runs in each batch's transaction after the rows are inserted."""
+        total = self.counts[table]
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        triggers = [f"{table}_counters_ai"] if table in {t for t, *_ in COUNTERS} else []
+        if table == 'stock_movements':
+            # Item quantities are set once every movement is in
+            triggers += STOCK_MOVEMENT_TRIGGERS
+        done = 0
+        while done < total:
+            batch = [next(rows) for _ in range(min(self.batch_size, total - done))]
+            with self.db.transaction() as conn:
+                saved = suspend_triggers(conn, triggers)
+                conn.executemany(sql, batch)
+                if also:
+                    also(conn)
+                restore_triggers(conn, saved)
+            done += len(batch)
+            self.report(table, done)
+
+    def report(self, table, done):
+        if self.progress:
+            self.progress(table, done, self.counts[table])
+
+    def patients(self):
+        rng, total = self.rng, self.counts['patients']
+        for start in range(0, total, self.batch_size):
+            batch = []
+            for n in range(start + 1, min(start + self.batch_size, total) + 1):
+                name = self.name()
+                registered = rng.randrange(HISTORY_DAYS + 1)
+                batch.append(Patient(
+                    patient_id=self.id('patient', n),
+                    name=name,
+                    age=rng.randrange(0, 95),
+                    gender=rng.choice(("Male", "Female")),
+                    address=f"{rng.randrange(1, 999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+                    phone=self.phone(),
+                    email=f"{name.lower().replace(' ', '.')}{n}@example.com",
+                    blood_group=rng.choice(BLOOD_GROUPS),
+                    emergency_contact=self.phone(),
+                    registration_date=self.days[registered],
+                    last_visit=self.days[rng.randrange(registered + 1)],
+                    medical_history=rng.choice(CONDITIONS),
+                    allergies=rng.choice(ALLERGIES),
+                    insurance_info=rng.choice(INSURERS),
+                    status='Active' if rng.random() < 0.9 else 'Inactive',
+                ))
+            self.db.add_patients(batch)
+            self.report('patients', start + len(batch))
+
+    def doctors(self):
+        rng = self.rng
+        departments = list(DEPARTMENTS)
+        for n in range(1, self.counts['doctors'] + 1):
+            department = rng.choice(departments)
+            name = self.name()
+            yield (self.id('doctor', n), f"Dr. {name}", rng.choice(DEPARTMENTS[department]),
+                   rng.choice(QUALIFICATIONS), rng.randrange(1, 35), self.phone(),
+                   f"{name.lower().replace(' ', '.')}{n}@hospital.example",
+                   "Mon-Fri 09:00-18:00", department, float(rng.randrange(30, 200, 10)),
+                   'Available' if rng.random() < 0.9 else rng.choice(("On Leave", "Not Available")),
+                   round(rng.uniform(3.0, 5.0), 1))
+
+    def appointments(self):
+        """Doctor n % doctors takes its (n // doctors)-th slot, so no two
+        booked appointments share a doctor, day and time"""
+        rng, doctors = self.rng, self.counts['doctors']
+        times = slot_times()
+        per_doctor = -(-self.counts['appointments'] // doctors)
+        spread = -(-per_doctor // len(times))
+        # About a fifth of the appointments lie ahead of today
+        first = self.today - datetime.timedelta(days=spread * 4 // 5)
+        for n in range(self.counts['appointments']):
+            slot = n // doctors
+            day = first + datetime.timedelta(days=slot // len(times))
+            if day > self.today:
+                status = 'Scheduled' if rng.random() < 0.95 else 'Cancelled'
+            else:
+                status = rng.choices(('Completed', 'Cancelled', 'Scheduled'), (85, 10, 5))[0]
+            day = day.isoformat()
+            yield (self.id('appointment', n + 1), self.patient_id(), self.id('doctor', n % doctors + 1),
+                   day, times[slot % len(times)], rng.choice(REASONS), status, '',
+                   f"{min(day, self.days[0])} 08:00:00")
+
+    def billing(self):
+        """Bills; their line items are queued for add_bill_items"""
+        rng = self.rng
+        for n in range(1, self.counts['billing'] + 1):
+            bill_id = self.id('bill', n)
+            items = [(bill_id, service, '', qty, price, qty * price)
+                     for service, price in rng.sample(SERVICES, rng.randrange(1, 5))
+                     for qty in (float(rng.randrange(1, 4)),)]
+            self.bill_items.extend(items)
+            total = sum(item[-1] for item in items)
+            paid = rng.choices((total, round(total * rng.random(), 2), 0.0), (70, 15, 15))[0]
+            yield (bill_id, self.patient_id(), self.name(), self.past_day(2 * 365), self.time(),
+                   total, paid, total - paid, rng.choice(PAYMENT_METHODS), 0.0,
+                   bill_status(total, paid))
+
+    def add_bill_items(self, conn):
+        conn.executemany("""
+            INSERT INTO bill_items (bill_id, name, description, qty, unit_price, line_total)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, self.bill_items)
+        self.bill_items.clear()
+
+    def prescriptions(self):
+        rng = self.rng
+        for n in range(1, self.counts['prescriptions'] + 1):
+            medicines = rng.sample(MEDICINES, rng.randrange(1, 4))
+            yield (self.id('prescription', n), self.patient_id(), self.doctor_id(),
+                   self.past_day(), rng.choice(DIAGNOSES),
+                   ", ".join(m for m, _ in medicines), "; ".join(d for _, d in medicines),
+                   f"{rng.choice((3, 5, 7, 10, 14, 30))} days", '')
+
+    def lab_tests(self):
+        rng = self.rng
+        for n in range(1, self.counts['lab_tests'] + 1):
+            test_name, sample = rng.choice(LAB_TESTS)
+            day = self.past_day()
+            done = day < self.days[3] or rng.random() < 0.5
+            yield (self.id('lab_test', n), self.patient_id(), self.doctor_id(), test_name,
+                   day, self.time(), sample, "Within normal limits" if done else '',
+                   'Completed' if done else 'Pending', self.name() if done else '', '')
+
+    def rooms(self):
+        """Rooms with some beds taken; self.occupied lists one room_id per
+        taken bed, for the open admissions"""
+        rng = self.rng
+        self.room_ids, self.occupied = [], []
+        for n in range(1, self.counts['rooms'] + 1):
+            room_type, beds, price = rng.choice(ROOM_TYPES)
+            floor = 1 + (n - 1) // 50
+            room_id = f"R{floor}{(n - 1) % 50 + 1:02d}"
+            status = 'Maintenance' if rng.random() < 0.03 else 'Available'
+            taken = rng.randrange(beds + 1) if status == 'Available' else 0
+            self.room_ids.append(room_id)
+            self.occupied.extend([room_id] * taken)
+            yield (room_id, room_type, floor, beds, beds - taken, price,
+                   "Oxygen, Call bell" if room_type == "ICU" else "Call bell",
+                   'Occupied' if status == 'Available' and taken == beds else status)
+
+    def admissions(self):
+        rng = self.rng
+        total = self.counts['admissions']
+        # The last admissions are the ones still open
+        open_from = total - min(len(self.occupied), total)
+        for n in range(total):
+            if n >= open_from:
+                room_id = self.occupied[n - open_from]
+                admitted = self.past_day(14)
+                discharged, status = None, 'Admitted'
+            else:
+                room_id = rng.choice(self.room_ids)
+                stay = rng.randrange(1, 15)
+                back = rng.randrange(stay, HISTORY_DAYS + 1)
+                admitted, discharged, status = self.days[back], self.days[back - stay], 'Discharged'
+            cost = float(rng.randrange(500, 20000, 50))
+            yield (self.id('admission', n + 1), self.patient_id(), room_id, admitted, discharged,
+                   rng.choice(DIAGNOSES), self.doctor_id(), status, cost,
+                   cost if status == 'Discharged' else 0.0)
+
+    def operations(self):
+        rng = self.rng
+        for n in range(1, self.counts['operations'] + 1):
+            day = self.past_day()
+            yield (self.id('operation', n), self.patient_id(), self.doctor_id(),
+                   rng.choice(OPERATIONS), day, self.time(), f"OT-{rng.randrange(1, 6)}",
+                   f"{rng.randrange(1, 6)} hours", f"Dr. {self.name()}",
+                   'Completed' if day < self.days[0] else 'Scheduled', '')
+
+    def staff(self):
+        rng = self.rng
+        departments = list(DEPARTMENTS)
+        for n in range(1, self.counts['staff'] + 1):
+            name = self.name()
+            yield (self.id('staff', n), name, rng.choice(STAFF_ROLES), rng.choice(departments),
+                   self.phone(), f"{name.lower().replace(' ', '.')}{n}@hospital.example",
+                   float(rng.randrange(25000, 90000, 500)), self.past_day(), rng.choice(SHIFTS),
+                   'Active' if rng.random() < 0.95 else 'Inactive')
+
+    def inventory(self):
+        """Items with their opening stock; self.stock and self.reorder_levels
+        track them for stock_movements"""
+        rng = self.rng
+        for n in range(1, self.counts['inventory'] + 1):
+            item_id = self.id('item', n)
+            category, unit = rng.choice(INVENTORY)
+            expiry = self.today + datetime.timedelta(days=rng.randrange(-30, 3 * 365))
+            self.stock[item_id] = rng.randrange(0, 500)
+            self.reorder_levels[item_id] = rng.choice((10, 20, 50))
+            yield (item_id, f"{category} item {n}", category, self.stock[item_id],
+                   unit, round(rng.uniform(1, 500), 2), rng.choice(SUPPLIERS),
+                   expiry.isoformat(), self.reorder_levels[item_id],
+                   f"Store {rng.randrange(1, 4)}, Shelf {rng.randrange(1, 40)}")
+
+    def stock_movements(self):
+        """Every item's opening balance, then issues in date order, with
+        a receipt whenever an item is at its reorder level; self.stock
+        follows them"""
+        rng = self.rng
+        items = list(self.stock)
+        for item_id in items:
+            yield (item_id, self.stock[item_id], 'Opening balance', '',
+                   f"{self.days[HISTORY_DAYS]} 08:00:00", '')
+        rest = self.counts['stock_movements'] - len(items)
+        for n in range(rest):
+            item_id = rng.choice(items)
+            moved_at = f"{self.days[HISTORY_DAYS - 1 - n * HISTORY_DAYS // rest]} {self.time()}:00"
+            stock = self.stock[item_id]
+            if stock <= self.reorder_levels[item_id]:
+                quantity, reason, reference = rng.randrange(50, 500), 'Received', f"PO-{n + 1}"
+            else:
+                quantity, reason = -rng.randrange(1, min(stock, 50) + 1), 'Issued'
+                reference = rng.choice(list(DEPARTMENTS))
+            self.stock[item_id] = stock + quantity
+            yield (item_id, quantity, reason, reference, moved_at, rng.choice(STAFF_ROLES))
+
+    def users(self):
+        for n in range(1, self.counts['users'] + 1):
+            role = USER_ROLES[n % len(USER_ROLES)]
+            # Random passwords: these accounts only add rows
+            password = f"{self.rng.getrandbits(64):016x}"
+            self.db.add_user(f"{role}{n}", password, role, self.name())
+        self.report('users', self.counts['users'])
+
+    def run(self):
+        self.patients()
+        self.insert('doctors', ("doctor_id", "name", "specialization", "qualification",
+                                "experience", "phone", "email", "schedule", "department",
+                                "consultation_fee", "availability", "rating"), self.doctors())
+        self.insert('appointments', ("appointment_id", "patient_id", "doctor_id",
+                                     "appointment_date", "appointment_time", "reason",
+                                     "status", "notes", "created_date"), self.appointments())
+        self.bill_items = []
+        self.insert('billing', ("bill_id", "patient_id", "patient_name", "bill_date", "bill_time",
+                                "total_amount", "paid_amount", "due_amount", "payment_method",
+                                "insurance_covered", "status"), self.billing(), self.add_bill_items)
+        self.insert('prescriptions', ("prescription_id", "patient_id", "doctor_id",
+                                      "prescription_date", "diagnosis", "medicines", "dosage",
+                                      "duration", "notes"), self.prescriptions())
+        self.insert('lab_tests', ("test_id", "patient_id", "doctor_id", "test_name", "test_date",
+                                  "test_time", "sample_type", "results", "status", "technician",
+                                  "report_path"), self.lab_tests())
+        self.insert('rooms', ("room_id", "room_type", "floor", "bed_count", "available_beds",
+                              "price_per_day", "facilities", "status"), self.rooms())
+        self.insert('admissions', ("admission_id", "patient_id", "room_id", "admission_date",
+                                   "discharge_date", "reason", "attending_doctor", "status",
+                                   "estimated_cost", "paid_amount"), self.admissions())
+        self.insert('operations', ("operation_id", "patient_id", "doctor_id", "operation_name",
+                                   "operation_date", "operation_time", "theater", "duration",
+                                   "anesthesiologist", "status", "notes"), self.operations())
+        self.insert('staff', ("staff_id", "name", "role", "department", "phone", "email",
+                              "salary", "hire_date", "shift", "status"), self.staff())
+        self.stock, self.reorder_levels = {}, {}
+        self.insert('inventory', ("item_id", "name", "category", "quantity", "unit", "price",
+                                  "supplier", "expiry_date", "reorder_level", "location"),
+                    self.inventory())
+        self.insert('stock_movements', ("item_id", "quantity", "reason", "reference",
+                                        "moved_at", "recorded_by"), self.stock_movements())
+        self.users()
+
+        with self.db.transaction() as conn:
+            rebuild_counters(conn)
+            conn.executemany("UPDATE inventory SET quantity = ? WHERE item_id = ?",
+                             [(quantity, item_id) for item_id, quantity in self.stock.items()])
+            # Sequences restart after the highest seeded ID of each kind
+            conn.executemany("DELETE FROM id_sequences WHERE name = ?",
+                             [(kind,) for kind in ID_COLUMNS])
+        self.db.ids.reset()
+        self.db.roll_up_billing()
+        self.conn.execute("ANALYZE")
+
+
+def seed_database(db, patients=SCALES['10k'], seed=0, batch_size=BATCH_SIZE, progress=None):
+    """Fill an empty database with synthetic data for patients patients
+
+    progress(table, rows_done, rows_total) is called after every batch.
+    Raises ValueError if the database already holds patients or
+    appointments. Returns {table: rows} plus the elapsed seconds.
+    """
+    if patients < 1:
+        raise ValueError("Number of patients must be positive")
+    for table in ('patients', 'appointments'):
+        if db.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+            raise ValueError(f"Seed into an empty database ({table} already has rows)")
+    started = time.perf_counter()
+    seeder = _Seeder(db, patients, seed, batch_size, progress)
+    seeder.run()
+    return {**seeder.counts, 'seconds': time.perf_counter() - started}
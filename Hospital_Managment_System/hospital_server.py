@@ -0,0 +1,405 @@
+"""JSON API server that lets several workstations share one database.
+
+Run it on the machine that holds the database file:
+
+    python hospital_admin.py [--db hospital.db] serve [--host HOST] [--port N] [--readers N]
+
+and start each Tk client with `python hospital_mini.py --server
+http://HOST:PORT`, or set server_url in its hospital_profile.json.
+
+Every endpoint in ENDPOINTS runs the HospitalService method of the same
+name. GET endpoints take their arguments as query parameters holding
+JSON values; a value that is not valid JSON is taken as a plain string,
+so ?term=smith works from a browser. POST endpoints take a JSON object
+of keyword arguments. Records such as a patient or a bill are JSON
+objects of their dataclass fields. Responses are {"result": ...}, or
+{"error": message, "type": exception name} with a 4xx or 5xx status.
+
+Writes from all clients go through one hospital_writer.GroupCommitWriter,
+so clients never wait on SQLite's write lock and concurrent saves share
+commits; a write is answered once it has committed. Reads run on a pool
+of query-only connections that see the last committed data. The server has no
+authentication of its own and listens on localhost by default: only
+expose it to a trusted network. For the same reason it does not add
+users or change passwords; run hospital_admin add-user and
+change-password on the server machine.
+"""
+import asyncio
+import dataclasses
+import datetime
+import http
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from hospital_service import (HospitalService, DB_PATH, load_profile, Patient, Doctor,
+                              Appointment, Bill, BillItem, Room, Admission, InventoryItem,
+                              StockMovement)
+from hospital_writer import GroupCommitWriter
+
+HOST = '127.0.0.1'
+
+PORT = 8765
+
+READERS = 4
+
+# Largest request body accepted, in bytes
+MAX_BODY = 16 * 1024 * 1024
+
+# Endpoint kinds: READ runs on the reader pool, WRITE on the group-commit
+# writer and SERVER is answered by the server itself
+READ, WRITE, SERVER = 'read', 'write', 'server'
+
+# HospitalService method -> (HTTP method, path, kind)
+ENDPOINTS = {
+    # Patients
+    'patients_page': ('GET', '/api/patients', READ),
+    'search_patients': ('GET', '/api/patients/search', READ),
+    'patient_suggestions': ('GET', '/api/patients/suggestions', READ),
+    'get_patient': ('GET', '/api/patients/get', READ),
+    'patient_statistics': ('GET', '/api/patients/statistics', READ),
+    'recent_patients': ('GET', '/api/patients/recent', READ),
+    'add_patient': ('POST', '/api/patients', WRITE),
+    'add_patients': ('POST', '/api/patients/batch', WRITE),
+    'delete_patient': ('POST', '/api/patients/delete', WRITE),
+    # Doctors
+    'doctors_page': ('GET', '/api/doctors', READ),
+    'doctor_suggestions': ('GET', '/api/doctors/suggestions', READ),
+    'get_doctor': ('GET', '/api/doctors/get', READ),
+    'add_doctor': ('POST', '/api/doctors', WRITE),
+    # Appointments
+    'appointments_page': ('GET', '/api/appointments', READ),
+    'free_slots': ('GET', '/api/appointments/free-slots', READ),
+    'next_free_slot': ('GET', '/api/appointments/next-free-slot', READ),
+    'add_appointment': ('POST', '/api/appointments', WRITE),
+    # Billing
+    'bills_page': ('GET', '/api/bills', READ),
+    'bill_items': ('GET', '/api/bills/items', READ),
+    'item_revenue': ('GET', '/api/bills/item-revenue', READ),
+    'add_bill': ('POST', '/api/bills', WRITE),
+    # Rooms and admissions
+    'list_rooms': ('GET', '/api/rooms', READ),
+    'add_room': ('POST', '/api/rooms', WRITE),
+    'admit_patient': ('POST', '/api/admissions', WRITE),
+    'discharge_patient': ('POST', '/api/admissions/discharge', WRITE),
+    # Inventory
+    'inventory_page': ('GET', '/api/inventory', READ),
+    'item_suggestions': ('GET', '/api/inventory/suggestions', READ),
+    'get_item': ('GET', '/api/inventory/get', READ),
+    'item_movements': ('GET', '/api/inventory/movements', READ),
+    'reorder_alerts': ('GET', '/api/inventory/reorder-alerts', READ),
+    'expiring_items': ('GET', '/api/inventory/expiring', READ),
+    'inventory_summary': ('GET', '/api/inventory/summary', READ),
+    'add_item': ('POST', '/api/inventory', WRITE),
+    'record_movement': ('POST', '/api/inventory/movements', WRITE),
+    # Reports
+    'dashboard_stats': ('GET', '/api/reports/dashboard', READ),
+    'financial_summary': ('GET', '/api/reports/financial-summary', READ),
+    'financial_report': ('GET', '/api/reports/financial', READ),
+    'counter': ('GET', '/api/reports/counter', READ),
+    # Exports, read a page at a time by RemoteService.export_cursor
+    'export_count': ('GET', '/api/export/count', READ),
+    'export_page': ('GET', '/api/export', READ),
+    # Users; authenticate stamps last_login. Adding users and changing
+    # passwords is left to hospital_admin, as requests are not authenticated
+    'authenticate': ('POST', '/api/users/authenticate', WRITE),
+    # Administration
+    'next_id': ('POST', '/api/ids', WRITE),
+    'pragma_settings': ('GET', '/api/pragmas', READ),
+    'cache_stats': ('GET', '/api/cache', READ),
+    'rebuild_counters': ('POST', '/api/counters/rebuild', WRITE),
+    'data_stamp': ('GET', '/api/stamp', SERVER),
+    'profile': ('GET', '/api/profile', SERVER),
+}
+
+# Writes run on the writer between group-commit batches: they reserve ID
+# blocks on the allocator's own connection, which would wait on the
+# batch's write lock, or are already batches of their own
+UNBATCHED = {'next_id', 'add_patients', 'rebuild_counters', 'maintain'}
+
+# Arguments that carry records, by parameter name
+RECORDS = {
+    'patient': Patient,
+    'patients': Patient,
+    'doctor': Doctor,
+    'appointment': Appointment,
+    'bill': Bill,
+    'room': Room,
+    'admission': Admission,
+    'item': InventoryItem,
+    'movement': StockMovement,
+}
+
+# Exceptions re-raised as themselves by hospital_client, by type name
+ERRORS = {
+    'ValueError': ValueError,
+    'TypeError': TypeError,
+    'KeyError': KeyError,
+    'IntegrityError': sqlite3.IntegrityError,
+    'OperationalError': sqlite3.OperationalError,
+}
+
+
+class ServerError(Exception):
+    """An error the server reported that has no local exception type"""
+
+
+def encode(value):
+    """json.dumps default for records and dates"""
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def tuples(value):
+    """value with JSON arrays below the top level turned back into tuples,
+    as sqlite3 returns rows and the service compares keys"""
+    if isinstance(value, list):
+        return [_tuple(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _tuple(item) for key, item in value.items()}
+    return value
+
+
+def _tuple(value):
+    if isinstance(value, list):
+        return tuple(_tuple(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _tuple(item) for key, item in value.items()}
+    return value
+
+
+def record(cls, data):
+    """cls built from a JSON object of its fields"""
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object for {cls.__name__}")
+    if cls is Bill:
+        data = dict(data, items=[BillItem(**item) if isinstance(item, dict) else item
+                                 for item in data.get('items') or []])
+    return cls(**data)
+
+
+def decode_arguments(arguments):
+    """Keyword arguments for a service method from decoded JSON"""
+    decoded = {}
+    for name, value in arguments.items():
+        cls = RECORDS.get(name)
+        if cls is None:
+            decoded[name] = _tuple(value)
+        elif isinstance(value, list):
+            decoded[name] = [record(cls, item) for item in value]
+        else:
+            decoded[name] = record(cls, value)
+    return decoded
+
+
+def query_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def error_status(error):
+    if isinstance(error, sqlite3.IntegrityError):
+        return 409
+    if isinstance(error, (ValueError, TypeError, KeyError)):
+        return 400
+    return 500
+
+
+class HospitalServer:
+    """Serves ENDPOINTS over HTTP/1.1 with one writer and a reader pool"""
+
+    def __init__(self, db_path=DB_PATH, readers=READERS, profile=None):
+        # Connections open lazily, possibly after the working directory changed
+        self.db_path = os.path.abspath(db_path)
+        self.profile = profile if profile is not None else load_profile()
+        self.writer = None
+        self.readers = ThreadPoolExecutor(readers, thread_name_prefix='db-reader')
+        self.routes = {(method, path): (name, kind)
+                       for name, (method, path, kind) in ENDPOINTS.items()}
+        self.paths = {path for _, path in self.routes}
+        self._local = threading.local()
+        self._services = []
+        self._lock = threading.Lock()
+        # Changes with every write; all writes go through this server
+        self.generation = 0
+        self.started = time.time()
+        self._stop = None
+        self._connections = {}
+
+    def _reader(self):
+        """This reader thread's HospitalService, opened on first use"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = HospitalService(self.db_path, initialize=False, profile=self.profile)
+            db.conn.execute("PRAGMA query_only = ON")
+            with self._lock:
+                self._services.append(db)
+            self._local.db = db
+        return db
+
+    def _read(self, name, arguments):
+        db = self._reader()
+        try:
+            return getattr(db, name)(**arguments)
+        except BaseException:
+            db.rollback()
+            raise
+
+    def _committed(self, batch):
+        self.generation += 1
+
+    def write(self, name, arguments):
+        """Future of the service method's result once it has committed"""
+        fn = lambda db: getattr(db, name)(**arguments)
+        if name in UNBATCHED:
+            future = self.writer.submit(fn, transactional=False)
+            # Not part of a batch, so on_commit does not see it
+            future.add_done_callback(lambda _: self._committed(None))
+            return future
+        return self.writer.submit(fn)
+
+    def data_stamp(self):
+        return (self.started, self.generation)
+
+    async def call(self, name, kind, arguments):
+        if kind == SERVER:
+            value = getattr(self, name)
+            return value(**arguments) if callable(value) else value
+        if kind == WRITE:
+            return await asyncio.wrap_future(self.write(name, arguments))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.readers, self._read, name, arguments)
+
+    async def dispatch(self, method, target, body):
+        """(status, payload) for one request"""
+        url = urllib.parse.urlsplit(target)
+        route = self.routes.get((method, url.path))
+        if route is None:
+            if url.path in self.paths:
+                return 405, {'error': f"{method} is not allowed on {url.path}", 'type': 'ValueError'}
+            return 404, {'error': f"No endpoint {url.path}", 'type': 'KeyError'}
+        name, kind = route
+        try:
+            if method == 'GET':
+                arguments = {key: query_value(value) for key, value in
+                             urllib.parse.parse_qsl(url.query, keep_blank_values=True)}
+            else:
+                arguments = json.loads(body or b'{}')
+                if not isinstance(arguments, dict):
+                    raise ValueError("The request body must be a JSON object")
+            result = await self.call(name, kind, decode_arguments(arguments))
+        except Exception as e:
+            status = error_status(e)
+            if status == 500:
+                traceback.print_exc(file=sys.stderr)
+            return status, {'error': str(e), 'type': type(e).__name__}
+        return 200, {'result': result}
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one keep-alive connection"""
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY:
+                    status, payload = 413, {'error': "Request body too large", 'type': 'ValueError'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.dispatch(method, target, body)
+                    keep_alive = (version == 'HTTP/1.1'
+                                  and headers.get('connection', '').lower() != 'close')
+
+                data = json.dumps(payload, default=encode).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+                    + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+    async def maintain(self):
+        """Database upkeep every maintenance_interval seconds, on the writer"""
+        interval = int(self.profile['maintenance_interval'])
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.wrap_future(self.write('maintain', {}))
+
+    async def serve(self, host=HOST, port=PORT, ready=None):
+        """Serve until stop(); ready(host, port) is called once listening"""
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._loop = loop
+        # The writer opens first so that it brings the schema up to date
+        self.writer = await loop.run_in_executor(
+            None, lambda: GroupCommitWriter(self.db_path, profile=self.profile,
+                                            on_commit=self._committed))
+        server = await asyncio.start_server(self.handle, host, port)
+        upkeep = asyncio.ensure_future(self.maintain())
+        try:
+            async with server:
+                if ready:
+                    ready(*server.sockets[0].getsockname()[:2])
+                await self._stop.wait()
+                # Idle keep-alive connections end at their next read
+                for connection in list(self._connections.values()):
+                    connection.close()
+                await asyncio.gather(*self._connections, return_exceptions=True)
+        finally:
+            upkeep.cancel()
+            self.close()
+
+    def stop(self):
+        """Stop serving; safe to call from any thread"""
+        if self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def close(self):
+        self.readers.shutdown()
+        if self.writer is not None:
+            self.writer.close()
+        with self._lock:
+            for db in self._services:
+                db.close()
+            self._services.clear()
+
+
+def serve_database(db_path=DB_PATH, host=HOST, port=PORT, readers=READERS, ready=None):
+    """Run a HospitalServer for db_path until interrupted"""
+    asyncio.run(HospitalServer(db_path, readers).serve(host, port, ready))
@@ -0,0 +1,1294 @@
+"""Data access layer for the Hospital Management System.
+
+Every SQL statement used by the application lives here so that the Tk
+front end, batch jobs, imports and load tests all share one implementation
+that runs without a Tk root or mainloop.
+"""
+import sqlite3
+import datetime
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from operator import attrgetter
+from dataclasses import dataclass, field, fields, astuple, replace
+from hospital_cache import LRUCache
+from hospital_ids import IdAllocator, ID_BLOCK_SIZE
+from hospital_profiler import ProfiledConnection, SLOW_QUERY_MS
+from hospital_schema import (migrate, rebuild_counters, PATIENT_INSERT_TRIGGERS,
+                             suspend_triggers, restore_triggers, index_new_patients,
+                             bill_item_values, roll_up_billing, ROLLUP_MEASURES, BOOKED,
+                             stock_drift)
+
+DB_PATH = 'hospital.db'
+
+PROFILE_PATH = 'hospital_profile.json'
+
+# Used for any setting the profile file leaves out. Negative cache_size
+# is in KiB; maintenance_interval is in seconds. id_formats maps an ID
+# kind to [prefix, width], see hospital_ids.ID_FORMATS. sql_profiler
+# turns the SQL profiler on at startup; statements slower than
+# slow_query_ms go to its slow-query log. When server_url is set the Tk
+# client works through that hospital_server instead of the local file.
+# Writes are group-committed in batches of up to group_commit_rows rows
+# collected for at most group_commit_ms, see hospital_writer.
+# entity_cache_size is how many patient and doctor records are cached.
+DEFAULT_PROFILE = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -65536,
+    'mmap_size': 268435456,
+    'temp_store': 'memory',
+    'busy_timeout': 5000,
+    'maintenance_interval': 300,
+    'id_block_size': ID_BLOCK_SIZE,
+    'id_formats': {},
+    'sql_profiler': False,
+    'slow_query_ms': SLOW_QUERY_MS,
+    'server_url': '',
+    'group_commit_ms': 5,
+    'group_commit_rows': 500,
+    'entity_cache_size': 1024,
+}
+
+CONNECTION_PRAGMAS = ('journal_mode', 'synchronous', 'cache_size',
+                      'mmap_size', 'temp_store', 'busy_timeout')
+
+# SQLite reports these PRAGMAs as numbers
+PRAGMA_NAMES = {
+    'synchronous': {0: 'off', 1: 'normal', 2: 'full', 3: 'extra'},
+    'temp_store': {0: 'default', 1: 'file', 2: 'memory'},
+}
+
+PATIENT_COLUMNS = "patient_id, name, age, gender, phone, blood_group, status, last_visit"
+
+SEARCH_LIMIT = 100
+
+SUGGESTION_LIMIT = 15
+
+PAGE_SIZE = 200
+
+# Appointment slot grid: every SLOT_MINUTES from the start of the first
+# slot until the end of the day, times as HH:MM
+SLOT_START = '09:00'
+SLOT_END = '18:00'
+SLOT_MINUTES = 30
+
+# How many days ahead next_free_slot looks before giving up
+SLOT_HORIZON_DAYS = 365
+
+# Days ahead that the expiring items list and report cover by default
+EXPIRY_WINDOW_DAYS = 30
+
+# Stock movement reasons offered by the inventory screen, with the sign
+# each gives the quantity entered; an adjustment keeps the sign typed
+MOVEMENT_REASONS = {
+    'Received': 1,
+    'Returned to stock': 1,
+    'Issued': -1,
+    'Expired / disposed': -1,
+    'Adjustment': 0,
+}
+
+# Tables that can be exported, with the columns the date range and
+# status filters apply to (None when the table has no such column)
+EXPORT_TABLES = {
+    'patients': ('registration_date', 'status'),
+    'doctors': (None, 'availability'),
+    'appointments': ('appointment_date', 'status'),
+    'staff': ('hire_date', 'status'),
+    'inventory': ('expiry_date', None),
+    'stock_movements': ('moved_at', None),
+    'billing': ('bill_date', 'status'),
+    'bill_items': (None, None),
+    'prescriptions': ('prescription_date', None),
+    'rooms': (None, 'status'),
+    'admissions': ('admission_date', 'status'),
+    'lab_tests': ('test_date', 'status'),
+    'operations': ('operation_date', 'status'),
+}
+
+
+def today():
+    return datetime.datetime.now().strftime("%Y-%m-%d")
+
+
+def now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def hash_password(password):
+    """Hash a plain-text password the way the users table stores it"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def bill_status(total_amount, paid_amount):
+    """Derive the billing status from the amounts"""
+    due_amount = total_amount - paid_amount
+    return 'Paid' if due_amount == 0 else 'Partial' if paid_amount > 0 else 'Pending'
+
+
+def _optional_int(value):
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def _optional_float(value, default=None):
+    if value is None or value == '':
+        return default
+    return float(value)
+
+
+def patient_match_expression(term):
+    """Translate a free-text search term into an FTS5 MATCH expression
+    
+    A term made only of digits and phone punctuation is a prefix of the
+    normalized phone column. Otherwise every word becomes a prefix query
+    on the patient ID, name or email. Returns None if nothing is
+    searchable.
+    """
+    digits = re.sub(r"[-()+./\s]", "", term)
+    if digits.isdigit():
+        return f'phone : "{digits}"*'
+    clauses = [f'{{patient_id name email}} : "{word}"*'
+               for word in re.findall(r"\w+", term)]
+    return " AND ".join(clauses) or None
+
+
+def slot_times():
+    """Start times of the bookable slots in a day"""
+    start = datetime.datetime.strptime(SLOT_START, "%H:%M")
+    end = datetime.datetime.strptime(SLOT_END, "%H:%M")
+    step = datetime.timedelta(minutes=SLOT_MINUTES)
+    times = []
+    while start < end:
+        times.append(start.strftime("%H:%M"))
+        start += step
+    return times
+
+
+def load_profile(path=PROFILE_PATH):
+    """PRAGMA performance profile from a JSON file over DEFAULT_PROFILE"""
+    profile = dict(DEFAULT_PROFILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            profile.update(json.load(f))
+    for name in CONNECTION_PRAGMAS:
+        if not re.fullmatch(r"-?\w+", str(profile[name])):
+            raise ValueError(f"Invalid value for {name} in {path}: {profile[name]!r}")
+    return profile
+
+
+@functools.lru_cache(maxsize=None)
+def service_method(name):
+    """fn(db, *args, **kwargs) calling db.<name>, for code that is handed
+    a query to run later on either a HospitalService or a RemoteService;
+    the same name always gives the same function"""
+    def call(db, *args, **kwargs):
+        return getattr(db, name)(*args, **kwargs)
+    call.__name__ = name
+    return call
+
+
+def connect(db_path=DB_PATH, profile=None):
+    """Open a connection in autocommit mode; transactions are explicit
+    
+    The connection reports to hospital_profiler.profiler while it is enabled.
+    """
+    if profile is None:
+        profile = load_profile()
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                           factory=ProfiledConnection)
+    for name in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {profile[name]}")
+    return conn
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def id_allocator(conn, profile):
+    """The IdAllocator shared by every connection of this process to the
+    database file behind conn"""
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    if not path:
+        return IdAllocator(block_size=profile['id_block_size'],
+                           formats=profile['id_formats'], conn=conn)
+    with _allocators_lock:
+        if path not in _allocators:
+            _allocators[path] = IdAllocator(lambda: connect(path, profile),
+                                            profile['id_block_size'], profile['id_formats'])
+        return _allocators[path]
+
+
+_entity_caches = {}
+_entity_caches_lock = threading.Lock()
+
+
+def entity_cache(conn, profile):
+    """The LRUCache of detail records shared by every connection of this
+    process to the database file behind conn
+    
+    Keys are (kind, id) such as ('patient', 'PAT0000042'). Entries are
+    dropped by this process's own writes to them; another process
+    writing to the same file directly is not seen, which is why several
+    workstations share a database through hospital_server.
+    """
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    if not path:
+        return LRUCache(profile['entity_cache_size'])
+    with _entity_caches_lock:
+        if path not in _entity_caches:
+            _entity_caches[path] = LRUCache(profile['entity_cache_size'])
+        return _entity_caches[path]
+
+
+# Typed inputs. Field order matches the column order of each table.
+
+@dataclass
+class Patient:
+    patient_id: str
+    name: str
+    age: int = None
+    gender: str = ''
+    address: str = ''
+    phone: str = ''
+    email: str = ''
+    blood_group: str = ''
+    emergency_contact: str = ''
+    registration_date: str = field(default_factory=today)
+    last_visit: str = field(default_factory=today)
+    medical_history: str = ''
+    allergies: str = ''
+    insurance_info: str = ''
+    status: str = 'Active'
+
+    def __post_init__(self):
+        self.age = _optional_int(self.age)
+        if not self.name or not self.phone:
+            raise ValueError("Name and Phone are required fields")
+
+
+@dataclass
+class Doctor:
+    doctor_id: str
+    name: str
+    specialization: str
+    qualification: str = ''
+    experience: int = None
+    phone: str = ''
+    email: str = ''
+    department: str = ''
+    consultation_fee: float = None
+    availability: str = 'Available'
+    schedule: str = ''
+    rating: float = 0.0
+
+    def __post_init__(self):
+        self.experience = _optional_int(self.experience)
+        self.consultation_fee = _optional_float(self.consultation_fee)
+        if not self.name or not self.specialization:
+            raise ValueError("Name and Specialization are required")
+
+
+@dataclass
+class Appointment:
+    appointment_id: str
+    patient_id: str
+    doctor_id: str
+    appointment_date: str
+    appointment_time: str
+    reason: str = ''
+    status: str = 'Scheduled'
+    notes: str = ''
+    created_date: str = field(default_factory=now)
+
+    def __post_init__(self):
+        self.appointment_date = str(self.appointment_date)
+        if not self.patient_id or not self.doctor_id:
+            raise ValueError("Please select both patient and doctor")
+
+
+@dataclass
+class BillItem:
+    name: str
+    description: str = ''
+    qty: float = 1.0
+    unit_price: float = 0.0
+
+    def __post_init__(self):
+        self.qty = float(self.qty)
+        self.unit_price = float(self.unit_price)
+
+    @classmethod
+    def from_display(cls, values):
+        """Item from a bill tree row (name, description, qty, "$price", "$total")"""
+        name, description, qty, unit_price, _ = bill_item_values(values)
+        return cls(name, description, qty if qty is not None else 1.0, unit_price or 0.0)
+
+    @property
+    def line_total(self):
+        return self.qty * self.unit_price
+
+
+@dataclass
+class Bill:
+    bill_id: str
+    patient_id: str
+    patient_name: str
+    items: list  # of BillItem; display rows are converted
+    total_amount: float
+    paid_amount: float = 0.0
+    payment_method: str = ''
+    insurance_covered: float = 0.0
+    bill_date: str = field(default_factory=today)
+    bill_time: str = field(default_factory=lambda: datetime.datetime.now().strftime("%H:%M:%S"))
+
+    def __post_init__(self):
+        self.total_amount = float(self.total_amount)
+        self.paid_amount = _optional_float(self.paid_amount, 0.0)
+        if not self.items:
+            raise ValueError("Please add at least one item to the bill")
+        self.items = [item if isinstance(item, BillItem) else BillItem.from_display(item)
+                      for item in self.items]
+
+    @property
+    def due_amount(self):
+        return self.total_amount - self.paid_amount
+
+    @property
+    def status(self):
+        return bill_status(self.total_amount, self.paid_amount)
+
+
+@dataclass
+class Room:
+    room_id: str
+    room_type: str
+    floor: int = None
+    bed_count: int = 1
+    available_beds: int = None
+    price_per_day: float = 0.0
+    facilities: str = ''
+    status: str = 'Available'
+
+    def __post_init__(self):
+        self.floor = _optional_int(self.floor)
+        self.bed_count = int(self.bed_count)
+        if self.available_beds is None:
+            self.available_beds = self.bed_count
+
+
+@dataclass
+class Admission:
+    admission_id: str
+    patient_id: str
+    room_id: str
+    reason: str = ''
+    attending_doctor: str = ''
+    admission_date: str = field(default_factory=today)
+    discharge_date: str = None
+    status: str = 'Admitted'
+    estimated_cost: float = 0.0
+    paid_amount: float = 0.0
+
+
+@dataclass
+class LabTest:
+    test_id: str
+    patient_id: str
+    doctor_id: str
+    test_name: str
+    sample_type: str = ''
+    test_date: str = field(default_factory=today)
+    test_time: str = field(default_factory=lambda: datetime.datetime.now().strftime("%H:%M"))
+    results: str = ''
+    status: str = 'Pending'
+    technician: str = ''
+    report_path: str = ''
+
+
+@dataclass
+class Operation:
+    operation_id: str
+    patient_id: str
+    doctor_id: str
+    operation_name: str
+    operation_date: str
+    operation_time: str
+    theater: str = ''
+    duration: str = ''
+    anesthesiologist: str = ''
+    status: str = 'Scheduled'
+    notes: str = ''
+
+
+@dataclass
+class InventoryItem:
+    item_id: str
+    name: str
+    category: str = ''
+    quantity: int = 0  # opening stock, recorded as the first movement
+    unit: str = ''
+    price: float = None
+    supplier: str = ''
+    expiry_date: str = ''
+    reorder_level: int = None
+    location: str = ''
+
+    def __post_init__(self):
+        self.quantity = _optional_int(self.quantity) or 0
+        self.price = _optional_float(self.price)
+        self.reorder_level = _optional_int(self.reorder_level)
+        self.expiry_date = str(self.expiry_date or '')
+        if not self.name:
+            raise ValueError("Item name is required")
+        if self.quantity < 0:
+            raise ValueError("Opening stock cannot be negative")
+
+
+@dataclass
+class StockMovement:
+    item_id: str
+    quantity: int  # signed: received stock is positive, issued negative
+    reason: str = ''
+    reference: str = ''
+    moved_at: str = field(default_factory=now)
+    recorded_by: str = ''
+
+    def __post_init__(self):
+        self.quantity = int(self.quantity)
+        if not self.item_id:
+            raise ValueError("Please select an item")
+        if self.quantity == 0:
+            raise ValueError("Quantity must not be zero")
+
+
+class HospitalService:
+    """Headless access to the hospital database"""
+
+    def __init__(self, db_path=DB_PATH, conn=None, initialize=True, profile=None):
+        self.db_path = db_path
+        self.profile = profile if profile is not None else load_profile()
+        self.conn = conn if conn is not None else connect(db_path, self.profile)
+        self._stats_cache = None
+        self._after_commit = []
+        self.ids = id_allocator(self.conn, self.profile)
+        self.entities = entity_cache(self.conn, self.profile)
+        if initialize:
+            self.init_schema()
+            self.ensure_admin_user()
+        self.has_patient_fts = self._table_exists("patients_fts")
+
+    def close(self):
+        self.conn.close()
+
+    def interrupt(self):
+        """Abort the statement running on this connection; safe from any thread"""
+        self.conn.interrupt()
+
+    def rollback(self):
+        """Roll back a transaction that a failed caller left open"""
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self._after_commit.clear()
+
+    def next_id(self, kind):
+        """A new unique ID such as PAT0000042; kind is a key of hospital_ids.ID_COLUMNS"""
+        return self.ids.next(kind)
+
+    @contextmanager
+    def transaction(self):
+        """Group the enclosed statements into one BEGIN IMMEDIATE ... COMMIT unit
+
+        Nested use joins the outer transaction instead of opening a new one.
+        """
+        if self.conn.in_transaction:
+            yield self.conn
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            self._after_commit.clear()
+            raise
+        else:
+            self.conn.execute("COMMIT")
+            self.committed()
+
+    def after_commit(self, fn):
+        """Call fn() once the open transaction commits, or now if none is open"""
+        if self.conn.in_transaction:
+            self._after_commit.append(fn)
+        else:
+            fn()
+
+    def committed(self):
+        """Run the after_commit callbacks; whoever issues COMMIT calls this"""
+        callbacks, self._after_commit = self._after_commit, []
+        for fn in callbacks:
+            fn()
+
+    def pragma_settings(self):
+        """Active values of the profile PRAGMAs as reported by SQLite"""
+        settings = {}
+        for name in CONNECTION_PRAGMAS:
+            value = self._scalar(f"PRAGMA {name}")
+            settings[name] = PRAGMA_NAMES.get(name, {}).get(value, value)
+        return settings
+    
+    def maintain(self):
+        """Periodic upkeep: fold new bills into the billing rollup, fold the
+        WAL back into the database and refresh planner statistics where
+        SQLite thinks they are stale"""
+        bills_rolled_up = self.roll_up_billing()
+        busy, wal_pages, checkpointed = self.conn.execute(
+            "PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        self.conn.execute("PRAGMA optimize")
+        return {'busy': busy, 'wal_pages': wal_pages, 'checkpointed': checkpointed,
+                'bills_rolled_up': bills_rolled_up}
+    
+    def _insert(self, table, record):
+        """Insert a typed record whose field names match the table columns"""
+        names = [f.name for f in fields(record)]
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            table, ", ".join(names), ", ".join("?" * len(names)))
+        return self.conn.execute(sql, astuple(record))
+
+    def _scalar(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchone()[0]
+    
+    def _page(self, table, columns, order_column, after=None, limit=PAGE_SIZE):
+        """Keyset pagination over table, newest first by (order_column, id)
+        
+        Returns (key, row) pairs; pass the last key back as after to get
+        the following page. Rows whose order_column is NULL come last.
+        """
+        select = f"SELECT id, {order_column}, {columns} FROM {table}"
+        order = f"ORDER BY {order_column} DESC, id DESC LIMIT ?"
+        if after is None:
+            rows = self.conn.execute(f"{select} {order}", (limit,)).fetchall()
+        elif after[0] is None:
+            rows = self.conn.execute(
+                f"{select} WHERE {order_column} IS NULL AND id < ? {order}",
+                (after[1], limit)).fetchall()
+        else:
+            rows = self.conn.execute(
+                f"{select} WHERE ({order_column}, id) < (?, ?) {order}",
+                (after[0], after[1], limit)).fetchall()
+            if len(rows) < limit:
+                # The row-value comparison never matches NULL keys
+                rows += self.conn.execute(
+                    f"{select} WHERE {order_column} IS NULL {order}",
+                    (limit - len(rows),)).fetchall()
+        return [((row[1], row[0]), row[2:]) for row in rows]
+    
+    def _table_exists(self, name):
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name=?", (name,)).fetchone() is not None
+
+    # Schema
+    def init_schema(self):
+        """Bring the schema up to date; a no-op when already current"""
+        migrate(self.conn)
+
+    def ensure_admin_user(self):
+        """Create default admin user if not exists"""
+        # Plain read first so a normal start never takes the write lock
+        if self.conn.execute("SELECT 1 FROM users WHERE username='admin'").fetchone():
+            return
+        with self.transaction() as conn:
+            if not conn.execute("SELECT 1 FROM users WHERE username='admin'").fetchone():
+                conn.execute(
+                    "INSERT INTO users (username, password, role, full_name, status) VALUES (?, ?, ?, ?, ?)",
+                    ('admin', hash_password("admin123"), 'admin', 'Administrator', 'active')
+                )
+
+    # Users
+    def authenticate(self, username, password):
+        """Return the active user matching the credentials and stamp last_login"""
+        user = self.conn.execute(
+            "SELECT username, role, full_name FROM users WHERE username=? AND password=? AND status='active'",
+            (username, hash_password(password))
+        ).fetchone()
+        if not user:
+            return None
+        with self.transaction() as conn:
+            conn.execute("UPDATE users SET last_login=? WHERE username=?", (now(), username))
+        return {'username': user[0], 'role': user[1], 'full_name': user[2]}
+
+    def add_user(self, username, password, role, full_name):
+        """Add a user; raises sqlite3.IntegrityError if the username exists"""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO users (username, password, role, full_name, status) VALUES (?, ?, ?, ?, ?)",
+                (username, hash_password(password), role, full_name, 'active')
+            )
+
+    def change_password(self, username, current_password, new_password):
+        """Replace a user's password; returns False if the current one is wrong"""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT password FROM users WHERE username=?", (username,)).fetchone()
+            if not row or row[0] != hash_password(current_password):
+                return False
+            conn.execute("UPDATE users SET password=? WHERE username=?",
+                         (hash_password(new_password), username))
+        return True
+
+    # Cached detail records
+    def _cached(self, kind, table, key_column, key):
+        """The row of table whose key_column is key, read through the
+        entity cache; None if there is none (misses are not cached)"""
+        row = self.entities.get((kind, key))
+        if row is None:
+            version = self.entities.version((kind, key))
+            row = self.conn.execute(
+                f"SELECT * FROM {table} WHERE {key_column}=?", (key,)).fetchone()
+            if row is not None:
+                self.entities.put((kind, key), row, version)
+        return row
+    
+    def _forget(self, kind, key):
+        """Drop a record written in the open transaction from the entity
+        cache, and again after the commit; a concurrent reader that read
+        the old row before then finds its version changed and does not
+        put it back"""
+        self.entities.discard((kind, key))
+        self.after_commit(lambda: self.entities.discard((kind, key)))
+    
+    def cache_stats(self):
+        """Size, capacity, hits and misses of the entity cache"""
+        return {'entries': len(self.entities), 'maxsize': self.entities.maxsize,
+                'hits': self.entities.hits, 'misses': self.entities.misses}
+
+    # Patients
+    def add_patient(self, patient):
+        with self.transaction():
+            self._insert("patients", patient)
+            self._forget('patient', patient.patient_id)
+
+    def get_patient(self, patient_id):
+        return self._cached('patient', 'patients', 'patient_id', patient_id)
+
+    def delete_patient(self, patient_id):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM patients WHERE patient_id=?", (patient_id,))
+            self._forget('patient', patient_id)
+
+    def patients_page(self, after=None, limit=PAGE_SIZE):
+        return self._page("patients", PATIENT_COLUMNS, "registration_date", after, limit)
+
+    def search_patients(self, term, limit=SEARCH_LIMIT):
+        """Best-ranked patients matching term by ID, name, email or phone prefix"""
+        return self._match_patients(term, PATIENT_COLUMNS, limit)
+    
+    def patient_suggestions(self, term, limit=SUGGESTION_LIMIT):
+        """(patient_id, name) of the first patients matching a typeahead
+        prefix; unranked, since ranking a short prefix scores every match"""
+        term = term.strip()
+        if not term:
+            return []
+        # A patient ID prefix such as PAT00 is a prefix of most of the
+        # table's ID tokens; a range of the unique index finds the first
+        # few without FTS building the whole doclist.
+        prefix = self.ids.formats['patient'][0]
+        if term.upper().startswith(prefix) and term[len(prefix):].isdigit():
+            start = term.upper()
+            return self.conn.execute("""
+                SELECT patient_id, name FROM patients
+                WHERE patient_id >= ? AND patient_id < ?
+                ORDER BY patient_id LIMIT ?
+            """, (start, start + '\uffff', limit)).fetchall()
+        return self._match_patients(term, "patient_id, name", limit, rank=False)
+    
+    def _match_patients(self, term, select, limit, rank=True):
+        if not self.has_patient_fts:
+            pattern = f"%{term}%"
+            return self.conn.execute(f"""
+                SELECT {select}
+                FROM patients
+                WHERE name LIKE ? OR patient_id LIKE ? OR phone LIKE ? OR email LIKE ?
+                LIMIT ?
+            """, (pattern, pattern, pattern, pattern, limit)).fetchall()
+        
+        expression = patient_match_expression(term)
+        if expression is None:
+            return self.conn.execute(f"""
+                SELECT {select}
+                FROM patients ORDER BY registration_date DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+        columns = ", ".join(f"p.{c}" for c in select.split(", "))
+        # Ranking a one-letter prefix means scoring a large share of the
+        # table, so those searches return the first matches unranked.
+        ranked = rank and all(len(word) > 1 for word in re.findall(r"\w+", term))
+        return self.conn.execute(f"""
+            SELECT {columns}
+            FROM patients_fts f JOIN patients p ON p.id = f.rowid
+            WHERE patients_fts MATCH ?
+            {"ORDER BY f.rank" if ranked else ""}
+            LIMIT ?
+        """, (expression, limit)).fetchall()
+
+    def patient_statistics(self):
+        return self.conn.execute("""
+            SELECT COUNT(*) as total_patients,
+                   AVG(age) as avg_age,
+                   SUM(CASE WHEN gender='Male' THEN 1 ELSE 0 END) as male_count,
+                   SUM(CASE WHEN gender='Female' THEN 1 ELSE 0 END) as female_count,
+                   SUM(CASE WHEN status='Active' THEN 1 ELSE 0 END) as active_count
+            FROM patients
+        """).fetchone()
+
+    def recent_patients(self, limit=10):
+        return self.conn.execute("""
+            SELECT patient_id, name, age, gender, registration_date
+            FROM patients
+            ORDER BY registration_date DESC
+            LIMIT ?
+        """, (limit,)).fetchall()
+
+    def add_patients(self, patients):
+        """Insert a batch of Patient records in one transaction
+        
+        Patients without a patient_id get one from the ID allocator. Rows
+        whose patient_id is already taken are skipped; returns the
+        positions in patients that were not inserted. The per-row search index and
+        counter triggers are replaced by one set-based update for the
+        whole batch inside the same transaction.
+        """
+        names = [f.name for f in fields(Patient)]
+        # Reserved before the batch transaction, which the allocator's own
+        # connection would otherwise wait on
+        new_ids = iter(self.ids.take('patient', sum(1 for p in patients if not p.patient_id)))
+        with self.transaction() as conn:
+            first_id = self._scalar("""
+                SELECT MAX(IFNULL(MAX(id), 0),
+                           IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'patients'), 0)) + 1
+                FROM patients
+            """)
+            values = attrgetter(*names)
+            rows = [(row_id, patient.patient_id or next(new_ids), *values(patient)[1:])
+                    for row_id, patient in enumerate(patients, first_id)]
+            
+            saved = suspend_triggers(conn, PATIENT_INSERT_TRIGGERS)
+            inserted = conn.executemany(
+                "INSERT OR IGNORE INTO patients (id, {}) VALUES (?, {})".format(
+                    ", ".join(names), ", ".join("?" * len(names))), rows).rowcount
+            index_new_patients(conn, first_id, inserted)
+            restore_triggers(conn, saved)
+            
+            if inserted == len(rows):
+                return []
+            present = {row[0] for row in conn.execute(
+                "SELECT id FROM patients WHERE id >= ?", (first_id,))}
+            return [i for i, row in enumerate(rows) if row[0] not in present]
+
+    # Doctors
+    def add_doctor(self, doctor):
+        with self.transaction():
+            self._insert("doctors", doctor)
+            self._forget('doctor', doctor.doctor_id)
+
+    def get_doctor(self, doctor_id):
+        return self._cached('doctor', 'doctors', 'doctor_id', doctor_id)
+
+    def doctors_page(self, after=None, limit=PAGE_SIZE):
+        return self._page(
+            "doctors",
+            "doctor_id, name, specialization, department, phone, consultation_fee, availability",
+            "id", after, limit)
+    
+    def doctor_suggestions(self, term, limit=SUGGESTION_LIMIT):
+        """(doctor_id, name, specialization) of available doctors with a
+        name word, ID or specialization starting with term
+        
+        Doctors are few enough that this scans the covering availability
+        index rather than needing a text index of its own.
+        """
+        prefix = term.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return self.conn.execute("""
+            SELECT doctor_id, name, specialization FROM doctors
+            WHERE availability = 'Available'
+              AND (name LIKE ?1 ESCAPE '\\' OR name LIKE '% ' || ?1 ESCAPE '\\'
+                   OR doctor_id LIKE ?1 ESCAPE '\\' OR specialization LIKE ?1 ESCAPE '\\')
+            ORDER BY name
+            LIMIT ?2
+        """, (prefix, limit)).fetchall()
+
+    # Appointments
+    def add_appointment(self, appointment):
+        """Book an appointment; raises ValueError if the time is not a slot
+        or the doctor's slot was taken, even by a concurrent client"""
+        if appointment.appointment_time not in slot_times():
+            raise ValueError(f"{appointment.appointment_time!r} is not a bookable time slot")
+        try:
+            with self.transaction():
+                self._insert("appointments", appointment)
+        except sqlite3.IntegrityError as e:
+            if "appointment_time" not in str(e):
+                raise
+            raise ValueError(f"Doctor {appointment.doctor_id} is already booked on "
+                             f"{appointment.appointment_date} at {appointment.appointment_time}")
+    
+    def free_slots(self, doctor_id, day):
+        """Open slot times for the doctor on day (YYYY-MM-DD); past times
+        are left out for today"""
+        booked = {row[0] for row in self.conn.execute(f"""
+            SELECT appointment_time FROM appointments
+            WHERE doctor_id = ? AND appointment_date = ? AND {BOOKED}
+        """, (doctor_id, day))}
+        earliest = datetime.datetime.now().strftime("%H:%M") if day == today() else ''
+        return [t for t in slot_times() if t not in booked and t >= earliest]
+    
+    def next_free_slot(self, specialization, after=None):
+        """Earliest (date, time, doctor_id, name) open with any available
+        doctor of the specialization, at or after the (date, time) after
+        (default now); None if every slot within SLOT_HORIZON_DAYS is taken
+        
+        Each doctor's bookings are read in slot order from the unique slot
+        index only until the first gap, so the cost depends on how full
+        the schedule is rather than on the size of the table.
+        """
+        if after is None:
+            after = tuple(datetime.datetime.now().strftime("%Y-%m-%d %H:%M").split())
+        start_day = datetime.date.fromisoformat(after[0])
+        times = slot_times()
+        
+        best = None
+        for doctor_id, name in self.conn.execute("""
+            SELECT doctor_id, name FROM doctors
+            WHERE specialization = ? AND availability = 'Available'
+        """, (specialization,)).fetchall():
+            booked = self.conn.execute(f"""
+                SELECT appointment_date, appointment_time FROM appointments
+                WHERE doctor_id = ? AND (appointment_date, appointment_time) >= (?, ?) AND {BOOKED}
+                ORDER BY appointment_date, appointment_time
+            """, (doctor_id, after[0], after[1]))
+            taken = next(booked, None)
+            slot = None
+            for offset in range(SLOT_HORIZON_DAYS):
+                day = (start_day + datetime.timedelta(days=offset)).isoformat()
+                if best is not None and day > best[0]:
+                    break
+                for t in times:
+                    if (day, t) < after:
+                        continue
+                    while taken is not None and taken < (day, t):
+                        taken = next(booked, None)
+                    if taken != (day, t):
+                        slot = (day, t)
+                        break
+                if slot or (best is not None and day >= best[0]):
+                    break
+            booked.close()
+            if slot and (best is None or slot < best[:2]):
+                best = (*slot, doctor_id, name)
+        return best
+    
+    
+    def appointments_page(self, after=None, limit=PAGE_SIZE):
+        return self._page(
+            "appointments",
+            "appointment_id, patient_id, doctor_id, appointment_date, appointment_time, reason, status",
+            "appointment_date", after, limit)
+
+    # Billing
+    def add_bill(self, bill):
+        """Insert the bill and its line items in one transaction
+        
+        Line items live in bill_items; billing.items is only kept for
+        bills written before that table existed.
+        """
+        with self.transaction() as conn:
+            conn.execute("""
+                INSERT INTO billing (bill_id, patient_id, patient_name, bill_date,
+                bill_time, total_amount, paid_amount, due_amount,
+                payment_method, insurance_covered, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (bill.bill_id, bill.patient_id, bill.patient_name, bill.bill_date,
+                  bill.bill_time, bill.total_amount,
+                  bill.paid_amount, bill.due_amount, bill.payment_method,
+                  bill.insurance_covered, bill.status))
+            conn.executemany("""
+                INSERT INTO bill_items (bill_id, name, description, qty, unit_price, line_total)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(bill.bill_id, item.name, item.description, item.qty, item.unit_price,
+                   item.line_total) for item in bill.items])
+            roll_up_billing(conn)
+    
+    def bill_items(self, bill_id):
+        return self.conn.execute("""
+            SELECT name, description, qty, unit_price, line_total
+            FROM bill_items WHERE bill_id = ? ORDER BY id
+        """, (bill_id,)).fetchall()
+    
+    def item_revenue(self, date_from=None, date_to=None, limit=None):
+        """(name, quantity, revenue, bills) per billed item, highest revenue
+        first, optionally limited to bills dated within the range"""
+        join, where, params = "", "", []
+        if date_from or date_to:
+            join = "JOIN billing b ON b.bill_id = i.bill_id"
+            where = "WHERE b.bill_date BETWEEN ? AND ?"
+            params = [date_from or '', date_to or '9999-12-31']
+        return self.conn.execute(f"""
+            SELECT i.name, SUM(i.qty), SUM(i.line_total), COUNT(DISTINCT i.bill_id)
+            FROM bill_items i {join} {where}
+            GROUP BY i.name
+            ORDER BY SUM(i.line_total) DESC
+            LIMIT ?
+        """, params + [limit if limit is not None else -1]).fetchall()
+    
+    def roll_up_billing(self):
+        """Fold bills not yet in billing_rollup; returns how many were folded"""
+        with self.transaction() as conn:
+            return roll_up_billing(conn)
+    
+    def financial_summary(self, date_from, date_to):
+        """(day, payment_method, status, bills, billed, collected, outstanding)
+        for bills dated within the range
+        
+        Reads the rollup plus only the bills past its watermark, in one
+        statement so both parts come from the same snapshot.
+        """
+        measures = ", ".join(f"IFNULL({m}, 0)" for m in ROLLUP_MEASURES)
+        return self.conn.execute(f"""
+            SELECT day, payment_method, status, SUM(bills), SUM(billed),
+                   SUM(collected), SUM(outstanding)
+            FROM (
+                SELECT day, payment_method, status, bills, billed, collected, outstanding
+                FROM billing_rollup WHERE day BETWEEN ? AND ?
+                UNION ALL
+                SELECT COALESCE(bill_date, ''), COALESCE(payment_method, ''),
+                       COALESCE(status, ''), {measures}
+                FROM billing
+                WHERE id > (SELECT last_id FROM rollup_watermarks WHERE name = 'billing')
+                  AND +bill_date BETWEEN ? AND ?  -- scan only the tail by id
+                GROUP BY 1, 2, 3
+            )
+            GROUP BY day, payment_method, status
+            HAVING SUM(bills) != 0
+            ORDER BY day, payment_method, status
+        """, (date_from, date_to, date_from, date_to)).fetchall()
+    
+    def financial_report(self, date_from, date_to):
+        """Totals, daily figures and breakdowns by payment method and by
+        status for bills dated within the range
+        
+        Every figure is a (bills, billed, collected, outstanding) tuple;
+        'rows' holds the underlying financial_summary rows.
+        """
+        rows = self.financial_summary(date_from, date_to)
+        
+        def total(keyed):
+            sums = {}
+            for key, figures in keyed:
+                current = sums.get(key, (0, 0.0, 0.0, 0.0))
+                sums[key] = tuple(a + b for a, b in zip(current, figures))
+            return sums
+        
+        return {
+            'date_from': date_from,
+            'date_to': date_to,
+            'totals': total(('all', row[3:]) for row in rows).get('all', (0, 0.0, 0.0, 0.0)),
+            'daily': total((row[0], row[3:]) for row in rows),
+            'by_payment_method': total((row[1] or 'Unspecified', row[3:]) for row in rows),
+            'by_status': total((row[2] or 'Unspecified', row[3:]) for row in rows),
+            'rows': rows,
+        }
+    
+    def bills_page(self, after=None, limit=PAGE_SIZE):
+        return self._page(
+            "billing",
+            "bill_id, patient_name, bill_date, total_amount, paid_amount, due_amount, payment_method, status",
+            "bill_date", after, limit)
+
+    # Rooms
+    def add_room(self, room):
+        with self.transaction():
+            self._insert("rooms", room)
+
+    def list_rooms(self):
+        return self.conn.execute(
+            "SELECT room_id, room_type, floor, bed_count, available_beds, price_per_day, status FROM rooms"
+        ).fetchall()
+
+    # Admissions
+    def admit_patient(self, admission):
+        """Record an admission and take a bed from its room atomically"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE rooms SET available_beds = available_beds - 1 "
+                "WHERE room_id=? AND available_beds > 0", (admission.room_id,))
+            if cursor.rowcount == 0:
+                raise ValueError(f"No bed available in room {admission.room_id}")
+            self._insert("admissions", admission)
+
+    def discharge_patient(self, admission_id, discharge_date=None):
+        """Close an admission and give its bed back to the room"""
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT room_id FROM admissions WHERE admission_id=? AND status='Admitted'",
+                (admission_id,)).fetchone()
+            if not row:
+                raise ValueError(f"No open admission {admission_id}")
+            conn.execute(
+                "UPDATE admissions SET status='Discharged', discharge_date=? WHERE admission_id=?",
+                (discharge_date or today(), admission_id))
+            conn.execute(
+                "UPDATE rooms SET available_beds = available_beds + 1 WHERE room_id=?", (row[0],))
+
+    # Lab tests
+    def add_lab_test(self, lab_test):
+        with self.transaction():
+            self._insert("lab_tests", lab_test)
+
+    def record_lab_result(self, test_id, results, technician=''):
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE lab_tests SET results=?, technician=?, status='Completed' WHERE test_id=?",
+                (results, technician, test_id))
+
+    # Operations
+    def add_operation(self, operation):
+        with self.transaction():
+            self._insert("operations", operation)
+
+    # Inventory
+    def add_item(self, item):
+        """Insert an item; its opening stock goes in as the first movement"""
+        with self.transaction():
+            self._insert("inventory", replace(item, quantity=0))
+            if item.quantity:
+                self.record_movement(StockMovement(item.item_id, item.quantity, 'Opening balance'))
+
+    def get_item(self, item_id):
+        return self.conn.execute(
+            "SELECT * FROM inventory WHERE item_id=?", (item_id,)).fetchone()
+
+    def record_movement(self, movement):
+        """Append a stock movement and return the item's new quantity
+        
+        Raises ValueError for an unknown item or a movement that would
+        take its stock below zero.
+        """
+        with self.transaction() as conn:
+            row = conn.execute("SELECT IFNULL(quantity, 0) FROM inventory WHERE item_id=?",
+                               (movement.item_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"No inventory item {movement.item_id}")
+            if row[0] + movement.quantity < 0:
+                raise ValueError(f"Only {row[0]} of {movement.item_id} in stock")
+            # The ledger triggers apply the movement to inventory.quantity
+            self._insert("stock_movements", movement)
+            return row[0] + movement.quantity
+
+    def inventory_page(self, after=None, limit=PAGE_SIZE):
+        return self._page(
+            "inventory",
+            "item_id, name, category, quantity, unit, reorder_level, expiry_date, location",
+            "id", after, limit)
+
+    def item_suggestions(self, term, limit=SUGGESTION_LIMIT):
+        """(item_id, name, quantity, unit) of items whose ID or name
+        starts with term, each read as a range of an index"""
+        term = term.strip()
+        if not term:
+            return []
+        prefix = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return self.conn.execute("""
+            SELECT * FROM (
+                SELECT item_id, name, quantity, unit FROM inventory
+                WHERE item_id >= ?2 AND item_id < ?2 || char(1114111)  -- IDs starting with ?2
+                ORDER BY item_id LIMIT ?3)
+            UNION
+            SELECT * FROM (
+                SELECT item_id, name, quantity, unit FROM inventory
+                WHERE name LIKE ?1 ESCAPE '\\'
+                ORDER BY name COLLATE NOCASE LIMIT ?3)
+            LIMIT ?3
+        """, (prefix, term.upper(), limit)).fetchall()
+
+    def item_movements(self, item_id, after=None, limit=PAGE_SIZE):
+        """(key, (moved_at, quantity, reason, reference, recorded_by))
+        pairs of an item's stock movements, newest first"""
+        where, params = "item_id = ?", [item_id]
+        if after is not None:
+            where, params = where + " AND id < ?", params + [after]
+        rows = self.conn.execute(f"""
+            SELECT id, moved_at, quantity, reason, reference, recorded_by
+            FROM stock_movements WHERE {where}
+            ORDER BY id DESC LIMIT ?
+        """, params + [limit]).fetchall()
+        return [(row[0], row[1:]) for row in rows]
+
+    def reorder_alerts(self, after=None, limit=PAGE_SIZE):
+        """(key, (item_id, name, quantity, reorder_level, unit, supplier))
+        pairs for items at or below their reorder level, by item ID
+        
+        Read from the partial reorder index, which holds only those
+        items, so the cost follows the number of alerts rather than
+        the number of items.
+        """
+        rows = self.conn.execute("""
+            SELECT item_id, name, quantity, reorder_level, unit, supplier
+            FROM inventory INDEXED BY idx_inventory_reorder  -- not the full item_id index
+            WHERE quantity <= reorder_level AND item_id > ?
+            ORDER BY item_id LIMIT ?
+        """, (after if after is not None else '', limit)).fetchall()
+        return [(row[0], row) for row in rows]
+
+    def expiring_items(self, days=EXPIRY_WINDOW_DAYS, after=None, limit=PAGE_SIZE,
+                       include_expired=False):
+        """(key, (item_id, name, quantity, unit, expiry_date, location))
+        pairs for items in stock that expire within days from today,
+        soonest first; with include_expired also those already expired
+        
+        A range read of the expiry index.
+        """
+        date_to = (datetime.date.today() + datetime.timedelta(days=days)).isoformat()
+        # Blank expiry dates sort first and are never included
+        date_from = '0000' if include_expired else today()
+        if after is None:
+            after = (date_from, 0)
+        rows = self.conn.execute("""
+            SELECT id, expiry_date, item_id, name, quantity, unit, expiry_date, location
+            FROM inventory
+            WHERE expiry_date BETWEEN ? AND ? AND (expiry_date, id) > (?, ?)
+              AND quantity > 0
+            ORDER BY expiry_date, id LIMIT ?
+        """, (date_from, date_to, after[0], after[1], limit)).fetchall()
+        return [((row[1], row[0]), row[2:]) for row in rows]
+
+    def inventory_summary(self, days=EXPIRY_WINDOW_DAYS):
+        """Item and unit counts, stock value, and how many items are at
+        or below their reorder level, expire within days or have expired"""
+        items, units, value = self.conn.execute(
+            "SELECT COUNT(*), IFNULL(SUM(quantity), 0), IFNULL(SUM(quantity * price), 0) "
+            "FROM inventory").fetchone()
+        date_to = (datetime.date.today() + datetime.timedelta(days=days)).isoformat()
+        return {
+            'items': items,
+            'units': units,
+            'stock_value': value,
+            'reorder': self._scalar(
+                "SELECT COUNT(*) FROM inventory WHERE quantity <= reorder_level"),
+            'expiring': self._scalar(
+                "SELECT COUNT(*) FROM inventory WHERE expiry_date BETWEEN ? AND ? "
+                "AND quantity > 0", (today(), date_to)),
+            'expired': self._scalar(
+                "SELECT COUNT(*) FROM inventory WHERE expiry_date > '' AND expiry_date < ? "
+                "AND quantity > 0", (today(),)),
+            'days': days,
+        }
+
+    def verify_stock(self):
+        """{item_id: (quantity, ledger total)} for items whose quantity
+        disagrees with their stock movements; empty when all agree"""
+        return stock_drift(self.conn)
+
+    # Exports
+    def _export_filter(self, table, date_from=None, date_to=None, status=None):
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Table {table!r} cannot be exported")
+        date_column, status_column = EXPORT_TABLES[table]
+        clauses, params = [], []
+        if (date_from or date_to) and date_column is None:
+            raise ValueError(f"Table {table!r} has no date to filter on")
+        if status and status_column is None:
+            raise ValueError(f"Table {table!r} has no status to filter on")
+        if date_from:
+            clauses.append(f"{date_column} >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append(f"{date_column} <= ?")
+            params.append(date_to)
+        if status:
+            clauses.append(f"{status_column} = ?")
+            params.append(status)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+    
+    def export_count(self, table, date_from=None, date_to=None, status=None):
+        where, params = self._export_filter(table, date_from, date_to, status)
+        return self._scalar(f"SELECT COUNT(*) FROM {table}{where}", params)
+    
+    def export_cursor(self, table, date_from=None, date_to=None, status=None):
+        """Cursor over the matching rows of table in id order; read it
+        with fetchmany so the result set is never held in memory"""
+        where, params = self._export_filter(table, date_from, date_to, status)
+        return self.conn.execute(f"SELECT * FROM {table}{where} ORDER BY id", params)
+    
+    def export_page(self, table, date_from=None, date_to=None, status=None, after=0,
+                    limit=5000):
+        """Column names and the next limit matching rows of table after
+        id after, in id order, for reading an export in pages"""
+        where, params = self._export_filter(table, date_from, date_to, status)
+        where = f"{where} AND id > ?" if where else " WHERE id > ?"
+        cursor = self.conn.execute(f"SELECT * FROM {table}{where} ORDER BY id LIMIT ?",
+                                   (*params, after, limit))
+        return [d[0] for d in cursor.description], cursor.fetchall()
+
+    # Statistics
+    def data_stamp(self):
+        """Value that changes whenever any connection commits a write
+        
+        PRAGMA data_version only moves for other connections' commits,
+        so this connection's own changes are folded in via total_changes.
+        """
+        return (self._scalar("PRAGMA data_version"), self.conn.total_changes)
+    
+    def dashboard_stats(self):
+        """All dashboard counts from one query, cached until the data changes"""
+        key = (self.data_stamp(), today())
+        if self._stats_cache is not None and self._stats_cache[0] == key:
+            return self._stats_cache[1]
+        
+        names = {
+            "patients": "patients",
+            "doctors": "doctors_available",
+            "today_appointments": f"appointments:{key[1]}",
+            "pending_bills": "bills:Pending",
+            "available_rooms": "available_beds",
+            "staff": "staff_active",
+        }
+        values = dict(self.conn.execute(
+            f"SELECT name, value FROM stats_counters WHERE name IN ({', '.join('?' * len(names))})",
+            tuple(names.values())).fetchall())
+        stats = {stat: values.get(name, 0) for stat, name in names.items()}
+        self._stats_cache = (key, stats)
+        return stats
+    
+    def counter(self, name):
+        """Current value of a trigger-maintained counter from stats_counters"""
+        row = self.conn.execute("SELECT value FROM stats_counters WHERE name=?", (name,)).fetchone()
+        return row[0] if row else 0
+    
+    def rebuild_counters(self, verify_only=False):
+        """Recompute stats_counters from live aggregates and report any drift"""
+        with self.transaction() as conn:
+            return rebuild_counters(conn, verify_only)
+    
+    def count_patients(self):
+        return self.counter("patients")
+    
+    def count_doctors(self):
+        return self.counter("doctors_available")
+    
+    def count_today_appointments(self):
+        return self.counter(f"appointments:{today()}")
+    
+    def count_pending_bills(self):
+        return self.counter("bills:Pending")
+    
+    def count_available_rooms(self):
+        return self.counter("available_beds")
+    
+    def count_staff(self):
+        return self.counter("staff_active")
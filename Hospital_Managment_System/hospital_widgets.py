@@ -0,0 +1,240 @@
+"""Reusable Tk widgets for the Hospital Management System"""
+import tkinter as tk
+from tkinter import ttk
+
+from hospital_cache import LRUCache
+
+
+class PagedTreeview(tk.Frame):
+    """Treeview that fetches rows a page at a time as the user scrolls
+    
+    fetch_page(db, after, limit) returns up to limit (key, values) pairs
+    that follow the key ``after`` (None for the first page); it runs on
+    the executor's worker threads. The next page is fetched once the
+    visible window passes the prefetch fraction of the rows loaded so far,
+    so only what the user actually scrolls to is ever queried or held in
+    the widget.
+    """
+    
+    def __init__(self, parent, columns, fetch_page, executor, page_size=200,
+                 prefetch=0.8, height=20):
+        super().__init__(parent, bg='white')
+        self.fetch_page = fetch_page
+        self.executor = executor
+        self.page_size = page_size
+        self.prefetch = prefetch
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', height=height)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=100)
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(fill='both', expand=True)
+
+        self.last_key = None
+        self.exhausted = False
+        self._job = None
+        self._query = None
+        self.bind("<Destroy>", self._on_destroy, add='+')
+
+    def _on_destroy(self, event):
+        if event.widget is self and self._job is not None:
+            self._job.cancel()
+            self._job = None
+    
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= self.prefetch:
+            # Defer so the fetch never runs inside Tk's scroll callback
+            self.after_idle(self.load_more)
+
+    def clear(self):
+        """Remove all rows and drop any page still being fetched"""
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
+        self.tree.delete(*self.tree.get_children())
+
+    def reset(self, fetch_page=None):
+        """Drop loaded rows and start again from the first page"""
+        if fetch_page is not None:
+            self.fetch_page = fetch_page
+        self._query = None
+        self.clear()
+        self.last_key = None
+        self.exhausted = False
+        self.load_more()
+
+    def load_more(self):
+        """Request the next page, if any, in the background"""
+        if self.exhausted or self._job is not None:
+            return
+        after, limit = self.last_key, self.page_size
+        self._job = self.executor.submit(
+            lambda db: self.fetch_page(db, after, limit),
+            on_done=self._append, on_error=self._failed, label="Loading rows")
+    
+    def _failed(self, error):
+        self._job = None
+        raise error
+    
+    def _append(self, page):
+        self._job = None
+        for key, values in page:
+            self.tree.insert("", tk.END, values=values)
+        if page:
+            self.last_key = page[-1][0]
+        if len(page) < self.page_size:
+            self.exhausted = True
+
+    def show_query(self, query, label="Loading rows"):
+        """Replace the contents with the fixed result set of query(db)
+        
+        Used for searches; a newer call or a reset supersedes a query
+        that is still running.
+        """
+        self.clear()
+        self.exhausted = True
+        self._query = (query, label)
+        self._job = self.executor.submit(query, on_done=self._show,
+                                         on_error=self._failed, label=label)
+    
+    def refresh(self):
+        """Reload whatever is shown: the query result, or the first page"""
+        if self._query is not None:
+            self.show_query(*self._query)
+        else:
+            self.reset()
+    
+    def _show(self, rows):
+        self._job = None
+        for values in rows:
+            self.tree.insert("", tk.END, values=values)
+
+
+class TypeaheadPicker(tk.Frame):
+    """Entry that lists matching records from the database as the user types
+    
+    search(db, term, limit) returns up to limit rows and runs on the
+    executor's worker threads, debounce_ms after the last keystroke.
+    label(row) is the text shown for a row and put into the entry (and
+    textvariable) when it is picked; on_select(row) is then called.
+    Results are kept in an LRU cache per search function, shared by
+    every picker using it and dropped whenever stamp() changes, so
+    re-typing a recent prefix needs no query.
+    """
+    
+    caches = {}
+    
+    def __init__(self, parent, search, executor, label, textvariable=None, on_select=None,
+                 stamp=None, limit=15, debounce_ms=150, cache_size=256, width=40,
+                 font=("Arial", 11)):
+        super().__init__(parent, bg='white')
+        self.search = search
+        self.executor = executor
+        self.label = label
+        self.on_select = on_select
+        self.stamp = stamp
+        self.limit = limit
+        self.debounce_ms = debounce_ms
+        self.cache = self.caches.setdefault(search, LRUCache(cache_size))
+        self.var = textvariable if textvariable is not None else tk.StringVar()
+        self.selected = None
+        self.rows = []
+        self._after = None
+        self._job = None
+        
+        self.entry = tk.Entry(self, textvariable=self.var, font=font, width=width)
+        self.entry.pack(fill='x')
+        self.listbox = tk.Listbox(self, height=min(limit, 8), font=font, width=width)
+        
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Down>", self._focus_list)
+        self.entry.bind("<Escape>", lambda e: self._hide())
+        self.listbox.bind("<Return>", self._pick)
+        self.listbox.bind("<ButtonRelease-1>", self._pick)
+        self.bind("<Destroy>", self._on_destroy, add='+')
+    
+    def get(self):
+        return self.var.get()
+    
+    def clear(self):
+        self.var.set('')
+        self.selected = None
+        self._hide()
+    
+    def _on_destroy(self, event):
+        if event.widget is self:
+            if self._after is not None:
+                self.after_cancel(self._after)
+            if self._job is not None:
+                self._job.cancel()
+    
+    def _on_key(self, event):
+        if event.keysym in ('Down', 'Up', 'Return', 'Escape', 'Tab'):
+            return
+        self.selected = None
+        if self._after is not None:
+            self.after_cancel(self._after)
+        self._after = self.after(self.debounce_ms, self._lookup)
+    
+    def _lookup(self):
+        self._after = None
+        term = self.var.get().strip()
+        if not term:
+            self._hide()
+            return
+        stamp = self.stamp() if self.stamp else None
+        cached = self.cache.get(term)
+        if cached is not None and cached[0] == stamp:
+            self._show(term, cached[1])
+            return
+        if self._job is not None:
+            self._job.cancel()
+        search, limit = self.search, self.limit
+        self._job = self.executor.submit(
+            lambda db: search(db, term, limit),
+            on_done=lambda rows: self._found(term, stamp, rows),
+            label="Looking up matches")
+    
+    def _found(self, term, stamp, rows):
+        self._job = None
+        self.cache.put(term, (stamp, rows))
+        self._show(term, rows)
+    
+    def _show(self, term, rows):
+        if term != self.var.get().strip():
+            return
+        self.rows = rows
+        self.listbox.delete(0, tk.END)
+        for row in rows:
+            self.listbox.insert(tk.END, self.label(row))
+        if rows:
+            self.listbox.pack(fill='x')
+        else:
+            self._hide()
+    
+    def _hide(self):
+        self.listbox.pack_forget()
+    
+    def _focus_list(self, event):
+        if self.rows:
+            self.listbox.focus_set()
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+    
+    def _pick(self, event=None):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        row = self.rows[selection[0]]
+        self.selected = row
+        self.var.set(self.label(row))
+        self._hide()
+        self.entry.focus_set()
+        self.entry.icursor(tk.END)
+        if self.on_select:
+            self.on_select(row)
@@ -0,0 +1,185 @@
+"""Background execution of database jobs for the Tk front end.
+
+Jobs run on a small pool of worker threads, each holding its own SQLite
+connection, so slow queries, locked databases and file I/O never block
+the Tk mainloop. Results are handed back on the Tk thread by polling a
+queue with root.after.
+"""
+import queue
+import threading
+
+from hospital_service import HospitalService, DB_PATH
+
+
+class Job:
+    """A submitted unit of work that can be cancelled at any point"""
+
+    def __init__(self, fn, on_done=None, on_error=None, label=None, on_progress=None):
+        self.fn = fn
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.label = label or getattr(fn, '__name__', 'job')
+        self.state = 'pending'
+        self.cancelled = False
+        self._db = None
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Skip the job if queued, or interrupt its SQL if running"""
+        with self._lock:
+            self.cancelled = True
+            if self.state == 'running' and self._db is not None:
+                self._db.interrupt()
+
+    def _start(self, db):
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.state = 'running'
+            self._db = db
+            return True
+
+    def _finish(self):
+        with self._lock:
+            self.state = 'done'
+            self._db = None
+
+
+class BackgroundExecutor:
+    """Worker pool with per-thread connections and Tk-thread callbacks
+
+    fn receives a HospitalService bound to the worker's connection, or
+    whatever connect() returns when it is given, such as a RemoteService.
+    on_done(result) or on_error(exception) run on the Tk thread unless the
+    job was cancelled. When on_progress is given, fn is called as
+    fn(db, report) and every report(value) from the worker is delivered
+    to on_progress(value) on the Tk thread. on_busy(labels) is called
+    whenever the set of outstanding jobs changes, with an empty list once
+    idle.
+
+    watch() delivers a concurrent.futures.Future completed elsewhere, such
+    as a GroupCommitWriter request, the same way.
+    """
+
+    def __init__(self, root, db_path=DB_PATH, workers=2, poll_ms=50, on_busy=None,
+                 connect=None):
+        self.root = root
+        self.db_path = db_path
+        self.connect = connect or (lambda: HospitalService(self.db_path, initialize=False))
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.progress = queue.Queue()
+        self.outstanding = []
+        self._polling = False
+        self.threads = [threading.Thread(target=self._work, daemon=True,
+                                         name=f"db-worker-{i}")
+                        for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, fn, on_done=None, on_error=None, label=None, on_progress=None):
+        job = Job(fn, on_done, on_error, label, on_progress)
+        self.outstanding.append(job)
+        self.jobs.put(job)
+        self._busy_changed()
+        self._start_polling()
+        return job
+
+    def watch(self, future, on_done=None, on_error=None, label=None):
+        job = Job(None, on_done, on_error, label)
+        job.state = 'running'
+        self.outstanding.append(job)
+        self._busy_changed()
+        self._start_polling()
+        
+        def finished(future):
+            error = future.exception()
+            self.results.put((job, None if error else future.result(), error))
+        
+        future.add_done_callback(finished)
+        return job
+
+    def shutdown(self):
+        for job in list(self.outstanding):
+            job.cancel()
+        for _ in self.threads:
+            self.jobs.put(None)
+
+    def _work(self):
+        db = self.connect()
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    return
+                if not job._start(db):
+                    self.results.put((job, None, None))
+                    continue
+                try:
+                    if job.on_progress:
+                        report = lambda value, job=job: self.progress.put((job, value))
+                        result, error = job.fn(db, report), None
+                    else:
+                        result, error = job.fn(db), None
+                except Exception as e:
+                    result, error = None, e
+                    db.rollback()
+                finally:
+                    job._finish()
+                self.results.put((job, result, error))
+        finally:
+            db.close()
+
+    def _poll(self):
+        """Deliver progress reports and finished jobs on the Tk thread"""
+        latest = {}
+        while True:
+            try:
+                job, value = self.progress.get_nowait()
+            except queue.Empty:
+                break
+            latest[job] = value
+        for job, value in latest.items():
+            if not job.cancelled:
+                try:
+                    job.on_progress(value)
+                except Exception as e:
+                    self.root.report_callback_exception(type(e), e, e.__traceback__)
+        
+        while True:
+            try:
+                job, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.outstanding.remove(job)
+            self._busy_changed()
+            if job.cancelled:
+                continue
+            try:
+                if error is None:
+                    if job.on_done:
+                        job.on_done(result)
+                elif job.on_error:
+                    job.on_error(error)
+                else:
+                    raise error
+            except Exception as e:
+                # Report like any Tk callback error without stopping the poll loop
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+
+        if self.outstanding:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _busy_changed(self):
+        if self.on_busy:
+            self.on_busy([job.label for job in self.outstanding if not job.cancelled])
@@ -0,0 +1,165 @@
+"""Group commit of writes from many callers.
+
+A GroupCommitWriter owns one connection and a queue of write requests.
+Its thread opens a transaction for the first waiting request and keeps
+running the requests that queue up meanwhile in the same transaction,
+until the queue is empty, max_rows rows went in or max_delay_ms has
+passed, and then commits them together. A burst of single-row saves
+from many callers thus costs a few commits (WAL syncs) instead of one
+each, without holding back a save that arrives alone. Each request
+runs inside its own SAVEPOINT: a request that fails is rolled back on
+its own and its exception is given to its caller only, while the rest
+of the batch still commits. A caller's future resolves only once the
+batch holding its request has committed, so an acknowledged write is
+as durable as with a commit of its own.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from hospital_service import HospitalService, DB_PATH, load_profile
+
+# Nothing held back from the last batch (None is close()'s sentinel)
+_EMPTY = object()
+
+
+class _Request:
+    __slots__ = ('fn', 'rows', 'transactional', 'future')
+
+    def __init__(self, fn, rows, transactional):
+        self.fn = fn
+        self.rows = rows
+        self.transactional = transactional
+        self.future = Future()
+
+
+class GroupCommitWriter:
+    """Runs fn(db) write requests in batches on one writer thread
+
+    submit() returns a concurrent.futures.Future with fn's return value
+    or exception; call() waits for it. fn receives the writer's
+    HospitalService and must not commit itself; HospitalService's own
+    transaction() blocks join the batch. rows is how many rows fn
+    writes, for the max_rows bound. A request with transactional=False,
+    such as a WAL checkpoint, runs on its own between batches.
+    on_commit(requests), if given, is called on the writer thread after
+    each batch commits.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_delay_ms=None, max_rows=None, profile=None,
+                 on_commit=None):
+        """max_delay_ms and max_rows default to the profile's
+        group_commit_ms and group_commit_rows"""
+        profile = profile if profile is not None else load_profile()
+        self.db = HospitalService(db_path, profile=profile)
+        self.max_delay = (max_delay_ms if max_delay_ms is not None
+                          else profile['group_commit_ms']) / 1000
+        self.max_rows = max_rows if max_rows is not None else profile['group_commit_rows']
+        self.on_commit = on_commit
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._held = _EMPTY
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="db-writer")
+        self._thread.start()
+
+    def submit(self, fn, rows=1, transactional=True):
+        if self._closed:
+            raise RuntimeError("The writer is closed")
+        request = _Request(fn, rows, transactional)
+        self._queue.put(request)
+        return request.future
+
+    def call(self, fn, rows=1, transactional=True):
+        """submit() and wait for the commit; raises fn's exception"""
+        return self.submit(fn, rows, transactional).result()
+
+    def close(self):
+        """Commit what is queued, then stop the thread and close the connection"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+            self.db.close()
+
+    def _next(self):
+        if self._held is not _EMPTY:
+            request, self._held = self._held, _EMPTY
+            return request
+        return self._queue.get()
+
+    def _run(self):
+        while True:
+            request = self._next()
+            if request is None:
+                break
+            if request.transactional:
+                self._run_batch(request)
+            else:
+                self._run_alone(request)
+        
+        # Submitted while close() was stopping the thread
+        while not self._queue.empty():
+            request = self._queue.get_nowait()
+            if request is not None:
+                request.future.set_exception(RuntimeError("The writer is closed"))
+
+    def _run_alone(self, request):
+        try:
+            result = request.fn(self.db)
+        except BaseException as e:
+            self.db.rollback()
+            request.future.set_exception(e)
+        else:
+            request.future.set_result(result)
+
+    def _run_batch(self, request):
+        """Run request and whatever queues up meanwhile in one transaction"""
+        conn = self.db.conn
+        deadline = time.monotonic() + self.max_delay
+        batch, outcomes, rows = [request], [], request.rows
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            while True:
+                conn.execute("SAVEPOINT request")
+                try:
+                    outcomes.append((request, request.fn(self.db), None))
+                except BaseException as e:
+                    if not conn.in_transaction:
+                        # SQLite rolled the whole batch back (e.g. disk full)
+                        raise
+                    conn.execute("ROLLBACK TO request")
+                    outcomes.append((request, None, e))
+                conn.execute("RELEASE request")
+                
+                if rows >= self.max_rows or time.monotonic() >= deadline:
+                    break
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None or not request.transactional:
+                    # Ends the batch; handled once it has committed
+                    self._held = request
+                    break
+                batch.append(request)
+                rows += request.rows
+            conn.execute("COMMIT")
+            self.db.committed()
+        except BaseException as e:
+            self.db.rollback()
+            # Nothing in the batch was committed
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        self.batches += 1
+        self.requests += len(batch)
+        if self.on_commit:
+            self.on_commit(batch)
+        for request, result, error in outcomes:
+            if error is None:
+                request.future.set_result(result)
+            else:
+                request.future.set_exception(error)